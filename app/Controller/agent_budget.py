@@ -0,0 +1,127 @@
+# app/Controller/agent_budget.py
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from Controller.json_extract import extract_json
+from Controller.metrics import registry
+
+# Get logger
+logger = logging.getLogger("recipe_finder")
+
+# Per-turn limits for the recipe agent; whichever runs out first stops it
+RECIPE_AGENT_MAX_TOOL_CALLS = int(os.getenv("RECIPE_AGENT_MAX_TOOL_CALLS", "6"))
+RECIPE_AGENT_MAX_TOKENS = int(os.getenv("RECIPE_AGENT_MAX_TOKENS", "30000"))
+RECIPE_AGENT_DEADLINE = float(os.getenv("RECIPE_AGENT_DEADLINE", "45"))
+
+# "- Title (uses 2 of your ingredients, 1 more needed): a, b, c" from local_recipe_search, "- Title" from Spoonacular
+_LISTED_RECIPE_RE = re.compile(r"^- (?P<title>.+?)(?: \(uses \d+ of your ingredients, \d+ more needed\))?(?:: (?P<ingredients>.+))?$")
+
+
+@dataclass
+class AgentBudget:
+    max_tool_calls: int = RECIPE_AGENT_MAX_TOOL_CALLS
+    max_tokens: int = RECIPE_AGENT_MAX_TOKENS
+    deadline_s: float = RECIPE_AGENT_DEADLINE
+
+    @property
+    def recursion_limit(self) -> int:
+        # A model step and a tools step per round of tool calls, the final answer, and one spare.
+        # The agent's own limit, so it no longer inherits the outer graph's much smaller one.
+        return 2 * max(self.max_tool_calls, 0) + 3
+
+
+@dataclass
+class BudgetTracker:
+    """
+    Follows a streamed agent run (stream_mode="values") and says when to stop: before tool
+    calls that would go over max_tool_calls, and before any further step once the tokens
+    or the deadline are used up.
+    """
+    budget: AgentBudget = field(default_factory=AgentBudget)
+    started: float = field(default_factory=time.monotonic)
+    tool_calls: int = 0
+    tokens: int = 0
+    stopped: Optional[str] = None
+    _seen: int = 0
+
+    def remaining_s(self) -> float:
+        return self.budget.deadline_s - (time.monotonic() - self.started)
+
+    def observe(self, messages: List[Any]) -> Optional[str]:
+        """Account for the messages added since the last call; returns why to stop, if it should."""
+        for message in messages[self._seen:]:
+            if getattr(message, "type", None) == "ai":
+                usage = getattr(message, "usage_metadata", None) or {}
+                self.tokens += int(usage.get("total_tokens") or 0)
+            elif getattr(message, "type", None) == "tool":
+                self.tool_calls += 1
+        self._seen = len(messages)
+
+        last = messages[-1] if messages else None
+        pending = len(getattr(last, "tool_calls", None) or []) if getattr(last, "type", None) == "ai" else 0
+        if getattr(last, "type", None) == "ai" and not pending:
+            # The final answer is in; nothing left to stop
+            return None
+        if self.remaining_s() <= 0:
+            self.stopped = "deadline"
+        elif self.tokens >= self.budget.max_tokens:
+            self.stopped = "tokens"
+        elif self.tool_calls + pending > self.budget.max_tool_calls:
+            self.stopped = "tool_calls"
+        return self.stopped
+
+    def timed_out(self) -> None:
+        self.stopped = "deadline"
+
+    def outcome(self) -> Dict[str, Any]:
+        """What the turn used against its limits; stored in RecipeState.agent_budget."""
+        registry.inc("recipe_finder_agent_budget_total", "Recipe agent turns by how they ended",
+                     {"outcome": self.stopped or "completed"})
+        return {
+            "stopped": self.stopped,
+            "tool_calls": self.tool_calls,
+            "max_tool_calls": self.budget.max_tool_calls,
+            "tokens": self.tokens,
+            "max_tokens": self.budget.max_tokens,
+            "elapsed_s": round(time.monotonic() - self.started, 2),
+            "deadline_s": self.budget.deadline_s,
+        }
+
+
+def partial_recipes(messages: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Best recipes in an agent run that was stopped early: the newest recipe JSON the model
+    wrote, else the recipes the search tools listed (titles, plus ingredients where given).
+    """
+    for message in reversed(messages):
+        content = getattr(message, "content", None)
+        if getattr(message, "type", None) != "ai" or not isinstance(content, str) or not content.strip():
+            continue
+        data = extract_json(content)
+        if isinstance(data, dict):
+            # {"recipes": [...]} in STRUCTURED_OUTPUT mode, else a single recipe
+            data = data.get("recipes") if isinstance(data.get("recipes"), list) else [data]
+        recipes = [r for r in data or [] if isinstance(r, dict) and r.get("title")]
+        if recipes:
+            return recipes
+
+    recipes: List[Dict[str, Any]] = []
+    seen = set()
+    for message in messages:
+        content = getattr(message, "content", None)
+        if getattr(message, "type", None) != "tool" or not isinstance(content, str):
+            continue
+        for line in content.splitlines():
+            match = _LISTED_RECIPE_RE.match(line.strip())
+            if not match or match.group("title").lower() in seen:
+                continue
+            seen.add(match.group("title").lower())
+            recipe: Dict[str, Any] = {"title": match.group("title")}
+            if match.group("ingredients"):
+                recipe["ingredients"] = [i.strip() for i in match.group("ingredients").split(",") if i.strip()]
+            recipes.append(recipe)
+    return recipes
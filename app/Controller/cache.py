@@ -0,0 +1,163 @@
+# app/Controller/cache.py
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Get logger
+logger = logging.getLogger("recipe_finder")
+
+_MISSING = object()
+
+
+def canonical_key(**fields: Any) -> str:
+    """
+    Build a stable cache key from keyword fields.
+    Strings are lower-cased and stripped, lists are normalized, de-duplicated and sorted,
+    so ["Chicken", "rice"] and ["rice", "chicken "] produce the same key.
+    """
+    def normalize(value):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = value.strip().lower()
+            return value or None
+        if isinstance(value, (list, tuple, set)):
+            items = {normalize(v) for v in value}
+            items.discard(None)
+            return sorted(str(v) for v in items) or None
+        return str(value)
+
+    payload = json.dumps({k: normalize(v) for k, v in fields.items()}, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache with per-entry TTL and an optional SQLite tier.
+    Values must be JSON-serializable when the disk tier is enabled.
+    """
+
+    def __init__(self, name: str, maxsize: int = 256, ttl: float = 3600,
+                 path: Optional[str] = None, max_disk_entries: int = 10000):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0, "expired": 0}
+        self._db = None
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS cache "
+                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+                )
+                self._db.commit()
+            except sqlite3.Error:
+                logger.info(f"Could not open {name} cache at {path}, using memory only")
+                self._db = None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return value
+                del self._entries[key]
+                self._counters["expired"] += 1
+
+            value = self._disk_get(key, now)
+            if value is not _MISSING:
+                self._counters["hits"] += 1
+                self._counters["disk_hits"] += 1
+                self._memory_set(key, value[0], value[1])
+                return value[0]
+
+            self._counters["misses"] += 1
+            return default
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._memory_set(key, value, expires)
+            self._disk_set(key, value, expires)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _memory_set(self, key: str, value: Any, expires: float) -> None:
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _disk_get(self, key: str, now: float):
+        if self._db is None:
+            return _MISSING
+        try:
+            row = self._db.execute(
+                "SELECT value, expires FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return _MISSING
+            if row[1] <= now:
+                self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._db.commit()
+                self._counters["expired"] += 1
+                return _MISSING
+            return json.loads(row[0]), row[1]
+        except (sqlite3.Error, ValueError):
+            return _MISSING
+
+    def _disk_set(self, key: str, value: Any, expires: float) -> None:
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires)
+            )
+            # Drop expired rows first, then the soonest-to-expire ones past the size bound
+            self._db.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+            self._db.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,)
+            )
+            self._db.commit()
+        except (sqlite3.Error, TypeError, ValueError):
+            logger.info(f"Could not write {self.name} cache entry to disk")
+
+
+def cache_from_env(name: str, prefix: str, default_size: int = 256, default_ttl: float = 3600) -> TTLCache:
+    """Create a cache configured by <PREFIX>_CACHE_SIZE, <PREFIX>_CACHE_TTL and <PREFIX>_CACHE_PATH."""
+    return TTLCache(
+        name=name,
+        maxsize=int(os.getenv(f"{prefix}_CACHE_SIZE", default_size)),
+        ttl=float(os.getenv(f"{prefix}_CACHE_TTL", default_ttl)),
+        path=os.getenv(f"{prefix}_CACHE_PATH") or None,
+    )
@@ -0,0 +1,117 @@
+# app/Controller/checkpointing.py
+import asyncio
+import importlib
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple
+
+from langgraph.checkpoint.base import BaseCheckpointSaver, ChannelVersions, Checkpoint, CheckpointMetadata, \
+    CheckpointTuple
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from Controller.settings import REPO_ROOT
+
+# Get logger
+logger = logging.getLogger("recipe_finder")
+
+# "sqlite" (default), "memory", or "package.module:factory" returning a BaseCheckpointSaver
+CHECKPOINTER = os.getenv("CHECKPOINTER", "sqlite")
+# Relative to the repository root by default, so every process on the host shares one file
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", os.path.join(REPO_ROOT, "checkpoints.sqlite"))
+# Checkpoints kept per session; older ones are only needed for time travel
+CHECKPOINT_KEEP = int(os.getenv("CHECKPOINT_KEEP", "10"))
+
+_lock = threading.Lock()
+_checkpointer: Optional[BaseCheckpointSaver] = None
+
+
+class ThreadedSqliteSaver(SqliteSaver):
+    """
+    SqliteSaver usable from graph.astream too: the async methods run the sync ones in a
+    worker thread. SQLite calls take well under a millisecond next to an LLM round trip,
+    so this is simpler than a second, aiosqlite-based saver bound to one event loop.
+    """
+
+    async def aget_tuple(self, config: Dict[str, Any]) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[Dict[str, Any]], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[Dict[str, Any]] = None,
+                    limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config: Dict[str, Any], checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: Dict[str, Any], writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def prune(self, thread_id: str, keep: int = CHECKPOINT_KEEP) -> None:
+        """Drop all but the newest `keep` checkpoints of a thread, with their pending writes."""
+        self.setup()
+        with self.cursor() as cur:
+            # Checkpoint ids are time-ordered, so the newest sort last
+            cur.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = '' "
+                "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+                (str(thread_id), max(keep, 1) - 1),
+            )
+            row = cur.fetchone()
+            if row is None:
+                return
+            cur.execute("DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_id < ?", (str(thread_id), row[0]))
+            cur.execute("DELETE FROM writes WHERE thread_id = ? AND checkpoint_id < ?", (str(thread_id), row[0]))
+
+
+def _serde() -> JsonPlusSerializer:
+    # RecipeState's nested models are stored as-is; allow them back in when a session is loaded
+    return JsonPlusSerializer(allowed_msgpack_modules=[
+        ("state", "Preferences"), ("state", "Recipe"), ("state", "ConversationSummary"),
+    ])
+
+
+def _build_checkpointer(spec: str) -> BaseCheckpointSaver:
+    if spec == "memory":
+        return InMemorySaver(serde=_serde())
+    if spec == "sqlite":
+        # Shared by every worker on the host; WAL (set by setup()) lets them read while one writes
+        conn = sqlite3.connect(CHECKPOINT_PATH, check_same_thread=False, timeout=30)
+        logger.info(f"Checkpointing sessions to {CHECKPOINT_PATH}")
+        return ThreadedSqliteSaver(conn, serde=_serde())
+    module_name, _, attr = spec.partition(":")
+    factory = getattr(importlib.import_module(module_name), attr)
+    return factory()
+
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    """The process-wide checkpointer selected by CHECKPOINTER; falls back to memory if it can't be opened."""
+    global _checkpointer
+    with _lock:
+        if _checkpointer is None:
+            try:
+                _checkpointer = _build_checkpointer(CHECKPOINTER)
+            except Exception:
+                logger.info(f"Could not open checkpointer {CHECKPOINTER!r}, sessions will not survive a restart")
+                _checkpointer = InMemorySaver(serde=_serde())
+        return _checkpointer
+
+
+def prune_session(thread_id: str) -> None:
+    """Bound a session's stored history after a turn, where the checkpointer supports it."""
+    checkpointer = get_checkpointer()
+    if isinstance(checkpointer, ThreadedSqliteSaver):
+        try:
+            checkpointer.prune(thread_id)
+        except sqlite3.Error:
+            logger.info("Failed to prune session checkpoints")
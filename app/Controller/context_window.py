@@ -0,0 +1,143 @@
+# app/Controller/context_window.py
+import logging
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from Controller.preference_rules import extract_rule_based
+from state import ConversationSummary
+
+# Get logger
+logger = logging.getLogger("recipe_finder")
+
+# Most recent messages always sent verbatim (while they fit the budget)
+CONTEXT_RECENT_MESSAGES = int(os.getenv("CONTEXT_RECENT_MESSAGES", "6"))
+# Token budget for the whole conversation section of a prompt, summary included
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+# Share of the budget the summary of older messages may use
+CONTEXT_SUMMARY_TOKENS = int(os.getenv("CONTEXT_SUMMARY_TOKENS", "300"))
+
+NOTE_CHARS = 120
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token), good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+@lru_cache(maxsize=4096)
+def _message_facts(content: str) -> Dict[str, Any]:
+    # Each message is read once with the local rules; results are reused on later turns
+    result, _ = extract_rule_based(content)
+    return result
+
+
+def _note(content: str) -> str:
+    note = " ".join(content.split())
+    return note if len(note) <= NOTE_CHARS else note[:NOTE_CHARS - 1].rstrip() + "…"
+
+
+def fold_messages(summary: ConversationSummary, messages: List[Dict[str, str]]) -> ConversationSummary:
+    """Return a new summary with `messages` (the next ones after summary.folded) folded in."""
+    summary = summary.model_copy(deep=True)
+    for msg in messages:
+        summary.folded += 1
+        # Assistant turns only echo suggestions; the facts come from what the user said
+        if msg.get("role", "user") != "user":
+            continue
+        content = msg.get("content", "")
+        if not content.strip():
+            continue
+        facts = _message_facts(content)
+        prefs = facts["preferences"]
+        if facts["ingredients"]:
+            summary.ingredients = list(facts["ingredients"])
+        for field in ("diet", "cuisine", "prep_time", "craving"):
+            if prefs.get(field):
+                setattr(summary, field, prefs[field])
+        for allergy in prefs.get("allergies") or []:
+            if allergy not in summary.allergies:
+                summary.allergies.append(allergy)
+        summary.notes.append(_note(content))
+
+    # Keep the newest notes that fit; the extracted facts above are never dropped
+    notes, summary.notes = summary.notes, []
+    available = CONTEXT_SUMMARY_TOKENS - estimate_tokens(render_summary(summary))
+    kept = 0
+    for note in reversed(notes):
+        available -= estimate_tokens(note) + 1
+        if available < 0:
+            break
+        kept += 1
+    summary.notes = notes[len(notes) - kept:]
+    return summary
+
+
+def render_summary(summary: ConversationSummary) -> str:
+    """Summary text placed before the verbatim messages; empty when nothing has been folded."""
+    if not summary.folded:
+        return ""
+    facts = []
+    if summary.ingredients:
+        facts.append(f"ingredients: {', '.join(summary.ingredients)}")
+    if summary.diet:
+        facts.append(f"diet: {summary.diet}")
+    if summary.allergies:
+        facts.append(f"allergies: {', '.join(summary.allergies)}")
+    if summary.cuisine:
+        facts.append(f"cuisine: {summary.cuisine}")
+    if summary.prep_time:
+        facts.append(f"prep time: {summary.prep_time} minutes")
+    if summary.craving:
+        facts.append(f"craving: {summary.craving}")
+
+    lines = [f"Summary of {summary.folded} earlier messages:"]
+    if facts:
+        lines.append("The user mentioned " + "; ".join(facts) + ".")
+    if summary.notes:
+        lines.append("Earlier user messages: " + " | ".join(summary.notes))
+    return "\n".join(lines)
+
+
+def build_context(messages: List[Dict[str, str]],
+                  summary: Optional[ConversationSummary] = None) -> Tuple[str, ConversationSummary]:
+    """
+    Conversation text for a prompt: a rolling summary of older messages followed by the
+    most recent messages verbatim, within CONTEXT_TOKEN_BUDGET. Only messages that newly
+    left the window are folded, so the cost per turn stays flat as the history grows.
+    Returns the text and the updated summary to keep in state.
+    """
+    summary = summary or ConversationSummary()
+    if summary.folded > len(messages):
+        # The history was reset underneath us
+        summary = ConversationSummary()
+
+    start = max(summary.folded, len(messages) - CONTEXT_RECENT_MESSAGES)
+    recent = messages[start:]
+    budget = CONTEXT_TOKEN_BUDGET - CONTEXT_SUMMARY_TOKENS
+    used = sum(estimate_tokens(msg.get("content", "")) for msg in recent)
+    # Always keep the latest message, even when it alone is over budget
+    while len(recent) > 1 and used > budget:
+        used -= estimate_tokens(recent[0].get("content", ""))
+        recent = recent[1:]
+        start += 1
+
+    if start > summary.folded:
+        summary = fold_messages(summary, messages[summary.folded:start])
+        logger.info(f"Folded conversation into summary ({summary.folded} messages summarized)")
+
+    parts = [render_summary(summary)] if summary.folded else []
+    parts.extend(msg.get("content", "") for msg in recent)
+    return "\n".join(parts), summary
+
+
+def fit_conversation(text: str) -> str:
+    """
+    build_context for a conversation that only exists as text (one message per line),
+    as handed to query_llm_for_preferences; short conversations come back unchanged.
+    """
+    if estimate_tokens(text) <= CONTEXT_TOKEN_BUDGET:
+        return text
+    messages = [{"role": "user", "content": line} for line in text.splitlines() if line.strip()]
+    windowed, _ = build_context(messages)
+    return windowed
@@ -0,0 +1,25 @@
+# app/Controller/gated_chat_model.py
+from langchain_openai import ChatOpenAI
+
+from Controller.llm_gateway import amodel_slot, model_slot
+
+
+class GatedChatOpenAI(ChatOpenAI):
+    """ChatOpenAI that takes a per-model concurrency slot around every request."""
+
+    def _generate(self, *args, **kwargs):
+        with model_slot(self.model_name):
+            return super()._generate(*args, **kwargs)
+
+    async def _agenerate(self, *args, **kwargs):
+        async with amodel_slot(self.model_name):
+            return await super()._agenerate(*args, **kwargs)
+
+    def _stream(self, *args, **kwargs):
+        with model_slot(self.model_name):
+            yield from super()._stream(*args, **kwargs)
+
+    async def _astream(self, *args, **kwargs):
+        async with amodel_slot(self.model_name):
+            async for chunk in super()._astream(*args, **kwargs):
+                yield chunk
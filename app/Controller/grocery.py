@@ -0,0 +1,147 @@
+# app/Controller/grocery.py
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from Controller.ingredient_lexicon import canonicalize_ingredient, ingredient_names, pluralize
+
+# Assumed to be in every kitchen, so never put on a shopping list
+PANTRY_STAPLES = frozenset({"salt", "black pepper", "water", "vegetable oil", "olive oil", "sugar"})
+
+# Unit -> its spellings; the key is what the shopping list shows
+UNIT_SPELLINGS: Dict[str, List[str]] = {
+    "cup": ["cup", "cups", "c"],
+    "tbsp": ["tbsp", "tbs", "tablespoon", "tablespoons", "T"],
+    "tsp": ["tsp", "teaspoon", "teaspoons", "t"],
+    "g": ["g", "gram", "grams", "gr"],
+    "kg": ["kg", "kilogram", "kilograms"],
+    "ml": ["ml", "milliliter", "milliliters", "millilitre", "millilitres"],
+    "l": ["l", "liter", "liters", "litre", "litres"],
+    "oz": ["oz", "ounce", "ounces"],
+    "lb": ["lb", "lbs", "pound", "pounds"],
+    "clove": ["clove", "cloves"],
+    "can": ["can", "cans", "tin", "tins"],
+    "slice": ["slice", "slices"],
+    "pinch": ["pinch", "pinches"],
+    "dash": ["dash", "dashes"],
+    "bunch": ["bunch", "bunches"],
+    "handful": ["handful", "handfuls"],
+    "package": ["package", "packages", "pack", "packs", "packet", "packets"],
+    "stick": ["stick", "sticks"],
+    "sprig": ["sprig", "sprigs"],
+    "piece": ["piece", "pieces"],
+}
+UNITS = {spelling: unit for unit, spellings in UNIT_SPELLINGS.items() for spelling in spellings}
+# Shown as-is for any amount; the other units are pluralized
+ABBREVIATED_UNITS = {"tbsp", "tsp", "g", "kg", "ml", "l", "oz", "lb"}
+
+# Descriptions that say how an ingredient is prepared, not what to buy
+PREPARATION_WORDS = {
+    "chopped", "diced", "minced", "sliced", "grated", "shredded", "crushed", "peeled", "cubed", "halved",
+    "quartered", "julienned", "beaten", "melted", "softened", "cooked", "uncooked", "boneless", "skinless",
+    "finely", "roughly", "thinly", "freshly", "fresh", "large", "medium", "small", "ripe", "optional", "about",
+}
+
+_FRACTIONS = {"½": "1/2", "¼": "1/4", "¾": "3/4", "⅓": "1/3", "⅔": "2/3", "⅛": "1/8"}
+# "1 1/2", "1/2", "1.5", "2-3" (the lower bound is used), "500g" (the unit is split off below)
+_QUANTITY_RE = re.compile(r"^\s*(\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?)(?:\s*(?:-|to)\s*[\d./]+)?\s*")
+_UNIT_RE = re.compile(r"^([A-Za-z]+)\.?(?:\s+|$)")
+_PARENTHESES_RE = re.compile(r"\([^)]*\)")
+_NOTES_RE = re.compile(r",.*$|\bto taste\b|\bfor (?:serving|garnish)\b", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class ParsedIngredient:
+    line: str
+    quantity: Optional[float]
+    unit: Optional[str]
+    names: Tuple[str, ...]
+
+
+def _to_number(text: str) -> float:
+    total = 0.0
+    for part in text.split():
+        if "/" in part:
+            numerator, denominator = part.split("/")
+            total += float(numerator) / float(denominator) if float(denominator) else 0.0
+        else:
+            total += float(part)
+    return total
+
+
+@lru_cache(maxsize=8192)
+def parse_ingredient(line: str) -> ParsedIngredient:
+    """Split "1 1/2 cups basmati rice, rinsed" into quantity 1.5, unit "cup" and the canonical items ("rice",)."""
+    # "1 (14 oz) can tomatoes": the can is what gets bought
+    text = _PARENTHESES_RE.sub(" ", str(line)).strip()
+    for symbol, fraction in _FRACTIONS.items():
+        text = text.replace(symbol, f" {fraction}")
+
+    quantity: Optional[float] = None
+    match = _QUANTITY_RE.match(text)
+    if match:
+        quantity = _to_number(match.group(1))
+        text = text[match.end():]
+
+    unit: Optional[str] = None
+    match = _UNIT_RE.match(text)
+    if match and (match.group(1) in UNITS or match.group(1).lower() in UNITS):
+        # Single letters are case-sensitive ("T" tablespoon, "t" teaspoon); the rest are not
+        unit = UNITS.get(match.group(1)) or UNITS[match.group(1).lower()]
+        text = text[match.end():]
+        if text.lower().startswith("of "):
+            text = text[3:]
+
+    text = _NOTES_RE.sub(" ", text)
+    words = [w for w in text.split() if w.lower().strip(".,;:") not in PREPARATION_WORDS]
+    cleaned = " ".join(words).strip(" .,;:-")
+    names = ingredient_names(cleaned) if cleaned else ()
+    return ParsedIngredient(line=str(line).strip(), quantity=quantity, unit=unit, names=tuple(n for n in names if n))
+
+
+def pantry_set(ingredients: Iterable[str]) -> Set[str]:
+    """Canonical names of what the user has, plus the staples every kitchen is assumed to have."""
+    return {canonicalize_ingredient(i) for i in ingredients or [] if i} | PANTRY_STAPLES
+
+
+def recipe_grocery_list(ingredients: List[Any], pantry: Set[str]) -> List[str]:
+    """Ingredient lines of a recipe the user still has to buy, with their quantities."""
+    items: List[str] = []
+    for line in ingredients or []:
+        parsed = parse_ingredient(str(line))
+        missing = [name for name in parsed.names if name not in pantry]
+        if not missing:
+            continue
+        # Keep the recipe's own wording unless only part of a combined line is missing
+        items.append(parsed.line if len(missing) == len(parsed.names) else ", ".join(missing))
+    return items
+
+
+def shopping_list(recipes: List[Dict[str, Any]], pantry: Set[str]) -> List[str]:
+    """One de-duplicated list for all recipes: each missing item once, with quantities summed per unit."""
+    totals: Dict[str, Dict[Optional[str], float]] = {}
+    for recipe in recipes:
+        for line in recipe.get("ingredients") or []:
+            parsed = parse_ingredient(str(line))
+            for name in parsed.names:
+                if name in pantry:
+                    continue
+                amounts = totals.setdefault(name, {})
+                if parsed.quantity is not None:
+                    amounts[parsed.unit] = amounts.get(parsed.unit, 0.0) + parsed.quantity
+
+    items = []
+    for name, amounts in totals.items():
+        quantities = " + ".join(_format_amount(q, unit) for unit, q in amounts.items())
+        items.append(f"{name} ({quantities})" if quantities else name)
+    return items
+
+
+def _format_amount(quantity: float, unit: Optional[str]) -> str:
+    amount = f"{round(quantity, 2):g}"
+    if not unit:
+        return amount
+    if quantity != 1 and unit not in ABBREVIATED_UNITS:
+        unit = pluralize(unit)
+    return f"{amount} {unit}"
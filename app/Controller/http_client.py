@@ -0,0 +1,156 @@
+# app/Controller/http_client.py
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from tenacity import (
+    AsyncRetrying,
+    Retrying,
+    retry_if_exception_type,
+    retry_if_result,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+# Get logger
+logger = logging.getLogger("recipe_finder")
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+
+# Transient statuses worth another attempt; everything else goes straight back to the caller
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+# httpx pools are bound to the event loop that opened them, so keep one client per loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+class PerLoopTransport(httpx.AsyncBaseTransport):
+    """
+    Async transport that keeps one connection pool per event loop, for AsyncClients that
+    outlive a loop (built once per process, used from several asyncio.run calls).
+    """
+
+    def __init__(self, factory: Callable[[], httpx.AsyncBaseTransport]):
+        self._factory = factory
+        self._transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncBaseTransport]" = \
+            weakref.WeakKeyDictionary()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        loop = asyncio.get_running_loop()
+        transport = self._transports.get(loop)
+        if transport is None:
+            transport = self._transports[loop] = self._factory()
+        return await transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+def get_session(url: str) -> requests.Session:
+    """Return the keep-alive session for the URL's host, creating its connection pool on first use."""
+    parts = urlsplit(url)
+    host = f"{parts.scheme}://{parts.netloc}"
+    session = _sessions.get(host)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            # Retries are handled by tenacity below so they get jittered backoff
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=0)
+            session.mount(f"{parts.scheme}://", adapter)
+            _sessions[host] = session
+            logger.info(f"Opened HTTP connection pool for {host}")
+    return session
+
+
+def request(method: str, url: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+            json: Optional[dict] = None, timeout: Optional[Tuple[float, float]] = None,
+            max_retries: Optional[int] = None) -> requests.Response:
+    """
+    Send a request through the pooled session for the URL's host.
+    Connection errors, timeouts and transient statuses are retried with jittered exponential backoff.
+    Once retries run out, the last response is returned or the last exception is raised.
+    """
+    session = get_session(url)
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    attempts = (MAX_RETRIES if max_retries is None else max_retries) + 1
+
+    retrying = Retrying(
+        stop=stop_after_attempt(attempts),
+        wait=wait_random_exponential(multiplier=0.5, max=8),
+        retry=(
+            retry_if_exception_type((requests.ConnectionError, requests.Timeout))
+            | retry_if_result(lambda response: response.status_code in RETRY_STATUSES)
+        ),
+        # Hand back the final response, or re-raise the final exception
+        retry_error_callback=lambda retry_state: retry_state.outcome.result(),
+    )
+    return retrying(
+        session.request, method, url, params=params, headers=headers, json=json, timeout=timeout
+    )
+
+
+def get(url: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+        timeout: Optional[Tuple[float, float]] = None,
+        max_retries: Optional[int] = None) -> requests.Response:
+    """GET through the shared pool with timeouts and retries."""
+    return request("GET", url, params=params, headers=headers, timeout=timeout, max_retries=max_retries)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the pooled AsyncClient for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_keepalive_connections=POOL_SIZE, max_connections=POOL_SIZE * 2),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aget(url: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+               max_retries: Optional[int] = None) -> httpx.Response:
+    """Async GET with the same timeout and retry policy as get()."""
+    client = get_async_client()
+    attempts = (MAX_RETRIES if max_retries is None else max_retries) + 1
+    # httpx rejects None query values, which requests silently drops
+    params = {k: v for k, v in (params or {}).items() if v is not None}
+
+    retrying = AsyncRetrying(
+        stop=stop_after_attempt(attempts),
+        wait=wait_random_exponential(multiplier=0.5, max=8),
+        retry=(
+            retry_if_exception_type((httpx.TransportError,))
+            | retry_if_result(lambda response: response.status_code in RETRY_STATUSES)
+        ),
+        retry_error_callback=lambda retry_state: retry_state.outcome.result(),
+    )
+    return await retrying(client.get, url, params=params, headers=headers)
+
+
+def close_sessions() -> None:
+    """Close every pooled session (used by benchmarks and on shutdown)."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,452 @@
+# app/Controller/ingredient_lexicon.py
+import re
+from collections import deque
+from functools import lru_cache
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Canonical ingredient -> synonyms. Plurals are generated, so only list singular forms here.
+LEXICON: Dict[str, List[str]] = {
+    # Proteins
+    "chicken": ["chicken breast", "chicken thigh", "chicken wing", "chicken drumstick"],
+    "beef": ["ground beef", "minced beef", "steak", "beef mince"],
+    "pork": ["pork chop", "pork loin", "pork shoulder"],
+    "lamb": ["lamb chop", "mutton"],
+    "turkey": ["ground turkey", "turkey breast"],
+    "bacon": ["streaky bacon"],
+    "ham": [],
+    "sausage": ["chorizo", "bratwurst"],
+    "egg": [],
+    "tofu": ["bean curd"],
+    "tempeh": [],
+    "shrimp": ["prawn"],
+    "salmon": [],
+    "tuna": [],
+    "cod": ["white fish"],
+    "fish": [],
+    "crab": [],
+    "chickpea": ["garbanzo", "garbanzo bean"],
+    "lentil": ["red lentil", "green lentil"],
+    "black bean": [],
+    "kidney bean": [],
+    "bean": [],
+    # Dairy
+    "milk": ["whole milk", "skim milk"],
+    "butter": [],
+    "cheese": [],
+    "cheddar": ["cheddar cheese"],
+    "mozzarella": ["mozzarella cheese"],
+    "parmesan": ["parmesan cheese", "parmigiano", "parmigiano reggiano"],
+    "feta": ["feta cheese"],
+    "cream cheese": [],
+    "cream": ["heavy cream", "double cream", "whipping cream"],
+    "sour cream": [],
+    "yogurt": ["yoghurt", "greek yogurt", "greek yoghurt"],
+    # Grains and starches
+    "rice": ["white rice", "brown rice", "basmati", "basmati rice", "jasmine rice"],
+    "pasta": ["spaghetti", "penne", "fusilli", "macaroni", "linguine", "fettuccine"],
+    "noodle": ["egg noodle", "rice noodle", "ramen"],
+    "bread": ["loaf", "baguette", "sourdough"],
+    "tortilla": ["wrap"],
+    "flour": ["all purpose flour", "plain flour", "wheat flour"],
+    "oat": ["oats", "oatmeal", "rolled oats"],
+    "quinoa": [],
+    "couscous": [],
+    "potato": ["spud"],
+    "sweet potato": ["yam"],
+    "corn": ["sweetcorn", "maize"],
+    # Vegetables
+    "tomato": ["cherry tomato", "roma tomato"],
+    "onion": ["red onion", "yellow onion", "white onion"],
+    "green onion": ["scallion", "spring onion"],
+    "shallot": [],
+    "garlic": ["garlic clove", "clove of garlic"],
+    "ginger": ["ginger root"],
+    "carrot": [],
+    "celery": [],
+    "bell pepper": ["capsicum", "sweet pepper", "red pepper", "green pepper", "yellow pepper"],
+    "chili": ["chilli", "chile", "chili pepper", "jalapeno", "jalapeño"],
+    "broccoli": [],
+    "cauliflower": [],
+    "cabbage": [],
+    "spinach": ["baby spinach"],
+    "kale": [],
+    "lettuce": ["romaine"],
+    "cucumber": [],
+    "zucchini": ["courgette"],
+    "eggplant": ["aubergine"],
+    "mushroom": ["button mushroom", "shiitake", "portobello"],
+    "pea": ["green pea", "garden pea"],
+    "green bean": ["string bean"],
+    "asparagus": [],
+    "avocado": [],
+    "pumpkin": ["butternut squash", "squash"],
+    "beet": ["beetroot"],
+    "radish": [],
+    "leek": [],
+    "olive": [],
+    # Fruit
+    "lemon": [],
+    "lime": [],
+    "orange": [],
+    "apple": [],
+    "banana": [],
+    "strawberry": [],
+    "blueberry": [],
+    "raspberry": [],
+    "mango": [],
+    "pineapple": [],
+    "coconut": [],
+    "coconut milk": [],
+    # Herbs and spices
+    "basil": [],
+    "cilantro": ["coriander leaf", "fresh coriander"],
+    "parsley": [],
+    "mint": [],
+    "rosemary": [],
+    "thyme": [],
+    "oregano": [],
+    "dill": [],
+    "cumin": [],
+    "paprika": ["smoked paprika"],
+    "cinnamon": [],
+    "turmeric": [],
+    "curry powder": [],
+    # A bare "pepper" is black pepper in a recipe's ingredient line (LINE_ALIASES) but ambiguous from a user
+    "black pepper": ["peppercorn"],
+    "salt": ["sea salt", "kosher salt"],
+    # Pantry
+    "olive oil": ["extra virgin olive oil", "evoo"],
+    "vegetable oil": ["canola oil", "sunflower oil", "cooking oil", "oil"],
+    "sesame oil": [],
+    "soy sauce": ["soya sauce", "tamari"],
+    "vinegar": ["white vinegar", "balsamic vinegar", "apple cider vinegar"],
+    "sugar": ["white sugar", "granulated sugar"],
+    "brown sugar": [],
+    "honey": [],
+    "maple syrup": [],
+    "chocolate": ["dark chocolate"],
+    "chocolate chip": [],
+    "peanut butter": [],
+    "peanut": [],
+    "almond": [],
+    "walnut": [],
+    "cashew": [],
+    "tomato paste": ["tomato puree"],
+    "tomato sauce": ["passata", "marinara"],
+    "chicken broth": ["chicken stock"],
+    "vegetable broth": ["vegetable stock"],
+    "baking powder": [],
+    "baking soda": ["bicarbonate of soda"],
+    "yeast": [],
+    "mayonnaise": ["mayo"],
+    "mustard": ["dijon", "dijon mustard"],
+    "ketchup": [],
+}
+
+# Words that carry no ingredient information and never lower confidence
+STOPWORDS: Set[str] = {
+    "a", "an", "and", "the", "i", "i've", "ive", "im", "i'm", "have", "has", "got", "get", "some",
+    "of", "with", "in", "my", "me", "we", "our", "there", "is", "are", "few", "bit", "lots", "lot",
+    "also", "plus", "or", "just", "only", "little", "fridge", "pantry", "kitchen", "left", "leftover",
+    "leftovers", "available", "can", "could", "you", "use", "using", "what", "make", "cook", "do",
+    "recipe", "recipes", "something", "anything", "ingredients", "ingredient", "please", "hi", "hello",
+    "hey", "would", "like", "to", "for", "it", "that", "this", "these", "those", "at", "home", "on",
+    "hand", "fresh", "frozen", "canned", "dried", "found", "right", "now", "currently", "all", "suggest",
+    "ideas", "idea", "dish", "meal", "cooking", "want", "need", "about", "how", "which", "looking",
+    "am", "be", "so", "very", "really", "maybe", "think", "let", "let's", "lets", "try", "thanks",
+    "thank", "as", "well", "too", "from", "by", "will", "go", "going", "yes", "yeah", "ok", "okay",
+}
+
+# Words that signal the message needs real understanding (negation, replacement, allergies)
+AMBIGUITY_MARKERS: Set[str] = {
+    "no", "not", "without", "allergic", "allergy", "allergies", "instead", "except", "avoid", "can't",
+    "cant", "cannot", "don't", "dont", "hate", "never", "but", "replace", "rather", "out",
+}
+
+# Non-ingredient food words that must never be "corrected" into an ingredient (e.g. spicy -> spice)
+PROTECTED_WORDS: Set[str] = {
+    "spicy", "sweet", "savory", "savoury", "quick", "easy", "healthy", "light", "hearty", "vegan",
+    "vegetarian", "keto", "paleo", "halal", "kosher", "gluten", "free", "dairy", "low", "high", "carb",
+    "carbs", "protein", "sugar", "italian", "mexican", "chinese", "indian", "thai", "japanese", "french",
+    "greek", "spanish", "korean", "asian", "breakfast", "lunch", "dinner", "snack", "dessert", "minutes",
+    "minute", "mins", "hour", "hours", "soup", "salad", "stew", "curry", "pie", "cake", "cookies",
+    "craving", "mood", "tonight", "today", "cheesy", "creamy", "salty", "meaty", "buttery", "garlicky", "lemony",
+    "nutty", "fruity", "smoky", "tangy", "zesty", "herby", "peppery", "crunchy", "crispy", "saucy", "chocolatey",
+    "chocolaty", "oniony", "fishy", "eggy", "milky", "juicy", "sugary", "minty", "gingery",
+}
+
+# Words that name different ingredients depending on who says them ("peppers": bell or black?);
+# a message with one the lexicon couldn't place goes to the LLM
+AMBIGUOUS_WORDS: Set[str] = {"pepper", "peppers"}
+
+# Extra surface forms for ingredient lines only, where the convention is clear ("salt and pepper")
+LINE_ALIASES: Dict[str, str] = {"pepper": "black pepper"}
+
+_TOKEN_RE = re.compile(r"[a-zà-ÿ]+(?:'[a-z]+)?")
+
+
+def pluralize(word: str) -> str:
+    if word.endswith(("s", "x", "z", "ch", "sh", "o")):
+        return word + "es"
+    if word.endswith("y") and len(word) > 1 and word[-2] not in "aeiou":
+        return word[:-1] + "ies"
+    if word.endswith("f"):
+        return word[:-1] + "ves"
+    return word + "s"
+
+
+def _phrase_variants(phrase: str) -> Set[str]:
+    words = phrase.split()
+    variants = {phrase}
+    variants.add(" ".join(words[:-1] + [pluralize(words[-1])]))
+    # Simple "+s" plurals cover foods that break the rules above (e.g. "tomatos", "mangos")
+    variants.add(" ".join(words[:-1] + [words[-1] + "s"]))
+    return variants
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def damerau_levenshtein(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance; returns max_distance + 1 once it is exceeded."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev_prev: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(prev[j] + 1, current[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], prev_prev[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > max_distance:
+            return max_distance + 1
+        prev_prev, prev = prev, current
+    return prev[-1]
+
+
+class _PhraseMatcher:
+    """Aho-Corasick automaton over word tokens, so multi-word phrases match in one pass."""
+
+    def __init__(self, phrases: Dict[Tuple[str, ...], str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]
+
+        for words, canonical in phrases.items():
+            node = 0
+            for word in words:
+                nxt = self._goto[node].get(word)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][word] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((len(words), canonical))
+
+        # Breadth-first fail links; outputs inherit from their fail state
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for word, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                if node:
+                    self._fail[child] = self._goto[fail].get(word, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, tokens: List[str]) -> List[Tuple[int, int, str]]:
+        """Return leftmost-longest, non-overlapping (start, end, canonical) matches."""
+        matches = []
+        node = 0
+        for i, token in enumerate(tokens):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            for length, canonical in self._out[node]:
+                matches.append((i - length + 1, i + 1, canonical))
+
+        matches.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+        selected = []
+        covered_until = 0
+        for start, end, canonical in matches:
+            if start >= covered_until:
+                selected.append((start, end, canonical))
+                covered_until = end
+        return selected
+
+
+class _SpellCorrector:
+    """SymSpell-style corrector: precomputed delete variants map typos back to vocabulary words."""
+
+    def __init__(self, vocabulary: Iterable[str]):
+        self._vocabulary = set(vocabulary)
+        self._deletes: Dict[str, Set[str]] = {}
+        for word in self._vocabulary:
+            for variant in self._delete_variants(word, self._max_distance(len(word))):
+                self._deletes.setdefault(variant, set()).add(word)
+
+    @staticmethod
+    def _max_distance(length: int) -> int:
+        if length <= 4:
+            return 0
+        return 1 if length <= 7 else 2
+
+    @staticmethod
+    def _delete_variants(word: str, distance: int) -> Set[str]:
+        variants = {word}
+        frontier = {word}
+        for _ in range(distance):
+            frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+            variants |= frontier
+        return variants
+
+    def correct(self, word: str) -> Optional[str]:
+        """Return the unique closest vocabulary word, or None if there is none or it's a tie."""
+        if word in self._vocabulary:
+            return word
+        max_distance = self._max_distance(len(word))
+        if not max_distance:
+            return None
+
+        candidates: Set[str] = set()
+        for variant in self._delete_variants(word, max_distance):
+            candidates |= self._deletes.get(variant, set())
+
+        best: Optional[str] = None
+        best_distance = max_distance + 1
+        tied = False
+        for candidate in candidates:
+            distance = damerau_levenshtein(word, candidate, max_distance)
+            if distance < best_distance:
+                best, best_distance, tied = candidate, distance, False
+            elif distance == best_distance:
+                tied = True
+        return None if tied or best_distance > max_distance else best
+
+
+def _adjective_of(token: str, word: str) -> bool:
+    # -y adjective formed from a noun: cheesy/cheese, meaty/meat, nutty/nut
+    return token.endswith("y") and word in (token[:-1], token[:-1] + "e", token[:-2])
+
+
+@dataclass
+class IngredientMatch:
+    ingredients: List[str] = field(default_factory=list)
+    confidence: float = 0.0
+    corrections: Dict[str, str] = field(default_factory=dict)
+    unknown: List[str] = field(default_factory=list)
+
+
+class IngredientLexicon:
+    """Canonicalizes ingredient names and pulls ingredient lists out of free text without an LLM."""
+
+    def __init__(self, lexicon: Dict[str, List[str]]):
+        self._canonical: Dict[str, str] = {}
+        for canonical, synonyms in lexicon.items():
+            for surface in [canonical, *synonyms]:
+                for variant in _phrase_variants(surface):
+                    self._canonical.setdefault(variant, canonical)
+
+        phrases = {tuple(k.split()): v for k, v in self._canonical.items()}
+        self._matcher = _PhraseMatcher(phrases)
+        line_phrases = {tuple(variant.split()): canonical for alias, canonical in LINE_ALIASES.items()
+                        for variant in _phrase_variants(alias)}
+        self._line_matcher = _PhraseMatcher({**line_phrases, **phrases})
+        vocabulary = {word for phrase in self._canonical for word in phrase.split()}
+        self._known_words = vocabulary | STOPWORDS | AMBIGUITY_MARKERS | PROTECTED_WORDS
+        self._corrector = _SpellCorrector(vocabulary)
+
+    def canonicalize(self, name: str) -> str:
+        """Map any known surface form ("Tomatoes", "scallion") to its canonical name."""
+        key = " ".join(tokenize(name))
+        if key in self._canonical:
+            return self._canonical[key]
+        # Fall back to the canonical phrase contained in the name ("2 ripe tomatoes" -> "tomato")
+        matches = self._matcher.find(key.split())
+        if len(matches) == 1:
+            return matches[0][2]
+        return key or " ".join(str(name).lower().split())
+
+    def canonical_names(self, name: str) -> List[str]:
+        """Every canonical ingredient in an ingredient line ("salt and pepper to taste" -> salt, black pepper)."""
+        key = " ".join(tokenize(name))
+        if key in self._canonical:
+            return [self._canonical[key]]
+        names: List[str] = []
+        for _, _, canonical in self._line_matcher.find(key.split()):
+            if canonical not in names:
+                names.append(canonical)
+        return names or [key or " ".join(str(name).lower().split())]
+
+    def extract(self, text: str) -> IngredientMatch:
+        """
+        Find ingredients in a message. Confidence is the share of meaningful words that were
+        explained by ingredient matches, reduced for typo corrections and zeroed when the
+        message contains negation or replacement language.
+        """
+        tokens = tokenize(text)
+        result = IngredientMatch()
+
+        corrected_tokens = []
+        for token in tokens:
+            if token in self._known_words:
+                corrected_tokens.append(token)
+                continue
+            correction = self._corrector.correct(token)
+            if correction and _adjective_of(token, correction):
+                # "cheesy" describes the dish; it doesn't name cheese
+                correction = None
+            if correction:
+                result.corrections[token] = correction
+                corrected_tokens.append(correction)
+            else:
+                corrected_tokens.append(token)
+
+        matches = self._matcher.find(corrected_tokens)
+        covered = set()
+        for start, end, canonical in matches:
+            covered.update(range(start, end))
+            if canonical not in result.ingredients:
+                result.ingredients.append(canonical)
+
+        content = [i for i, token in enumerate(corrected_tokens) if token not in STOPWORDS]
+        result.unknown = [corrected_tokens[i] for i in content if i not in covered]
+
+        if (not result.ingredients or any(token in AMBIGUITY_MARKERS for token in tokens)
+                or any(token in AMBIGUOUS_WORDS for token in result.unknown)):
+            result.confidence = 0.0
+            return result
+
+        explained = sum(1 for i in content if i in covered)
+        confidence = explained / len(content) if content else 0.0
+        confidence -= 0.1 * len(result.corrections)
+        result.confidence = max(0.0, min(1.0, confidence))
+        return result
+
+
+# Built once at import; construction takes a few milliseconds
+lexicon = IngredientLexicon(LEXICON)
+
+
+@lru_cache(maxsize=8192)
+def canonicalize_ingredient(name: str) -> str:
+    return lexicon.canonicalize(name)
+
+
+def extract_ingredients(text: str) -> IngredientMatch:
+    return lexicon.extract(text)
+
+
+@lru_cache(maxsize=8192)
+def ingredient_names(line: str) -> Tuple[str, ...]:
+    return tuple(lexicon.canonical_names(line))
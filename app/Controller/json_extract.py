@@ -0,0 +1,187 @@
+# app/Controller/json_extract.py
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Sequence
+
+# Get logger
+logger = logging.getLogger("recipe_finder")
+
+TAGGED = "tagged"   # inside <structured_data>...</structured_data>
+FENCED = "fenced"   # inside a ``` code fence
+BARE = "bare"       # anywhere else in the text
+
+_OPEN_TAG = "<structured_data>"
+_CLOSE_TAG = "</structured_data>"
+# Every character the scanner has to look at; search() skips the rest at C speed
+_TOKEN_RE = re.compile(r"<structured_data>|</structured_data>|```|[\[\]{}\"]")
+_STRING_RE = re.compile(r'"(?:[^"\\\n]|\\.)*"')
+_LINE_OR_REGION_RE = re.compile(r"\n|```|<structured_data>|</structured_data>")
+_TAG_BLOCK_RE = re.compile(r"<structured_data>.*?(?:</structured_data>|$)", re.DOTALL)
+_PAIRS = {"}": "{", "]": "["}
+_DECODER = json.JSONDecoder()
+
+
+@dataclass(frozen=True)
+class JsonSpan:
+    kind: str
+    start: int
+    end: int
+    complete: bool
+    # Already-decoded value when the span parsed on the first try
+    value: Any = field(default=None, compare=False, repr=False)
+
+
+def scan_json_spans(text: str) -> List[JsonSpan]:
+    """
+    Find candidate JSON objects/arrays in one left-to-right pass.
+    Returns the outermost balanced spans (plus the unterminated span a region ends in,
+    for repair), each tagged with the kind of region it sits in.
+    """
+    spans: List[JsonSpan] = []
+    region = BARE
+    stack: List[tuple] = []  # (bracket, position)
+
+    def close_region(end: int) -> None:
+        if stack:
+            spans.append(JsonSpan(region, stack[0][1], end, False))
+
+    pos = 0
+    search = _TOKEN_RE.search
+    _decode = _DECODER.raw_decode
+    while True:
+        match = search(text, pos)
+        if match is None:
+            break
+        token = match.group()
+        pos = match.end()
+
+        if len(token) > 1:
+            # Region markers; a span never crosses one
+            if token == _OPEN_TAG:
+                new_region = TAGGED
+            elif token == _CLOSE_TAG:
+                new_region = BARE
+            elif region == TAGGED:
+                continue
+            else:
+                new_region = BARE if region == FENCED else FENCED
+            close_region(match.start())
+            region, stack = new_region, []
+            continue
+
+        if token == '"':
+            # Quotes only matter inside a bracketed span; jump over the whole string
+            if stack:
+                string = _STRING_RE.match(text, match.start())
+                if string:
+                    pos = string.end()
+                elif _LINE_OR_REGION_RE.search(text, pos) is None:
+                    # Unterminated in the last line: truncated output, kept open for repair
+                    pos = len(text)
+                else:
+                    # More lines or regions follow: a stray quote in prose, so what was
+                    # open wasn't JSON; keep scanning (later fences included) after it
+                    stack = []
+        elif token in "{[":
+            if not stack:
+                # Well-formed JSON is decoded and skipped in one C-level call; the
+                # bracket matching below only walks spans that fail to decode
+                try:
+                    value, end = _decode(text, match.start())
+                except ValueError:
+                    pass
+                else:
+                    spans.append(JsonSpan(region, match.start(), end, True, value))
+                    pos = end
+                    continue
+            stack.append((token, match.start()))
+        elif stack and stack[-1][0] == _PAIRS[token]:
+            _, start = stack.pop()
+            if len(stack) <= 1:
+                # Keep direct children of an open span too, in case the opener was just
+                # prose ("[see below] {...}"); once the opener closes they are superseded
+                while not stack and spans and spans[-1].start > start:
+                    spans.pop()
+                spans.append(JsonSpan(region, start, pos, True))
+        else:
+            # Stray closer: whatever was open wasn't JSON
+            stack = []
+
+    close_region(len(text))
+    return spans
+
+
+def _loads(candidate: str) -> Optional[Any]:
+    try:
+        return json.loads(candidate)
+    except (json.JSONDecodeError, ValueError):
+        return None
+
+
+def _repair(candidate: str) -> Optional[Any]:
+    # Only reached for truncated or malformed output, so json_repair loads on first need
+    from json_repair import repair_json
+    try:
+        result = json.loads(repair_json(candidate))
+    except Exception:
+        return None
+    return result if result not in ("", None) else None
+
+
+def extract_json(text: str, kinds: Sequence[str] = (TAGGED, FENCED, BARE)) -> Optional[Any]:
+    """
+    Parse the JSON in an LLM response. Regions are tried in `kinds` order; within one,
+    the longest span that parses wins. repair_json is only run on truncated spans or
+    when nothing parses.
+    Returns None when no JSON could be recovered.
+    """
+    if not text:
+        return None
+    spans = scan_json_spans(text)
+    for kind in kinds:
+        candidates = sorted((s for s in spans if s.kind == kind), key=lambda s: s.end - s.start, reverse=True)
+        if not candidates:
+            continue
+        longest = candidates[0]
+        # A span cut off by the end of its region is most likely truncated output;
+        # repairing it beats settling for one of its complete children
+        if not longest.complete:
+            result = _repair(text[longest.start:longest.end])
+            if result is not None:
+                logger.info("Repaired truncated JSON in LLM response")
+                return result
+        for span in candidates:
+            if span.value is not None:
+                return span.value
+            if span.complete:
+                result = _loads(text[span.start:span.end])
+                if result is not None:
+                    return result
+        if longest.complete:
+            result = _repair(text[longest.start:longest.end])
+            if result is not None:
+                logger.info("Repaired malformed JSON in LLM response")
+                return result
+    return None
+
+
+def strip_tagged(text: str) -> str:
+    """Remove <structured_data> blocks, leaving only the conversational text."""
+    if _OPEN_TAG not in text:
+        return text.strip()
+    return _TAG_BLOCK_RE.sub("", text).strip()
+
+
+def response_text(response: Any) -> str:
+    """Text of the last non-empty message of an agent response, a plain string or a message."""
+    if isinstance(response, dict) and "messages" in response:
+        for msg in reversed(response.get("messages", [])):
+            content = getattr(msg, "content", None)
+            if content:
+                return content.strip()
+        return ""
+    if isinstance(response, str):
+        return response.strip()
+    return getattr(response, "content", str(response)).strip()
@@ -0,0 +1,24 @@
+# app/Controller/llm_cache.py
+import hashlib
+from typing import Any
+
+from Controller.cache import cache_from_env, canonical_key
+
+# Shared by every deterministic LLM extraction; configured by LLM_CACHE_SIZE/_TTL/_PATH
+llm_cache = cache_from_env("llm", "LLM", default_size=1024, default_ttl=24 * 3600)
+
+
+def normalize_conversation(text: str) -> str:
+    """Whitespace and case differences don't change what the model extracts."""
+    return " ".join(str(text).split()).lower()
+
+
+def llm_cache_key(model: str, temperature: Any, prompt_version: str, conversation: str) -> str:
+    """Content address for an extraction: (model, temperature, prompt version, conversation hash)."""
+    digest = hashlib.sha256(normalize_conversation(conversation).encode("utf-8")).hexdigest()
+    return canonical_key(
+        model=model,
+        temperature=temperature,
+        prompt_version=prompt_version,
+        conversation=digest
+    )
@@ -0,0 +1,233 @@
+# app/Controller/llm_gateway.py
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel
+
+from Controller.metrics import record_tokens, span
+from Controller.settings import load_env
+
+# httpx, openai and langchain_openai take most of a cold start; they load with the first client
+if TYPE_CHECKING:
+    import httpx
+    import openai
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.runnables import Runnable
+
+# Get logger
+logger = logging.getLogger("recipe_finder")
+
+load_env()
+
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+DEFAULT_MODEL = "mistralai/mistral-7b-instruct:free"
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+# Requests allowed in flight per model, shared by every caller in the process
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "20"))
+# Opt-in: ask the provider for schema-constrained JSON instead of prompting for it
+STRUCTURED_OUTPUT = os.getenv("STRUCTURED_OUTPUT", "false").lower() in ("1", "true", "yes")
+
+_lock = threading.Lock()
+_http_client: Optional["httpx.Client"] = None
+_async_http_client: Optional["httpx.AsyncClient"] = None
+_openai_client: Optional["openai.OpenAI"] = None
+_async_openai_client: Optional["openai.AsyncOpenAI"] = None
+_chat_models: Dict[Tuple[str, float], "BaseChatModel"] = {}
+_chat_model_factory: Optional[Callable[[str, float], "BaseChatModel"]] = None
+_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+# asyncio semaphores are bound to the loop they are first awaited on, so one set per loop
+_async_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = \
+    weakref.WeakKeyDictionary()
+
+
+def _timeout() -> "httpx.Timeout":
+    import httpx
+    return httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+
+
+def _limits() -> "httpx.Limits":
+    import httpx
+    return httpx.Limits(max_connections=LLM_POOL_SIZE, max_keepalive_connections=LLM_POOL_SIZE)
+
+
+def get_http_client() -> "httpx.Client":
+    """The one pooled HTTP client used for every sync LLM request."""
+    global _http_client
+    import httpx
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(timeout=_timeout(), limits=_limits())
+        return _http_client
+
+
+def get_async_http_client() -> "httpx.AsyncClient":
+    """
+    The one HTTP client used for every async LLM request. The chat models hold on to it
+    for the life of the process, so its connection pools are kept per event loop
+    (see Controller.http_client, which does the same for the tool clients).
+    """
+    global _async_http_client
+    import httpx
+    from Controller.http_client import PerLoopTransport
+    with _lock:
+        if _async_http_client is None:
+            transport = PerLoopTransport(lambda: httpx.AsyncHTTPTransport(limits=_limits()))
+            _async_http_client = httpx.AsyncClient(timeout=_timeout(), transport=transport)
+        return _async_http_client
+
+
+@contextmanager
+def model_slot(model: str):
+    """Hold one of the model's concurrency slots for the duration of a sync request."""
+    with _lock:
+        semaphore = _semaphores.setdefault(model, threading.BoundedSemaphore(LLM_MAX_CONCURRENCY))
+    with semaphore:
+        yield
+
+
+@asynccontextmanager
+async def amodel_slot(model: str):
+    """Async counterpart of model_slot; the limit applies per event loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        semaphores = _async_semaphores.setdefault(loop, {})
+        semaphore = semaphores.setdefault(model, asyncio.Semaphore(LLM_MAX_CONCURRENCY))
+    async with semaphore:
+        yield
+
+
+def get_openai_client() -> "openai.OpenAI":
+    """Shared OpenRouter client for direct chat-completion calls."""
+    global _openai_client
+    import openai
+    http_client = get_http_client()
+    with _lock:
+        if _openai_client is None:
+            _openai_client = openai.OpenAI(
+                base_url=OPENROUTER_BASE_URL,
+                api_key=os.getenv("OPENROUTER_API_KEY"),
+                http_client=http_client,
+                timeout=_timeout(),
+                max_retries=LLM_MAX_RETRIES
+            )
+        return _openai_client
+
+
+def get_async_openai_client() -> "openai.AsyncOpenAI":
+    """Async counterpart of get_openai_client."""
+    global _async_openai_client
+    import openai
+    http_client = get_async_http_client()
+    with _lock:
+        if _async_openai_client is None:
+            _async_openai_client = openai.AsyncOpenAI(
+                base_url=OPENROUTER_BASE_URL,
+                api_key=os.getenv("OPENROUTER_API_KEY"),
+                http_client=http_client,
+                timeout=_timeout(),
+                max_retries=LLM_MAX_RETRIES
+            )
+        return _async_openai_client
+
+
+def json_schema_format(model_cls: Type[BaseModel]) -> Dict[str, Any]:
+    """response_format for a chat completion constrained to the pydantic model's JSON schema."""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": model_cls.__name__, "schema": model_cls.model_json_schema()}
+    }
+
+
+def get_structured_agent_model(temperature: float, tools: Sequence[Any], schema: Type[BaseModel],
+                               model: str = DEFAULT_MODEL) -> "Runnable":
+    """
+    The shared chat model with `tools` bound and its answers constrained to `schema`. In a
+    ReAct agent the final step then is the structured output, with no extra model call
+    (create_react_agent's response_format adds one after every final answer).
+    """
+    return get_chat_model(temperature, model=model).bind_tools(tools).bind(response_format=json_schema_format(schema))
+
+
+def chat_completion(messages: List[Dict[str, str]], model: str = DEFAULT_MODEL,
+                    temperature: float = 0.3, **kwargs):
+    """Chat completion through the shared client, limited by the model's concurrency slots."""
+    with span(model, "llm") as llm_span, model_slot(model):
+        response = get_openai_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            **kwargs
+        )
+        _record_usage(llm_span, model, response)
+        return response
+
+
+async def achat_completion(messages: List[Dict[str, str]], model: str = DEFAULT_MODEL,
+                           temperature: float = 0.3, **kwargs):
+    """Async chat_completion."""
+    with span(model, "llm") as llm_span:
+        async with amodel_slot(model):
+            response = await get_async_openai_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                **kwargs
+            )
+        _record_usage(llm_span, model, response)
+        return response
+
+
+def _record_usage(llm_span, model: str, response: Any) -> None:
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        record_tokens(llm_span, model, usage.prompt_tokens, usage.completion_tokens)
+
+
+def set_chat_model_factory(factory: Optional[Callable[[str, float], "BaseChatModel"]]) -> None:
+    """
+    Build chat models with factory(model, temperature) instead of OpenRouter, e.g. a fake
+    model for offline benchmarks. Call before the agents are imported; None restores the default.
+    """
+    global _chat_model_factory
+    with _lock:
+        _chat_model_factory = factory
+        _chat_models.clear()
+
+
+def get_chat_model(temperature: float, model: str = DEFAULT_MODEL) -> "BaseChatModel":
+    """Return the shared chat model for (model, temperature); all of them share one connection pool."""
+    key = (model, temperature)
+    model_instance = _chat_models.get(key)
+    if model_instance is not None:
+        return model_instance
+
+    with _lock:
+        if _chat_model_factory is not None:
+            return _chat_models.setdefault(key, _chat_model_factory(model, temperature))
+
+    from Controller.gated_chat_model import GatedChatOpenAI
+    http_client = get_http_client()
+    async_http_client = get_async_http_client()
+    with _lock:
+        if key not in _chat_models:
+            _chat_models[key] = GatedChatOpenAI(
+                model=model,
+                openai_api_base=OPENROUTER_BASE_URL,
+                openai_api_key=os.getenv("OPENROUTER_API_KEY"),
+                temperature=temperature,
+                timeout=_timeout(),
+                max_retries=LLM_MAX_RETRIES,
+                http_client=http_client,
+                http_async_client=async_http_client
+            )
+            logger.info(f"Created chat model {model} (temperature={temperature})")
+        return _chat_models[key]
@@ -1,21 +1,49 @@
 # llm_helper.py
-import os
-import json
-from state import RecipeState
-from typing import Dict
-from dotenv import load_dotenv
-import openai
-import requests
+import copy
+from pydantic import ValidationError
+from state import ExtractionResult, RecipeState
+from Controller.preference_rules import extract_rule_based, merge_preferences, record_outcome
+from Controller.llm_cache import llm_cache, llm_cache_key
+from Controller.context_window import fit_conversation
+from Controller.json_extract import BARE, FENCED, extract_json
+from Controller.llm_gateway import (
+    DEFAULT_MODEL, STRUCTURED_OUTPUT, achat_completion, chat_completion, json_schema_format
+)
+from typing import Any, Dict, Generator, List, Optional, Tuple
 import logging
 
 # Get logger
 logger = logging.getLogger("recipe_finder")
 
-load_dotenv()
-
-def query_llm_for_preferences(conversation_history: str) -> Dict:
-    """Uses LLM to extract structured user preferences from conversation."""
-    logger.info("Querying LLM for preferences")
+PREFERENCES_MODEL = DEFAULT_MODEL
+PREFERENCES_TEMPERATURE = 0.3
+# Bump whenever the extraction prompt below changes so cached results are not reused
+PREFERENCES_PROMPT_VERSION = "1"
+
+def _resolve_without_llm(conversation_history: str) -> Tuple[Dict, Optional[Dict], str]:
+    # Local rules first, then the cache; returns (rule_result, resolved result or None, cache key)
+    rule_result, fully_handled = extract_rule_based(conversation_history)
+    rule_prefs = rule_result["preferences"]
+    partially_handled = bool(rule_result["ingredients"]) or any(rule_prefs.values())
+    record_outcome(fully_handled, partially_handled)
+    if fully_handled:
+        logger.info("Preferences resolved locally, skipping LLM")
+        return rule_result, rule_result, ""
+
+    # The rules read everything; the LLM (and so the cache key) only sees the budgeted window
+    cache_key = llm_cache_key(
+        PREFERENCES_MODEL, PREFERENCES_TEMPERATURE, PREFERENCES_PROMPT_VERSION,
+        fit_conversation(conversation_history)
+    )
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        logger.info("Using cached preference extraction")
+        return rule_result, copy.deepcopy(cached), cache_key
+    return rule_result, None, cache_key
+
+
+def _preference_messages(conversation_history: str) -> List[Dict[str, str]]:
+    conversation_history = fit_conversation(conversation_history)
     prompt = f"""
 You are a helpful cooking assistant. Extract the following fields from the user's conversation:
 - Ingredients (a list of individual ingredients)
@@ -94,63 +122,99 @@ RESPOND ONLY WITH THIS EXACT JSON FORMAT:
 }}
 Only include fields if user has mentioned them. If prep_time is not specified, use null.
 """
+    return [
+        {"role": "system", "content": prompt},
+        {"role": "user", "content": conversation_history}
+    ]
+
+
+# Everything but the LLM call, written once: the flow yields the chat_completion arguments and
+# is sent the response (or has the call's exception thrown in), so the sync and async
+# functions only differ in how they make the call.
+def _preferences_flow(conversation_history: str) -> Generator[Dict[str, Any], Any, Dict]:
+    rule_result, resolved, cache_key = _resolve_without_llm(conversation_history)
+    if resolved is not None:
+        return resolved
+
+    logger.info("Querying LLM for preferences")
     # OpenRouter implementation
     try:
-        client = openai.OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=os.getenv("OPENROUTER_API_KEY")
-        )
-
-        response = client.chat.completions.create(
-            model="mistralai/mistral-7b-instruct:free",
-            messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": conversation_history}
-            ],
-            temperature=0.3
-        )
+        response = yield {
+            "messages": _preference_messages(conversation_history),
+            "model": PREFERENCES_MODEL,
+            "temperature": PREFERENCES_TEMPERATURE,
+            **_structured_output_kwargs()
+        }
         content = response.choices[0].message.content
         logger.info("Received LLM response")
+        llm_succeeded = True
     except Exception:
         logger.info("Error calling OpenRouter API")
         content = '{}'
+        llm_succeeded = False
+
+    return _finish_preferences(rule_result, content, llm_succeeded, cache_key)
 
-    # Parse the JSON response
+
+def query_llm_for_preferences(conversation_history: str) -> Dict:
+    """
+    Extracts structured user preferences from conversation.
+    Diet, allergies, cuisine, prep time, craving and plain ingredient lists are read with local
+    rules first; the LLM is only called when some of the text is left unexplained.
+    """
+    flow = _preferences_flow(conversation_history)
     try:
-        # Try to clean up the response if it's not valid JSON
-        cleaned_content = content
-        # If response contains markdown code blocks, extract just the JSON
-        if "```json" in cleaned_content:
-            start = cleaned_content.find("```json") + 7
-            end = cleaned_content.find("```", start)
-            if end == -1:
-                end = len(cleaned_content)
-            cleaned_content = cleaned_content[start:end].strip()
-        elif "```" in cleaned_content:
-            start = cleaned_content.find("```") + 3
-            end = cleaned_content.find("```", start)
-            if end == -1:
-                end = len(cleaned_content)
-            cleaned_content = cleaned_content[start:end].strip()
-            
-        # Try to find JSON object in the text
-        if "{" in cleaned_content and "}" in cleaned_content:
-            start = cleaned_content.find("{")
-            # Count braces to find the matching closing brace
-            brace_count = 0
-            for i in range(start, len(cleaned_content)):
-                if cleaned_content[i] == "{":
-                    brace_count += 1
-                elif cleaned_content[i] == "}":
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end = i + 1
-                        break
-            cleaned_content = cleaned_content[start:end]
-            
-        result = json.loads(cleaned_content)
+        request = next(flow)
+        try:
+            response = chat_completion(**request)
+        except Exception as e:
+            flow.throw(e)
+        else:
+            flow.send(response)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def aquery_llm_for_preferences(conversation_history: str) -> Dict:
+    """Async query_llm_for_preferences; the LLM call awaits instead of blocking a thread."""
+    flow = _preferences_flow(conversation_history)
+    try:
+        request = next(flow)
+        try:
+            response = await achat_completion(**request)
+        except Exception as e:
+            flow.throw(e)
+        else:
+            flow.send(response)
+    except StopIteration as stop:
+        return stop.value
+
+
+def _structured_output_kwargs() -> Dict:
+    # Schema-constrained output when STRUCTURED_OUTPUT is on
+    if STRUCTURED_OUTPUT:
+        return {"response_format": json_schema_format(ExtractionResult)}
+    return {}
+
+
+def _finish_preferences(rule_result: Dict, content: str, llm_succeeded: bool, cache_key: str) -> Dict:
+    result = None
+    if STRUCTURED_OUTPUT:
+        # Schema-constrained output validates straight into the model, no repair pass
+        try:
+            result = ExtractionResult.model_validate_json(content).model_dump()
+            logger.info("Validated structured LLM response")
+        except ValidationError:
+            logger.info("Structured LLM response did not validate, parsing leniently")
+
+    # Parse the JSON response (fenced or bare; repaired only if it doesn't parse as is)
+    if result is None:
+        result = extract_json(content, kinds=(FENCED, BARE))
+    # Only a reply that parsed is cached; an unreadable one is retried next time
+    parsed = isinstance(result, dict)
+    if parsed:
         logger.info("Successfully parsed LLM JSON response")
-    except json.JSONDecodeError:
+    else:
         logger.info("JSON parsing error, using default structure")
         # Return a minimal valid structure
         result = {
@@ -179,4 +243,8 @@ Only include fields if user has mentioned them. If prep_time is not specified, u
     if "allergies" not in prefs:
         prefs["allergies"] = []
     
-    return result
\ No newline at end of file
+    # Fields the rules already resolved win over the LLM's reading
+    merged = merge_preferences(rule_result, result)
+    if llm_succeeded and parsed:
+        llm_cache.set(cache_key, merged)
+    return merged
\ No newline at end of file
@@ -0,0 +1,223 @@
+# app/Controller/metrics.py
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+# Get logger
+logger = logging.getLogger("recipe_finder")
+
+# Serve Prometheus metrics on this port when set
+METRICS_PORT = os.getenv("METRICS_PORT")
+# Append finished traces here as OTLP/JSON lines when set
+TRACE_DUMP_PATH = os.getenv("TRACE_DUMP_PATH")
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Registry:
+    """Counters and histograms kept in memory and rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, List[float]]] = {}
+        self._help: Dict[str, Tuple[str, str]] = {}
+
+    def inc(self, name: str, help_text: str, labels: Dict[str, str], value: float = 1.0) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._help.setdefault(name, ("counter", help_text))
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, help_text: str, labels: Dict[str, str], value: float) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._help.setdefault(name, ("histogram", help_text))
+            series = self._histograms.setdefault(name, {})
+            # One slot per bucket, then sum and count
+            state = series.setdefault(key, [0.0] * (len(DURATION_BUCKETS) + 2))
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in self._counters.items():
+                kind, help_text = self._help[name]
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+            for name, series in self._histograms.items():
+                kind, help_text = self._help[name]
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                for key, state in series.items():
+                    for bound, count in zip(DURATION_BUCKETS, state):
+                        lines.append(f"{name}_bucket{_format_labels(key + (('le', f'{bound:g}'),))} {count:g}")
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', '+Inf'),))} {state[-1]:g}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {state[-2]:.6f}")
+                    lines.append(f"{name}_count{_format_labels(key)} {state[-1]:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(key: Labels) -> str:
+    if not key:
+        return ""
+    body = ",".join(f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in key)
+    return "{" + body + "}"
+
+
+registry = _Registry()
+
+
+@dataclass
+class Span:
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("recipe_finder_span", default=None)
+_pending_traces: Dict[str, List[Span]] = {}
+_trace_lock = threading.Lock()
+
+
+def start_span(name: str, kind: str, parent: Optional[Span] = None, **attributes: Any) -> Span:
+    """Open a span under `parent` (default: the current span, if any)."""
+    parent = parent if parent is not None else current_span.get()
+    return Span(
+        name=name,
+        kind=kind,
+        trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+        span_id=uuid.uuid4().hex[:16],
+        parent_id=parent.span_id if parent else None,
+        attributes=dict(attributes),
+    )
+
+
+def end_span(span: Span, error: Optional[BaseException] = None) -> None:
+    """Close a span: record its duration and, with TRACE_DUMP_PATH set, queue it for the trace dump."""
+    span.end_ns = time.time_ns()
+    if error is not None:
+        span.error = f"{type(error).__name__}: {error}"
+    labels = {"kind": span.kind, "name": span.name}
+    registry.observe("recipe_finder_span_duration_seconds", "Duration of graph nodes, agent steps, tools and LLM calls",
+                     labels, (span.end_ns - span.start_ns) / 1e9)
+    registry.inc("recipe_finder_spans_total", "Finished spans by outcome",
+                 {**labels, "status": "error" if span.error else "ok"})
+    if TRACE_DUMP_PATH:
+        _queue_for_dump(span)
+
+
+def record_tokens(span: Span, model: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+    """Attach token usage to an LLM span and count it per model."""
+    for token_type, count in (("prompt", prompt_tokens), ("completion", completion_tokens)):
+        if count:
+            span.attributes[f"llm.usage.{token_type}_tokens"] = count
+            registry.inc("recipe_finder_llm_tokens_total", "LLM tokens by model and type",
+                         {"model": model, "type": token_type}, count)
+
+
+@contextmanager
+def span(name: str, kind: str, **attributes: Any):
+    """Time a block as a child of the current span."""
+    current = start_span(name, kind, **attributes)
+    token = current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        end_span(current, e)
+        raise
+    else:
+        end_span(current)
+    finally:
+        current_span.reset(token)
+
+
+def _queue_for_dump(span: Span) -> None:
+    # A trace is written once its root span ends
+    with _trace_lock:
+        spans = _pending_traces.setdefault(span.trace_id, [])
+        spans.append(span)
+        if span.parent_id is not None:
+            return
+        spans = _pending_traces.pop(span.trace_id)
+    try:
+        with open(TRACE_DUMP_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(_to_otlp(spans)) + "\n")
+    except OSError:
+        logger.info("Failed to write trace dump")
+
+
+def _to_otlp(spans: List[Span]) -> Dict[str, Any]:
+    def attribute(key: str, value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    return {"resourceSpans": [{
+        "resource": {"attributes": [attribute("service.name", "recipe_finder")]},
+        "scopeSpans": [{
+            "scope": {"name": "recipe_finder"},
+            "spans": [{
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                "parentSpanId": s.parent_id or "",
+                "name": s.name,
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": [attribute("recipe_finder.kind", s.kind)]
+                              + [attribute(k, v) for k, v in s.attributes.items()],
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            } for s in spans],
+        }],
+    }]}
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: Optional[int] = None) -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics from a daemon thread on `port` (default METRICS_PORT); None when unset."""
+    port = port if port is not None else (int(METRICS_PORT) if METRICS_PORT else None)
+    if port is None:
+        return None
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Serving Prometheus metrics on port {server.server_address[1]}")
+    return server
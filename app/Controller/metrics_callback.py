@@ -0,0 +1,118 @@
+# app/Controller/metrics_callback.py
+import threading
+import uuid
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from Controller.metrics import Span, current_span, end_span, record_tokens, start_span
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Turns LangChain callbacks into spans: the graph run, each graph node and agent step,
+    each tool call and each chat model call (with token usage).
+    """
+    run_inline = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans: Dict[UUID, Span] = {}
+        # Every run's parent, so spans link up through runnables we don't record
+        self._parents: Dict[UUID, Optional[UUID]] = {}
+
+    def _nearest_span(self, run_id: Optional[UUID]) -> Optional[Span]:
+        while run_id is not None:
+            found = self._spans.get(run_id)
+            if found is not None:
+                return found
+            run_id = self._parents.get(run_id)
+        return None
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, kind: str, **attributes: Any) -> Span:
+        with self._lock:
+            self._parents[run_id] = parent_run_id
+            parent = self._nearest_span(parent_run_id)
+            new_span = start_span(name, kind, parent=parent, **attributes) if parent else \
+                Span(name=name, kind=kind, trace_id=uuid.uuid4().hex, span_id=uuid.uuid4().hex[:16],
+                     attributes=dict(attributes))
+            self._spans[run_id] = new_span
+        return new_span
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None) -> Optional[Span]:
+        with self._lock:
+            self._parents.pop(run_id, None)
+            ended = self._spans.pop(run_id, None)
+        if ended is not None:
+            end_span(ended, error)
+        return ended
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        name = kwargs.get("name") or ((serialized or {}).get("name")) or "chain"
+        node = (metadata or {}).get("langgraph_node")
+        if parent_run_id is None:
+            self._start(run_id, None, name, "graph")
+        else:
+            with self._lock:
+                enclosing = self._nearest_span(parent_run_id)
+            # The runnable a node wraps carries the node's name and metadata too; skip it
+            if not node or node != name or (enclosing is not None and enclosing.name == name):
+                with self._lock:
+                    self._parents[run_id] = parent_run_id
+                return
+            # Nodes of the agents' own graphs run inside one of our graph nodes
+            kind = "agent_step" if enclosing is not None and enclosing.kind in ("node", "agent_step") else "node"
+            self._start(run_id, parent_run_id, name, kind)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        tool_span = self._start(run_id, parent_run_id, name, "tool")
+        # Direct LLM calls made by the tool (gateway.chat_completion) nest under it
+        current_span.set(tool_span)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        ended = self._end(run_id)
+        if ended is not None and current_span.get() is ended:
+            current_span.set(None)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        ended = self._end(run_id, error)
+        if ended is not None and current_span.get() is ended:
+            current_span.set(None)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        model = (metadata or {}).get("ls_model_name") or (serialized or {}).get("name") or "chat_model"
+        self._start(run_id, parent_run_id, model, "llm")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            llm_span = self._spans.get(run_id)
+        if llm_span is not None:
+            prompt_tokens, completion_tokens = _usage_from_result(response)
+            record_tokens(llm_span, llm_span.name, prompt_tokens, completion_tokens)
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+
+def _usage_from_result(response: Any) -> Tuple[Optional[int], Optional[int]]:
+    usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens"), usage.get("completion_tokens")
+    for generations in getattr(response, "generations", None) or []:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                return metadata.get("input_tokens"), metadata.get("output_tokens")
+    return None, None
+
+
+metrics_callback = MetricsCallbackHandler()
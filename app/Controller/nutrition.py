@@ -0,0 +1,264 @@
+# app/Controller/nutrition.py
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from Controller.grocery import parse_ingredient
+
+# numpy loads on the first estimate, not when the graph module is imported
+if TYPE_CHECKING:
+    import numpy as np
+
+# Share of a recipe's ingredient lines that must be in the table before the estimate
+# replaces the calories the model gave
+MIN_COVERAGE = float(os.getenv("NUTRITION_MIN_COVERAGE", "0.5"))
+
+# Canonical ingredient -> (kcal, protein g, fat g, carbs g) per 100 g, grams per cup,
+# grams per piece. Approximate USDA values; meats and grains raw, legumes cooked or canned.
+# Names match ingredient_lexicon's canonical names. None: not bought by the cup / by the piece.
+NUTRIENTS: Dict[str, Tuple[float, float, float, float, Optional[float], Optional[float]]] = {
+    # Proteins
+    "chicken": (165, 31.0, 3.6, 0.0, 140, 175),
+    "beef": (250, 26.0, 15.0, 0.0, 225, 150),
+    "pork": (242, 27.0, 14.0, 0.0, 225, 150),
+    "lamb": (294, 25.0, 21.0, 0.0, 225, 150),
+    "turkey": (189, 29.0, 7.0, 0.0, 140, 150),
+    "bacon": (541, 37.0, 42.0, 1.4, 60, 12),
+    "ham": (145, 21.0, 6.0, 1.5, 140, 30),
+    "sausage": (301, 12.0, 27.0, 2.0, 130, 75),
+    "egg": (143, 12.6, 9.5, 0.7, 243, 50),
+    "tofu": (76, 8.0, 4.8, 1.9, 250, 350),
+    "tempeh": (192, 20.0, 11.0, 7.6, 166, 225),
+    "shrimp": (99, 24.0, 0.3, 0.2, 145, 15),
+    "salmon": (208, 20.0, 13.0, 0.0, 140, 150),
+    "tuna": (132, 28.0, 1.0, 0.0, 140, 150),
+    "cod": (82, 18.0, 0.7, 0.0, 140, 150),
+    "fish": (100, 20.0, 2.0, 0.0, 140, 150),
+    "crab": (97, 19.0, 1.5, 0.0, 135, 150),
+    "chickpea": (164, 8.9, 2.6, 27.0, 164, None),
+    "lentil": (116, 9.0, 0.4, 20.0, 198, None),
+    "black bean": (132, 8.9, 0.5, 24.0, 172, None),
+    "kidney bean": (127, 8.7, 0.5, 22.8, 177, None),
+    "bean": (130, 8.7, 0.5, 23.0, 175, None),
+    # Dairy
+    "milk": (61, 3.2, 3.3, 4.8, 244, None),
+    "butter": (717, 0.9, 81.0, 0.1, 227, 14),
+    "cheese": (402, 25.0, 33.0, 1.3, 113, 28),
+    "cheddar": (402, 25.0, 33.0, 1.3, 113, 28),
+    "mozzarella": (280, 28.0, 17.0, 3.1, 112, 28),
+    "parmesan": (431, 38.0, 29.0, 4.1, 100, 5),
+    "feta": (264, 14.0, 21.0, 4.1, 150, 28),
+    "cream cheese": (342, 6.0, 34.0, 4.0, 232, 28),
+    "cream": (340, 2.8, 36.0, 2.8, 238, None),
+    "sour cream": (198, 2.4, 19.0, 4.6, 230, None),
+    "yogurt": (61, 3.5, 3.3, 4.7, 245, 170),
+    # Grains and starches
+    "rice": (365, 7.1, 0.7, 80.0, 185, None),
+    "pasta": (371, 13.0, 1.5, 75.0, 100, None),
+    "noodle": (384, 14.0, 4.4, 71.0, 100, None),
+    "bread": (265, 9.0, 3.2, 49.0, 45, 30),
+    "tortilla": (310, 8.0, 8.0, 50.0, None, 45),
+    "flour": (364, 10.0, 1.0, 76.0, 125, None),
+    "oat": (389, 17.0, 7.0, 66.0, 81, None),
+    "quinoa": (368, 14.0, 6.0, 64.0, 170, None),
+    "couscous": (376, 13.0, 0.6, 77.0, 173, None),
+    "potato": (77, 2.0, 0.1, 17.0, 150, 213),
+    "sweet potato": (86, 1.6, 0.1, 20.0, 133, 130),
+    "corn": (86, 3.3, 1.4, 19.0, 145, 90),
+    # Vegetables
+    "tomato": (18, 0.9, 0.2, 3.9, 180, 123),
+    "onion": (40, 1.1, 0.1, 9.3, 160, 110),
+    "green onion": (32, 1.8, 0.2, 7.3, 100, 15),
+    "shallot": (72, 2.5, 0.1, 17.0, 160, 40),
+    "garlic": (149, 6.4, 0.5, 33.0, 136, 3),
+    "ginger": (80, 1.8, 0.8, 18.0, 96, 15),
+    "carrot": (41, 0.9, 0.2, 9.6, 128, 61),
+    "celery": (16, 0.7, 0.2, 3.0, 101, 40),
+    "bell pepper": (26, 1.0, 0.3, 6.0, 149, 120),
+    "chili": (40, 1.9, 0.4, 9.0, 75, 15),
+    "broccoli": (34, 2.8, 0.4, 7.0, 91, 300),
+    "cauliflower": (25, 1.9, 0.3, 5.0, 107, 575),
+    "cabbage": (25, 1.3, 0.1, 5.8, 89, 900),
+    "spinach": (23, 2.9, 0.4, 3.6, 30, 10),
+    "kale": (49, 4.3, 0.9, 8.8, 67, 10),
+    "lettuce": (15, 1.4, 0.2, 2.9, 47, 300),
+    "cucumber": (15, 0.7, 0.1, 3.6, 119, 300),
+    "zucchini": (17, 1.2, 0.3, 3.1, 124, 200),
+    "eggplant": (25, 1.0, 0.2, 6.0, 82, 450),
+    "mushroom": (22, 3.1, 0.3, 3.3, 70, 18),
+    "pea": (81, 5.4, 0.4, 14.0, 145, None),
+    "green bean": (31, 1.8, 0.2, 7.0, 110, 5),
+    "asparagus": (20, 2.2, 0.1, 3.9, 134, 16),
+    "avocado": (160, 2.0, 15.0, 8.5, 150, 150),
+    "pumpkin": (26, 1.0, 0.1, 6.5, 116, None),
+    "beet": (43, 1.6, 0.2, 9.6, 136, 82),
+    "radish": (16, 0.7, 0.1, 3.4, 116, 5),
+    "leek": (61, 1.5, 0.3, 14.0, 89, 90),
+    "olive": (115, 0.8, 11.0, 6.0, 134, 4),
+    # Fruit
+    "lemon": (29, 1.1, 0.3, 9.3, 212, 60),
+    "lime": (30, 0.7, 0.2, 10.5, 212, 67),
+    "orange": (47, 0.9, 0.1, 12.0, 180, 130),
+    "apple": (52, 0.3, 0.2, 14.0, 125, 180),
+    "banana": (89, 1.1, 0.3, 23.0, 150, 118),
+    "strawberry": (32, 0.7, 0.3, 7.7, 152, 12),
+    "blueberry": (57, 0.7, 0.3, 14.5, 148, 1),
+    "raspberry": (52, 1.2, 0.7, 12.0, 123, 2),
+    "mango": (60, 0.8, 0.4, 15.0, 165, 200),
+    "pineapple": (50, 0.5, 0.1, 13.0, 165, 900),
+    "coconut": (354, 3.3, 33.0, 15.0, 80, None),
+    "coconut milk": (230, 2.3, 24.0, 6.0, 240, None),
+    # Herbs and spices
+    "basil": (23, 3.2, 0.6, 2.7, 21, 0.5),
+    "cilantro": (23, 2.1, 0.5, 3.7, 16, 0.5),
+    "parsley": (36, 3.0, 0.8, 6.3, 60, 0.5),
+    "mint": (70, 3.8, 0.9, 15.0, 50, 0.5),
+    "rosemary": (131, 3.3, 5.9, 21.0, 50, 1),
+    "thyme": (101, 5.6, 1.7, 24.0, 50, 1),
+    "oregano": (265, 9.0, 4.3, 69.0, 50, 1),
+    "dill": (43, 3.5, 1.1, 7.0, 9, 1),
+    "cumin": (375, 18.0, 22.0, 44.0, 96, None),
+    "paprika": (282, 14.0, 13.0, 54.0, 109, None),
+    "cinnamon": (247, 4.0, 1.2, 81.0, 125, 3),
+    "turmeric": (312, 9.7, 3.3, 67.0, 136, None),
+    "curry powder": (325, 14.0, 14.0, 56.0, 100, None),
+    "black pepper": (251, 10.0, 3.3, 64.0, 116, None),
+    "salt": (0, 0.0, 0.0, 0.0, 288, None),
+    # Oils, sauces and sweeteners
+    "olive oil": (884, 0.0, 100.0, 0.0, 216, None),
+    "vegetable oil": (884, 0.0, 100.0, 0.0, 218, None),
+    "sesame oil": (884, 0.0, 100.0, 0.0, 218, None),
+    "soy sauce": (53, 8.0, 0.6, 4.9, 255, None),
+    "vinegar": (18, 0.0, 0.0, 0.0, 239, None),
+    "sugar": (387, 0.0, 0.0, 100.0, 200, None),
+    "brown sugar": (380, 0.1, 0.0, 98.0, 220, None),
+    "honey": (304, 0.3, 0.0, 82.0, 339, None),
+    "maple syrup": (260, 0.0, 0.1, 67.0, 315, None),
+    "chocolate": (546, 4.9, 31.0, 61.0, 170, 10),
+    "chocolate chip": (479, 4.2, 24.0, 64.0, 168, None),
+    "peanut butter": (588, 25.0, 50.0, 20.0, 258, None),
+    "peanut": (567, 26.0, 49.0, 16.0, 146, 1),
+    "almond": (579, 21.0, 50.0, 22.0, 143, 1.2),
+    "walnut": (654, 15.0, 65.0, 14.0, 117, 4),
+    "cashew": (553, 18.0, 44.0, 30.0, 137, 1.5),
+    "tomato paste": (82, 4.3, 0.5, 19.0, 262, None),
+    "tomato sauce": (24, 1.2, 0.3, 5.3, 245, None),
+    "chicken broth": (15, 2.0, 0.5, 1.0, 240, None),
+    "vegetable broth": (6, 0.2, 0.1, 1.2, 240, None),
+    "baking powder": (53, 0.0, 0.0, 28.0, 230, None),
+    "baking soda": (0, 0.0, 0.0, 0.0, 220, None),
+    "yeast": (325, 40.0, 7.6, 41.0, 192, 7),
+    "mayonnaise": (680, 1.0, 75.0, 0.6, 220, None),
+    "mustard": (66, 4.0, 3.3, 5.8, 250, None),
+    "ketchup": (101, 1.0, 0.1, 27.0, 240, None),
+}
+
+# Units by weight and by volume (in cups); any other unit counts pieces of the ingredient
+GRAMS_PER_UNIT = {"g": 1.0, "kg": 1000.0, "oz": 28.35, "lb": 453.6, "can": 400.0, "stick": 113.0,
+                  "package": 450.0, "bunch": 60.0, "handful": 30.0, "pinch": 0.36, "dash": 0.6, "sprig": 1.0}
+CUPS_PER_UNIT = {"cup": 1.0, "tbsp": 1 / 16, "tsp": 1 / 48, "ml": 1 / 240, "l": 1000 / 240}
+
+# Grains swell when cooked: "2 cups cooked rice" is about 2/3 cup raw
+COOKED_YIELD = {"rice": 3.0, "quinoa": 3.0, "couscous": 2.5, "pasta": 2.0, "noodle": 2.0, "oat": 2.0}
+
+MACROS = ("calories", "protein_g", "fat_g", "carbs_g")
+
+_lock = threading.Lock()
+_table: Optional[Tuple[Dict[str, int], "np.ndarray", "np.ndarray", "np.ndarray"]] = None
+
+
+def _nutrient_table() -> Tuple[Dict[str, int], "np.ndarray", "np.ndarray", "np.ndarray"]:
+    """(row by name, per-100 g macros, grams per cup, grams per piece), built on first use."""
+    global _table
+    with _lock:
+        if _table is None:
+            import numpy as np
+
+            rows = {name: i for i, name in enumerate(NUTRIENTS)}
+            values = np.array([v[:4] for v in NUTRIENTS.values()], dtype=float)
+            per_cup = np.array([v[4] if v[4] is not None else 0.0 for v in NUTRIENTS.values()])
+            per_piece = np.array([v[5] if v[5] is not None else 0.0 for v in NUTRIENTS.values()])
+            _table = rows, values, per_cup, per_piece
+        return _table
+
+
+def _servings(recipe: Dict[str, Any]) -> Optional[int]:
+    try:
+        servings = int(float(recipe.get("servings")))
+    except (TypeError, ValueError):
+        return None
+    return servings if servings > 0 else None
+
+
+def estimate_nutrition(recipes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Calories and macros per recipe (per serving when the recipe gives "servings", else for
+    the whole recipe) from its ingredient lines. Every line of every recipe is converted to
+    grams and multiplied through the nutrient table in one array op. Lines with no quantity
+    count as one piece. "coverage" is the share of lines that gave a quantity and converted
+    to a positive weight, so an estimate from guesses never passes for a measured one.
+    """
+    if not recipes:
+        return []
+    import numpy as np
+
+    rows, values, per_cup, per_piece = _nutrient_table()
+    owner: List[int] = []
+    line_of: List[int] = []
+    table_rows: List[int] = []
+    quantities: List[float] = []
+    fixed_grams: List[float] = []
+    cups: List[float] = []
+    lines = np.zeros(len(recipes))
+    line_owner: List[int] = []
+    measured: List[bool] = []
+
+    for r, recipe in enumerate(recipes):
+        for line in recipe.get("ingredients") or []:
+            parsed = parse_ingredient(str(line))
+            lines[r] += 1
+            line_owner.append(r)
+            measured.append(parsed.quantity is not None)
+            # "salt and pepper": each item gets the line's amount
+            for name in parsed.names:
+                row = rows.get(name)
+                if row is None:
+                    continue
+                owner.append(r)
+                line_of.append(len(line_owner) - 1)
+                table_rows.append(row)
+                quantity = parsed.quantity if parsed.quantity is not None else 1.0
+                if name in COOKED_YIELD and "cooked" in parsed.line.lower().replace("uncooked", ""):
+                    quantity /= COOKED_YIELD[name]
+                quantities.append(quantity)
+                fixed_grams.append(GRAMS_PER_UNIT.get(parsed.unit, np.nan))
+                cups.append(CUPS_PER_UNIT.get(parsed.unit, np.nan))
+
+    owner_idx = np.array(owner, dtype=np.int64)
+    row_idx = np.array(table_rows, dtype=np.int64)
+    fixed = np.array(fixed_grams, dtype=float)
+    volume = np.array(cups, dtype=float)
+    # Weight units convert directly, volumes through grams per cup, anything else is pieces
+    grams = np.array(quantities, dtype=float) * np.where(
+        ~np.isnan(fixed), fixed, np.where(~np.isnan(volume), volume * per_cup[row_idx], per_piece[row_idx]))
+
+    totals = np.zeros((len(recipes), len(MACROS)))
+    np.add.at(totals, owner_idx, values[row_idx] * (grams / 100.0)[:, None])
+
+    line_grams = np.zeros(len(line_owner))
+    np.add.at(line_grams, np.array(line_of, dtype=np.int64), grams)
+    covered = np.bincount(np.array(line_owner, dtype=np.int64),
+                          weights=(line_grams > 0) & np.array(measured, dtype=bool), minlength=len(recipes))
+    coverage = np.divide(covered, lines, out=np.zeros(len(recipes)), where=lines > 0)
+
+    servings = [_servings(recipe) for recipe in recipes]
+    totals /= np.array([s or 1 for s in servings], dtype=float)[:, None]
+
+    return [{
+        "calories": int(round(totals[r, 0])),
+        "protein_g": round(float(totals[r, 1]), 1),
+        "fat_g": round(float(totals[r, 2]), 1),
+        "carbs_g": round(float(totals[r, 3]), 1),
+        "servings": servings[r],
+        "coverage": round(float(coverage[r]), 2),
+    } for r in range(len(recipes))]
@@ -0,0 +1,268 @@
+# app/Controller/preference_rules.py
+import logging
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from Controller.ingredient_lexicon import STOPWORDS, IngredientMatch, extract_ingredients, pluralize
+
+# Get logger
+logger = logging.getLogger("recipe_finder")
+
+# Minimum lexicon confidence for the rule-based ingredients to stand without the LLM
+INGREDIENT_CONFIDENCE = 0.8
+
+PREFERENCE_FIELDS = ("diet", "allergies", "cuisine", "prep_time", "craving")
+
+_DIET_PATTERNS: List[Tuple[str, str]] = [
+    (r"\bvegan\b", "vegan"),
+    (r"\bvegetarian\b|\bveggie\b", "vegetarian"),
+    (r"\bpescatarian\b|\bpescetarian\b", "pescatarian"),
+    (r"\bketo(?:genic)?\b", "keto"),
+    (r"\bpaleo\b", "paleo"),
+    (r"\bhalal\b", "halal"),
+    (r"\bkosher\b", "kosher"),
+    (r"\bgluten[- ]free\b", "gluten-free"),
+    (r"\bdairy[- ]free\b|\blactose[- ]free\b", "dairy-free"),
+    (r"\blow[- ]carbs?\b", "low carb"),
+    (r"\bhigh[- ]protein\b", "high protein"),
+    (r"\b(?:zero|no)[- ]sugar\b|\bsugar[- ]free\b", "zero sugar"),
+    (r"\blow[- ]sugar\b", "low sugar"),
+    (r"\blow[- ]fat\b", "low fat"),
+]
+_DIET_RES = [(re.compile(p, re.IGNORECASE), value) for p, value in _DIET_PATTERNS]
+
+_CUISINES = [
+    "italian", "mexican", "chinese", "indian", "thai", "japanese", "french", "greek", "spanish",
+    "korean", "vietnamese", "mediterranean", "middle eastern", "lebanese", "turkish", "moroccan",
+    "american", "cajun", "caribbean", "german", "british", "irish", "egyptian", "asian",
+]
+_CUISINE_RE = re.compile(r"\b(" + "|".join(sorted(_CUISINES, key=len, reverse=True)) + r")\b", re.IGNORECASE)
+
+# The captured list runs to the end of the clause
+_LIST = r"([a-z][a-z ,\-]*?)(?=[.;!?]|\bbut\b|\bso\b|\bi\b|$)"
+# "no X" / "without X" take a single item (or "X or Y") so they can't swallow an ingredient list
+_ITEM = r"([a-z][a-z\-]*(?: [a-z][a-z\-]*)?(?: or [a-z][a-z\-]*)*)(?=[.,;!?]|\band\b|$)"
+_ALLERGY_RES = [
+    re.compile(r"\b(?:i'?m |i am )?allergic to " + _LIST, re.IGNORECASE),
+    re.compile(r"\b(?:an? )?allerg(?:y|ies) to " + _LIST, re.IGNORECASE),
+    re.compile(r"\b(?:i )?(?:can'?t|cannot|don'?t|do not) (?:eat|like|tolerate) " + _LIST, re.IGNORECASE),
+    # "have no rice" / "don't have milk" say the item is missing, not that it must be avoided
+    re.compile(r"(?<!have )(?<!has )(?<!got )\b(?:no|without) (?!sugar\b)" + _ITEM, re.IGNORECASE),
+]
+# The looser phrasings ("no X", "can't eat X") are read as allergies only when every item is
+# food the lexicon knows or a common allergen; "no time" or "can't eat late" are left to the LLM
+_LOOSE_ALLERGY_RES = _ALLERGY_RES[2:]
+_ALLERGENS = {
+    "nut", "tree nut", "peanut", "dairy", "lactose", "gluten", "wheat", "shellfish", "seafood", "soy",
+    "egg", "fish", "sesame", "meat", "red meat", "pork", "alcohol", "sulfite", "mustard", "celery", "lupin",
+}
+_ALLERGENS |= {pluralize(a) for a in _ALLERGENS}
+_LIST_SPLIT_RE = re.compile(r"\s*(?:,|\band\b|\bor\b|\bany\b)\s*", re.IGNORECASE)
+
+_NUMBER_WORDS = {
+    "five": 5, "ten": 10, "fifteen": 15, "twenty": 20, "twenty five": 25, "thirty": 30,
+    "forty": 40, "forty five": 45, "fifty": 50, "sixty": 60, "ninety": 90,
+}
+_NUMBER = r"(\d+|" + "|".join(sorted(_NUMBER_WORDS, key=len, reverse=True)) + r")"
+_PREP_TIME_RES: List[Tuple[re.Pattern, Any]] = [
+    (re.compile(r"\b(?:an? |one )?hour and a half\b|\b1\.5 hours?\b", re.IGNORECASE), 90),
+    (re.compile(r"\bhalf (?:an|a) hour\b", re.IGNORECASE), 30),
+    (re.compile(r"\b(?:a )?quarter (?:of )?an hour\b", re.IGNORECASE), 15),
+    (re.compile(_NUMBER + r"\s*(?:hours?|hrs?)\b", re.IGNORECASE), 60),
+    (re.compile(r"\b(?:an|one) hour\b", re.IGNORECASE), 60),
+    (re.compile(_NUMBER + r"\s*(?:-| )?(?:minutes?|mins?)\b", re.IGNORECASE), 1),
+]
+# No number given: "quick" is read as a weeknight half hour
+_QUICK_RE = re.compile(
+    r"\b(?:quick(?:ly)?|fast|in a hurry|short on time|no time(?! ?(?:limit|constraint|pressure|frame)))\b", re.IGNORECASE
+)
+QUICK_PREP_TIME = "30"
+# Lead-in words around a time limit carry no extra information
+_PREP_TIME_LEAD_RE = re.compile(
+    r"\b(?:in |within |under |less than |no more than |at most |max(?:imum)? |about |around )+$", re.IGNORECASE
+)
+
+_CRAVING_WORDS = [
+    "spicy", "sweet", "savory", "savoury", "cheesy", "crispy", "creamy", "comforting", "hearty",
+    "light", "healthy", "fresh", "tangy", "smoky", "warm", "filling",
+]
+_CRAVING_RES = [
+    re.compile(r"\bcraving (?:for |some )?([a-z][a-z ]*?)(?=[.,;!?]|\band\b|$)", re.IGNORECASE),
+    re.compile(r"(?<!not )\bin the mood for (?:some |a |an )?([a-z][a-z ]*?)(?=[.,;!?]|\band\b|$)", re.IGNORECASE),
+    re.compile(r"\b(?:something|anything|a|an) (" + "|".join(_CRAVING_WORDS) + r")\b", re.IGNORECASE),
+    re.compile(r"\b(?:for|as) (?:a )?(breakfast|brunch|lunch|dinner|dessert|snack)\b", re.IGNORECASE),
+]
+
+# Words that only frame the request; removing them lets the lexicon judge what is left
+_FILLER_RE = re.compile(
+    r"\b(?:easy|simple|tasty|delicious|nice|good|looking|dish|dishes|meal|meals|prepare|ready|"
+    r"takes?|cuisine|food|style|diet|please|thanks?|minutes?|mins?|something|want|wants|i'?d|like)\b",
+    re.IGNORECASE,
+)
+
+# A negation shortly before a diet or cuisine ("not vegetarian", "don't want italian") in the same clause
+_NEGATION_RE = re.compile(r"\b(?:not|no|never|don'?t|doesn'?t|isn'?t|i'?m not)\b(?:\s+(?!and\b|or\b|but\b|so\b)[\w']+){0,3}\s*$", re.IGNORECASE)
+
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "fully_handled": 0, "partially_handled": 0, "llm_calls": 0}
+
+
+def _consume(text: str, match: re.Match) -> str:
+    # Blank out matched spans (keeping offsets) so later rules and the lexicon don't see them again
+    return text[:match.start()] + " " * (match.end() - match.start()) + text[match.end():]
+
+
+def _parse_number(token: str) -> Optional[int]:
+    if token.isdigit():
+        return int(token)
+    return _NUMBER_WORDS.get(token.lower())
+
+
+def _negated(text: str, match: re.Match) -> bool:
+    return bool(_NEGATION_RE.search(text[max(0, match.start() - 40):match.start()]))
+
+
+def _known_allergen(item: str) -> bool:
+    if item in _ALLERGENS:
+        return True
+    match = extract_ingredients(item)
+    return bool(match.ingredients) and not match.unknown
+
+
+def _extract(conversation: str) -> Tuple[Dict[str, Any], IngredientMatch]:
+    # Preferences by pattern, then the lexicon's reading of whatever text is left
+    remaining = conversation
+    prefs: Dict[str, Any] = {"diet": None, "allergies": [], "cuisine": None, "prep_time": None, "craving": None}
+
+    diets = []
+    for pattern, value in _DIET_RES:
+        for match in list(pattern.finditer(remaining)):
+            # Negated diets stay in the text, so the LLM reads them
+            if _negated(remaining, match):
+                continue
+            if value not in diets:
+                diets.append(value)
+            remaining = _consume(remaining, match)
+    if diets:
+        prefs["diet"] = ", ".join(diets)
+
+    for pattern, multiplier in _PREP_TIME_RES:
+        match = pattern.search(remaining)
+        if not match:
+            continue
+        if match.groups():
+            number = _parse_number(match.group(1))
+            if number is None:
+                continue
+            minutes = number * multiplier
+        else:
+            minutes = multiplier
+        prefs["prep_time"] = str(minutes)
+        lead = _PREP_TIME_LEAD_RE.search(remaining[:match.start()])
+        if lead:
+            remaining = remaining[:lead.start()] + " " * (lead.end() - lead.start()) + remaining[lead.end():]
+        remaining = _consume(remaining, match)
+        break
+
+    for match in list(_QUICK_RE.finditer(remaining)):
+        # "not in a hurry", "doesn't need to be quick": left for the LLM
+        if _negated(remaining, match):
+            continue
+        prefs["prep_time"] = prefs["prep_time"] or QUICK_PREP_TIME
+        remaining = _consume(remaining, match)
+
+    for pattern in _ALLERGY_RES:
+        for match in list(pattern.finditer(remaining)):
+            items = [" ".join(w for w in item.strip(" -").split() if w not in STOPWORDS)
+                     for item in _LIST_SPLIT_RE.split(match.group(1).lower())]
+            items = [item for item in items if item]
+            if pattern in _LOOSE_ALLERGY_RES and not all(_known_allergen(item) for item in items):
+                continue
+            for item in items:
+                if item and item not in prefs["allergies"]:
+                    prefs["allergies"].append(item)
+            remaining = _consume(remaining, match)
+
+    match = next((m for m in _CUISINE_RE.finditer(remaining) if not _negated(remaining, m)), None)
+    if match:
+        prefs["cuisine"] = match.group(1).title()
+        remaining = _consume(remaining, match)
+
+    for pattern in _CRAVING_RES:
+        match = pattern.search(remaining)
+        if match and match.group(1).strip().lower() not in ("this", "that", "it", "anything"):
+            prefs["craving"] = match.group(1).strip().lower()
+            remaining = _consume(remaining, match)
+            break
+
+    remaining = _FILLER_RE.sub(" ", remaining)
+    return {"ingredients": [], "preferences": prefs}, extract_ingredients(remaining)
+
+
+def extract_rule_based(conversation: str) -> Tuple[Dict[str, Any], bool]:
+    """
+    Extract ingredients and preferences with patterns and the ingredient lexicon.
+    Returns the result in query_llm_for_preferences' shape (unresolved fields are None/[])
+    and whether every field was resolved, i.e. nothing in the text was left unexplained.
+    """
+    result, ingredient_match = _extract(conversation)
+    if ingredient_match.ingredients and ingredient_match.confidence >= INGREDIENT_CONFIDENCE:
+        result["ingredients"] = ingredient_match.ingredients
+        fully_handled = True
+    else:
+        # Nothing left at all means the message really had no ingredients in it
+        fully_handled = not ingredient_match.ingredients and not ingredient_match.unknown
+
+    return result, fully_handled
+
+
+def extract_complete(message: str, min_confidence: float = INGREDIENT_CONFIDENCE) -> Optional[Dict[str, Any]]:
+    """
+    Ingredients and preferences of a message the rules explain word for word, or None
+    if it has no confident ingredients or any word is left over for the LLM to read.
+    """
+    result, ingredient_match = _extract(message)
+    if not ingredient_match.ingredients or ingredient_match.unknown or ingredient_match.confidence < min_confidence:
+        return None
+    result["ingredients"] = ingredient_match.ingredients
+    return result
+
+
+def merge_preferences(rule_result: Dict[str, Any], llm_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill the fields the rules left open from the LLM result; allergies are unioned."""
+    merged = {"ingredients": rule_result.get("ingredients") or llm_result.get("ingredients") or [],
+              "preferences": {}}
+    rule_prefs = rule_result.get("preferences", {})
+    llm_prefs = llm_result.get("preferences", {}) or {}
+    for field in PREFERENCE_FIELDS:
+        if field == "allergies":
+            allergies = list(rule_prefs.get("allergies") or [])
+            for item in llm_prefs.get("allergies") or []:
+                if item and item not in allergies:
+                    allergies.append(item)
+            merged["preferences"]["allergies"] = allergies
+        else:
+            merged["preferences"][field] = rule_prefs.get(field) or llm_prefs.get(field)
+    return merged
+
+
+def record_outcome(fully_handled: bool, partially_handled: bool) -> None:
+    with _stats_lock:
+        _stats["calls"] += 1
+        if fully_handled:
+            _stats["fully_handled"] += 1
+        else:
+            _stats["llm_calls"] += 1
+            if partially_handled:
+                _stats["partially_handled"] += 1
+        calls, handled = _stats["calls"], _stats["fully_handled"]
+    logger.info(f"Preference fast path: {handled}/{calls} calls fully handled ({handled / calls:.0%})")
+
+
+def get_fast_path_stats() -> Dict[str, Any]:
+    """Counters for the rule-based fast path, plus the fraction of calls it fully handled."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["fully_handled_ratio"] = stats["fully_handled"] / stats["calls"] if stats["calls"] else 0.0
+    return stats
@@ -0,0 +1,192 @@
+# app/Controller/ranking.py
+import logging
+import os
+import re
+import zlib
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from Controller.grocery import PANTRY_STAPLES, parse_ingredient
+from Controller.ingredient_lexicon import canonicalize_ingredient, tokenize
+
+# numpy loads on the first ranking, not when the graph module is imported
+if TYPE_CHECKING:
+    import numpy as np
+
+# Get logger
+logger = logging.getLogger("recipe_finder")
+
+# Recipes kept after dedup and ranking
+RECIPE_TOP_K = int(os.getenv("RECIPE_TOP_K", "5"))
+# Estimated Jaccard similarity above which two candidates count as the same recipe
+DEDUP_THRESHOLD = float(os.getenv("RECIPE_DEDUP_THRESHOLD", "0.6"))
+
+# MinHash signature length, split into LSH bands of BAND_ROWS rows. 16 bands of 4 rows
+# put the bucketing threshold near 0.5, a little under DEDUP_THRESHOLD so few true
+# duplicates are missed; bucketed pairs are then checked against the full signature.
+NUM_HASHES = 64
+BAND_ROWS = 4
+_PRIME = (1 << 31) - 1
+
+# Score weights: share of the user's ingredients used, per missing item, prep-time fit
+OVERLAP_WEIGHT = 1.0
+MISSING_WEIGHT = 0.1
+TIME_WEIGHT = 0.5
+
+# Fields the sources use for total time; the first one present wins
+TIME_FIELDS = ("prep_time", "ready_in_minutes", "readyInMinutes", "total_time", "cook_time")
+_MINUTES_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(h|hr|hrs|hours?)?", re.IGNORECASE)
+
+
+def recipe_minutes(recipe: Dict[str, Any]) -> Optional[float]:
+    """Minutes a recipe takes, from the first time field it has ("45", 45, "1 hour"); None if unknown."""
+    for key in TIME_FIELDS:
+        value = recipe.get(key)
+        if value in (None, ""):
+            continue
+        if isinstance(value, (int, float)):
+            return float(value)
+        match = _MINUTES_RE.search(str(value))
+        if match:
+            return float(match.group(1)) * (60 if match.group(2) else 1)
+    return None
+
+
+def recipe_ingredients(recipe: Dict[str, Any]) -> List[str]:
+    """Canonical ingredient names of a recipe, without quantities or repeats."""
+    names: List[str] = []
+    for line in recipe.get("ingredients") or []:
+        for name in parse_ingredient(str(line)).names:
+            if name not in names:
+                names.append(name)
+    return names
+
+
+def _shingles(recipe: Dict[str, Any], ingredients: List[str]) -> List[int]:
+    # Character 3-grams of the title plus one token per ingredient, hashed to 32 bits
+    title = " ".join(tokenize(str(recipe.get("title") or "")))
+    grams = {title[i:i + 3] for i in range(max(len(title) - 2, 1))} if title else set()
+    grams.update(f"\x00{name}" for name in ingredients)
+    return [zlib.crc32(g.encode("utf-8")) for g in grams]
+
+
+def minhash_signatures(shingle_sets: List[List[int]], num_hashes: int = NUM_HASHES, seed: int = 1) -> "np.ndarray":
+    """
+    (len(shingle_sets), num_hashes) MinHash signatures. All shingles go through all hash
+    functions in one array op; each set's minimum is then taken with reduceat.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _PRIME, size=(num_hashes, 1), dtype=np.uint64)
+    b = rng.integers(0, _PRIME, size=(num_hashes, 1), dtype=np.uint64)
+    # An empty set gets a unique placeholder so it never matches anything
+    sets = [s or [zlib.crc32(f"\x01{i}".encode("utf-8"))] for i, s in enumerate(shingle_sets)]
+    values = np.fromiter((h for s in sets for h in s), dtype=np.uint64)
+    starts = np.cumsum([0] + [len(s) for s in sets[:-1]])
+    # a < 2^31 and values < 2^32, so the product fits in 64 bits
+    hashed = (a * values + b) % _PRIME
+    return np.minimum.reduceat(hashed, starts, axis=1).T
+
+
+def duplicate_groups(signatures: "np.ndarray", threshold: float = DEDUP_THRESHOLD,
+                     band_rows: int = BAND_ROWS) -> "np.ndarray":
+    """
+    Group id per row, equal for rows whose estimated Jaccard similarity reaches `threshold`
+    (transitively). Only rows sharing an LSH band are compared, so cost stays near linear.
+    """
+    import numpy as np
+
+    n = len(signatures)
+    pairs = []
+    mix = np.random.default_rng(0).integers(1, 1 << 63, size=band_rows, dtype=np.uint64) | np.uint64(1)
+    for start in range(0, signatures.shape[1], band_rows):
+        # One 64-bit key per band (wrapping arithmetic); a collision only costs a comparison
+        band = signatures[:, start:start + band_rows]
+        _, first, bucket = np.unique(band @ mix[:band.shape[1]], return_index=True, return_inverse=True)
+        # Compare every row with the first row of its bucket, all buckets in one op
+        leader = first[bucket.ravel()]
+        similarity = (signatures == signatures[leader]).mean(axis=1)
+        rows = np.flatnonzero((leader != np.arange(n)) & (similarity >= threshold))
+        pairs.append(np.stack([leader[rows], rows], axis=1))
+
+    # Union the matched pairs; the smallest row of each group becomes its id
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in np.concatenate(pairs).tolist() if pairs else []:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+    return np.array([find(i) for i in range(n)])
+
+
+def score_recipes(ingredient_lists: List[List[str]], user_ingredients: List[str],
+                  minutes: List[Optional[float]], prep_time: Optional[Any]) -> Dict[str, "np.ndarray"]:
+    """
+    Vectorized features and score per candidate: "matched" (user ingredients used),
+    "missing" (non-pantry ingredients the user lacks), "time_fit" (1 within the time limit,
+    falling to 0 at twice it; 0.5 when the recipe's time is unknown) and "score".
+    """
+    import numpy as np
+
+    n = len(ingredient_lists)
+    user = {canonicalize_ingredient(i) for i in user_ingredients or [] if i}
+    vocabulary: Dict[str, int] = {}
+    rows = np.fromiter((r for r, names in enumerate(ingredient_lists) for _ in names), dtype=np.int64)
+    cols = np.fromiter((vocabulary.setdefault(name, len(vocabulary)) for names in ingredient_lists for name in names),
+                       dtype=np.int64)
+    names = list(vocabulary)
+    have = np.fromiter((name in user for name in names), dtype=bool, count=len(names))
+    staple = np.fromiter((name in PANTRY_STAPLES for name in names), dtype=bool, count=len(names))
+
+    matched = np.bincount(rows, weights=have[cols], minlength=n)
+    missing = np.bincount(rows, weights=~(have | staple)[cols], minlength=n)
+    coverage = matched / max(len(user), 1)
+
+    time_fit = np.ones(n)
+    try:
+        limit = float(prep_time) if prep_time not in (None, "") else None
+    except (TypeError, ValueError):
+        limit = None
+    if limit and limit > 0:
+        taken = np.array([m if m is not None else np.nan for m in minutes], dtype=float)
+        time_fit = np.where(np.isnan(taken), 0.5, np.clip(2.0 - taken / limit, 0.0, 1.0))
+
+    score = OVERLAP_WEIGHT * coverage - MISSING_WEIGHT * missing + TIME_WEIGHT * time_fit
+    return {"matched": matched, "missing": missing, "time_fit": time_fit, "score": score}
+
+
+def rank_recipes(recipes: List[Dict[str, Any]], user_ingredients: List[str], prep_time: Optional[Any] = None,
+                 top_k: int = RECIPE_TOP_K) -> List[Dict[str, Any]]:
+    """
+    Drop near-duplicate candidates (the best-scoring copy is kept), then return the top
+    `top_k` by score, each with "matched", "missing" and "match_score" added.
+    """
+    if not recipes:
+        return []
+    import numpy as np
+
+    ingredient_lists = [recipe_ingredients(r) for r in recipes]
+    features = score_recipes(ingredient_lists, user_ingredients, [recipe_minutes(r) for r in recipes], prep_time)
+    score = features["score"]
+
+    groups = duplicate_groups(minhash_signatures([_shingles(r, i) for r, i in zip(recipes, ingredient_lists)]))
+    # Best score first, original order among ties; keep the first row seen of each group
+    order = np.lexsort((np.arange(len(recipes)), -score))
+    _, first = np.unique(groups[order], return_index=True)
+    keep = order[np.sort(first)][:max(top_k, 0)]
+
+    if len(keep) < len(recipes):
+        logger.info(f"Ranked {len(recipes)} recipe candidates, kept {len(keep)} "
+                    f"({len(recipes) - len(np.unique(groups))} duplicates)")
+    return [{
+        **recipes[i],
+        "matched": int(features["matched"][i]),
+        "missing": int(features["missing"][i]),
+        "match_score": round(float(score[i]), 3),
+    } for i in keep]
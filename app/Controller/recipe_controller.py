@@ -1,10 +1,50 @@
 # app/controller/recipe_controller.py
-from agent.tools.spoonacular_tool import spoonacular_search
-from agent.tools.tavily_tool import tavily_search
+import asyncio
+import logging
+import os
+from typing import Awaitable, Optional
+
+from agent.tools.local_recipe_tool import local_recipe_search
+from agent.tools.spoonacular_tool import spoonacular_search, spoonacular_search_async
+from agent.tools.tavily_tool import tavily_search, tavily_search_async
+
+# Get logger
+logger = logging.getLogger("recipe_finder")
+
+# Seconds to wait for Spoonacular before also starting Tavily; 0 runs both at once
+TAVILY_HEDGE_DELAY = float(os.getenv("TAVILY_HEDGE_DELAY", "0"))
+
+
+def _local_failed(result: str) -> bool:
+    return "No matching recipes found" in result or "not configured" in result
+
+
+def _spoonacular_failed(result: str) -> bool:
+    return ("No matching recipes found" in result or "error" in result.lower()
+            or result.startswith("Missing Spoonacular"))
+
+
+def _tavily_failed(result: str) -> bool:
+    return ("No relevant information found" in result or "error" in result.lower()
+            or result.startswith("Missing Tavily"))
+
+
+def _tavily_query(ingredients, diet, cuisine) -> str:
+    return f"{diet or ''} {cuisine or ''} meal with {', '.join(ingredients)}"
+
+
+async def _as_miss(source: str, lookup: Awaitable[str]) -> str:
+    # A lookup that raises is a miss like any other failed source, not the end of the race
+    try:
+        return await lookup
+    except Exception as e:
+        logger.info(f"{source} lookup failed: {e}")
+        return f"{source} API error: {e}"
+
 
 def get_recipe(user_prefs: dict) -> str:
     """
-    Core logic to attempt recipe lookup via Spoonacular, then Tavily as fallback.
+    Core logic to attempt recipe lookup via the local corpus, then Spoonacular, then Tavily as fallback.
     """
     ingredients = user_prefs.get("ingredients", [])
     diet = user_prefs.get("diet")
@@ -12,16 +52,77 @@ def get_recipe(user_prefs: dict) -> str:
     cuisine = user_prefs.get("cuisine")
     prep_time = user_prefs.get("prep_time")
 
-    result = spoonacular_search.run(
-        ingredients=ingredients,
-        diet=diet,
-        allergies=allergies,
-        cuisine=cuisine,
-        prep_time=prep_time
-    )
+    search_args = {
+        "ingredients": ingredients,
+        "diet": diet,
+        "allergies": allergies,
+        "cuisine": cuisine,
+        "prep_time": prep_time
+    }
+
+    result = local_recipe_search.invoke(search_args)
+    if not _local_failed(result):
+        return result
+
+    result = spoonacular_search.invoke(search_args)
 
-    if "No matching recipes found" in result or "error" in result.lower():
-        query = f"{diet or ''} {cuisine or ''} meal with {', '.join(ingredients)}"
-        return tavily_search.run(query=query)
+    if _spoonacular_failed(result):
+        return tavily_search.invoke({"query": _tavily_query(ingredients, diet, cuisine)})
 
     return result
+
+
+async def get_recipe_async(user_prefs: dict, hedge_delay: Optional[float] = None) -> str:
+    """
+    Answer from the local corpus when possible; otherwise race Spoonacular and Tavily
+    and return the first acceptable result, cancelling the other.
+    Tavily starts after hedge_delay seconds (TAVILY_HEDGE_DELAY by default) unless
+    Spoonacular has already answered acceptably; a delay of 0 runs both concurrently.
+    """
+    ingredients = user_prefs.get("ingredients", [])
+    diet = user_prefs.get("diet")
+    allergies = user_prefs.get("allergies")
+    cuisine = user_prefs.get("cuisine")
+    prep_time = user_prefs.get("prep_time")
+    delay = TAVILY_HEDGE_DELAY if hedge_delay is None else hedge_delay
+
+    search_args = {
+        "ingredients": ingredients,
+        "diet": diet,
+        "allergies": allergies,
+        "cuisine": cuisine,
+        "prep_time": prep_time
+    }
+
+    # The local index answers in microseconds, so there is nothing to gain from racing it
+    result = local_recipe_search.invoke(search_args)
+    if not _local_failed(result):
+        return result
+
+    spoonacular_task = asyncio.create_task(_as_miss("Spoonacular", spoonacular_search_async(**search_args)))
+
+    async def hedged_tavily() -> Optional[str]:
+        if delay > 0:
+            done, _ = await asyncio.wait({spoonacular_task}, timeout=delay)
+            if done and not _spoonacular_failed(spoonacular_task.result()):
+                return None
+        return await _as_miss("Tavily", tavily_search_async(_tavily_query(ingredients, diet, cuisine)))
+
+    tavily_task = asyncio.create_task(hedged_tavily())
+    pending = {spoonacular_task, tavily_task}
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if spoonacular_task in done and not _spoonacular_failed(spoonacular_task.result()):
+                logger.info("Recipe lookup answered by Spoonacular")
+                return spoonacular_task.result()
+            if tavily_task in done and tavily_task.result() and not _tavily_failed(tavily_task.result()):
+                logger.info("Recipe lookup answered by Tavily")
+                return tavily_task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    # Neither source was acceptable; mirror get_recipe and hand back Tavily's answer
+    return tavily_task.result() or spoonacular_task.result()
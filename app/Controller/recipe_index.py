@@ -0,0 +1,216 @@
+# app/Controller/recipe_index.py
+import bisect
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from Controller.ingredient_lexicon import canonicalize_ingredient
+
+# Get logger
+logger = logging.getLogger("recipe_finder")
+
+
+def normalize_key(name: str) -> str:
+    """Lower-case and collapse whitespace so diet/cuisine keys and queries line up."""
+    return " ".join(str(name).lower().split())
+
+
+def normalize_ingredient(name: str) -> str:
+    """Canonical ingredient name, so "Tomatoes" in a query hits recipes listing "tomato"."""
+    return canonicalize_ingredient(name)
+
+
+class RecipeIndex:
+    """
+    In-memory recipe store with an inverted ingredient index.
+
+    Posting lists are Python ints used as bitsets (bit i = recipe i), so intersections,
+    exclusions and filters are single bitwise ops over the whole corpus. Recipes are
+    stored in ascending ingredient-count order, which makes "lowest bit first" the same
+    as "fewest missing ingredients first" when breaking ties between equal overlaps.
+
+    Each recipe is a dict with at least "title" and "ingredients" (bare ingredient names).
+    Optional fields: "diets" (list or str), "cuisine" (list or str), "prep_time" (minutes),
+    plus anything else ("instructions", "image_url", ...) which is returned untouched.
+    """
+
+    def __init__(self, recipes: Iterable[Dict[str, Any]]):
+        recipes = [r for r in recipes if isinstance(r, dict) and r.get("title")]
+        recipes.sort(key=lambda r: len(r.get("ingredients") or []))
+        self.recipes: List[Dict[str, Any]] = recipes
+        self._all = (1 << len(recipes)) - 1
+
+        postings: Dict[str, List[int]] = {}
+        diets: Dict[str, List[int]] = {}
+        cuisines: Dict[str, List[int]] = {}
+        times: Dict[int, List[int]] = {}
+
+        for i, recipe in enumerate(recipes):
+            for name in recipe.get("ingredients") or []:
+                postings.setdefault(normalize_ingredient(name), []).append(i)
+            for diet in _as_list(recipe.get("diets")):
+                diets.setdefault(normalize_key(diet), []).append(i)
+            for cuisine in _as_list(recipe.get("cuisine")):
+                cuisines.setdefault(normalize_key(cuisine), []).append(i)
+            prep_time = _as_minutes(recipe.get("prep_time"))
+            if prep_time is not None:
+                times.setdefault(prep_time, []).append(i)
+
+        size = len(recipes)
+        self._postings = {k: _to_bitset(v, size) for k, v in postings.items()}
+        self._diets = {k: _to_bitset(v, size) for k, v in diets.items()}
+        self._cuisines = {k: _to_bitset(v, size) for k, v in cuisines.items()}
+        times = {k: _to_bitset(v, size) for k, v in times.items()}
+
+        # Cumulative "ready within N minutes" bitsets, looked up by bisect
+        self._time_keys = sorted(times)
+        self._time_masks = []
+        running = 0
+        for minutes in self._time_keys:
+            running |= times[minutes]
+            self._time_masks.append(running)
+
+    def __len__(self) -> int:
+        return len(self.recipes)
+
+    @classmethod
+    def from_jsonl(cls, path: str) -> "RecipeIndex":
+        recipes = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    recipes.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return cls(recipes)
+
+    @classmethod
+    def from_parquet(cls, path: str) -> "RecipeIndex":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Loading a Parquet recipe corpus requires pyarrow") from e
+        return cls(pq.read_table(path).to_pylist())
+
+    @classmethod
+    def load(cls, path: str) -> "RecipeIndex":
+        if path.endswith(".parquet"):
+            return cls.from_parquet(path)
+        return cls.from_jsonl(path)
+
+    def filter_mask(self, diet: Optional[str] = None, cuisine: Optional[str] = None,
+                    prep_time: Optional[Any] = None, allergies: Optional[List[str]] = None) -> int:
+        """Bitset of recipes passing every filter. Unknown diets/cuisines match nothing."""
+        mask = self._all
+        if diet:
+            mask &= self._diets.get(normalize_key(diet), 0)
+        if cuisine:
+            mask &= self._cuisines.get(normalize_key(cuisine), 0)
+        minutes = _as_minutes(prep_time)
+        if minutes is not None:
+            pos = bisect.bisect_right(self._time_keys, minutes)
+            mask &= self._time_masks[pos - 1] if pos else 0
+        for allergy in allergies or []:
+            mask &= ~self._postings.get(normalize_ingredient(allergy), 0)
+        return mask
+
+    def search(self, ingredients: List[str], diet: Optional[str] = None,
+               cuisine: Optional[str] = None, prep_time: Optional[Any] = None,
+               allergies: Optional[List[str]] = None, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Return up to `limit` recipes ranked by how many query ingredients they use,
+        then by fewest total ingredients. Each hit is the stored recipe plus
+        "matched" and "missing" counts.
+        """
+        query = {normalize_ingredient(i) for i in ingredients or [] if i}
+        bitsets = [self._postings[q] for q in query if q in self._postings]
+        mask = self.filter_mask(diet, cuisine, prep_time, allergies)
+        if not bitsets or not mask:
+            return []
+
+        # Bit-sliced counter: planes[k] holds bit k of each recipe's overlap count
+        planes: List[int] = []
+        for bitset in bitsets:
+            carry = bitset & mask
+            for k in range(len(planes)):
+                planes[k], carry = planes[k] ^ carry, planes[k] & carry
+                if not carry:
+                    break
+            if carry:
+                planes.append(carry)
+
+        hits: List[Dict[str, Any]] = []
+        for count in range(len(bitsets), 0, -1):
+            if count >> len(planes):
+                continue
+            exact = mask
+            for k, plane in enumerate(planes):
+                exact = exact & plane if (count >> k) & 1 else exact & ~plane
+                if not exact:
+                    break
+            while exact and len(hits) < limit:
+                low = exact & -exact
+                recipe = self.recipes[low.bit_length() - 1]
+                hits.append({
+                    **recipe,
+                    "matched": count,
+                    "missing": max(len(recipe.get("ingredients") or []) - count, 0),
+                })
+                exact ^= low
+            if len(hits) >= limit:
+                break
+        return hits
+
+
+def _to_bitset(positions: List[int], size: int) -> int:
+    # Fill a byte map and convert once; OR-ing bits into a growing int is quadratic
+    bitmap = bytearray((size + 7) // 8)
+    for i in positions:
+        bitmap[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bitmap, "little")
+
+
+def _as_list(value: Any) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [v for v in value if v]
+
+
+def _as_minutes(value: Any) -> Optional[int]:
+    if value in (None, "", "not specified"):
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+_index: Optional[RecipeIndex] = None
+_index_lock = threading.Lock()
+_index_loaded = False
+
+
+def get_recipe_index() -> Optional[RecipeIndex]:
+    """Load the corpus named by RECIPE_CORPUS_PATH once; None when it isn't configured."""
+    global _index, _index_loaded
+    if _index_loaded:
+        return _index
+    with _index_lock:
+        if not _index_loaded:
+            path = os.getenv("RECIPE_CORPUS_PATH")
+            if path and os.path.exists(path):
+                try:
+                    _index = RecipeIndex.load(path)
+                    logger.info(f"Loaded {len(_index)} recipes from local corpus")
+                except Exception:
+                    logger.info("Failed to load local recipe corpus")
+                    _index = None
+            _index_loaded = True
+    return _index
@@ -0,0 +1,24 @@
+# app/Controller/settings.py
+import os
+import threading
+
+# The repository root, so default file locations don't depend on where the process was started
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ENV_PATH = os.path.join(REPO_ROOT, ".env")
+
+_lock = threading.Lock()
+_loaded = False
+
+
+def load_env() -> None:
+    """
+    Load .env into os.environ once per process. Entry points call this before importing
+    modules that read their configuration at import time; variables already set win.
+    """
+    global _loaded
+    with _lock:
+        if _loaded:
+            return
+        from dotenv import load_dotenv
+        load_dotenv(ENV_PATH)
+        _loaded = True
@@ -0,0 +1,337 @@
+# app/Controller/technique_kb.py
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional, Set
+
+from Controller.ingredient_lexicon import canonicalize_ingredient, tokenize
+from Controller.metrics import registry
+
+# Get logger
+logger = logging.getLogger("recipe_finder")
+
+# SQLite file that keeps learned answers across restarts and shares them between workers
+TECHNIQUE_KB_PATH = os.getenv("TECHNIQUE_KB_PATH")
+# Learned answers kept; the oldest are dropped first, seeds never are
+TECHNIQUE_KB_SIZE = int(os.getenv("TECHNIQUE_KB_SIZE", "5000"))
+# Jaccard similarity of normalized query terms needed for a fuzzy hit
+TECHNIQUE_MATCH_THRESHOLD = float(os.getenv("TECHNIQUE_MATCH_THRESHOLD", "0.75"))
+
+# Words that don't change what a technique question asks
+FILLER_WORDS = {
+    "how", "what", "why", "when", "which", "where", "is", "are", "do", "does", "did", "to", "the", "a", "an",
+    "of", "for", "and", "in", "on", "with", "at", "properly", "proper", "best", "way", "ways",
+    "correctly", "correct", "should", "i", "you", "your", "my", "can", "could", "tips", "tip", "guide",
+    "right", "good", "perfect", "perfectly", "step", "steps", "by", "it", "be", "make", "cook", "cooking", "use",
+}
+# Surface forms of the same idea, applied before stemming
+SYNONYMS = {
+    "temp": "temperature", "temps": "temperature", "degrees": "temperature", "doneness": "temperature",
+    "skillet": "pan", "frypan": "pan", "wok": "pan", "saucepan": "pan", "pot": "pan",
+    "substitution": "substitute", "replacement": "substitute",
+    "replace": "substitute", "swap": "substitute", "instead": "substitute",
+    "chop": "dice", "cube": "dice",
+}
+_SUFFIX_RE = re.compile(r"(?:ing|ed|es|e|s)$")
+# Terms a fuzzy match must agree on exactly: "roux without butter" is not "roux with butter",
+# and a vegan or Thai question is not answered with a plain one
+STRICT_WORDS = {
+    "no", "not", "without", "free", "vegan", "vegetarian", "pescatarian", "keto", "paleo", "halal", "kosher",
+    "gluten", "dairy", "italian", "mexican", "chinese", "indian", "thai", "japanese", "french", "greek",
+    "spanish", "korean", "vietnamese", "mediterranean", "turkish", "moroccan", "cajun", "caribbean",
+}
+# A technique question asks how, why, at what temperature or with what substitute
+_TECHNIQUE_INTENT_RE = re.compile(
+    r"\b(?:how|why|when|temp|temperature|doneness|substitute|substitution|replacement|replace|swap|"
+    r"instead|technique|techniques|tips?)\b",
+    re.IGNORECASE,
+)
+
+# Questions answered without a web search. Temperatures follow USDA guidance.
+SEED_TECHNIQUES: Dict[str, str] = {
+    "how to deglaze a pan":
+        "After searing, pour off excess fat, return the pan to medium-high heat and add about 1/2 cup of "
+        "wine, stock or water. Scrape the browned bits (fond) from the bottom with a wooden spoon as the "
+        "liquid bubbles, then simmer until reduced by about half to use as a sauce base.",
+    "safe internal temperature for chicken":
+        "Cook chicken and all poultry, whole or ground, to an internal temperature of 165°F (74°C), "
+        "measured in the thickest part without touching bone.",
+    "safe internal temperature for pork":
+        "Cook pork chops, roasts and tenderloin to 145°F (63°C) and rest for 3 minutes before cutting. "
+        "Ground pork needs 160°F (71°C).",
+    "safe internal temperature for beef":
+        "Cook beef steaks and roasts to at least 145°F (63°C) with a 3-minute rest; ground beef to "
+        "160°F (71°C). For doneness: rare 125°F, medium-rare 135°F, medium 145°F, well done 160°F.",
+    "safe internal temperature for lamb":
+        "Cook lamb chops and roasts to 145°F (63°C) and rest for 3 minutes; ground lamb to 160°F (71°C).",
+    "safe internal temperature for fish":
+        "Cook fish and shellfish to 145°F (63°C), when the flesh is opaque and flakes easily with a fork. "
+        "Shrimp are done when pink and opaque.",
+    "safe internal temperature for ground meat":
+        "Cook ground beef, pork, lamb and veal to 160°F (71°C); ground chicken and turkey to 165°F (74°C).",
+    "ideal temperature for baking salmon":
+        "Bake salmon at 400°F (200°C) for 12-15 minutes for a 1-inch fillet, until it reaches 145°F (63°C) "
+        "or flakes easily. For a moister result, roast at 275°F (135°C) for 20-25 minutes.",
+    "how to dice an onion":
+        "Halve the onion through the root, peel it and lay it cut side down. Make horizontal cuts toward "
+        "the root without cutting through it, then vertical cuts, then slice across to release even dice. "
+        "Keep the root end on so the layers hold together.",
+    "how to mince garlic":
+        "Crush each clove under the flat of a knife to loosen the skin, peel, then slice thinly and rock the "
+        "knife over the slices until very fine. A pinch of salt helps break it down into a paste.",
+    "how to butterfly chicken breast":
+        "Lay the breast flat, hold it with your palm and slice horizontally through the thick side, stopping "
+        "about 1/2 inch from the other edge. Open it like a book and press flat for even, quick cooking.",
+    "how to sear meat":
+        "Pat the meat dry and season it. Heat a heavy pan with a thin film of high-smoke-point oil until "
+        "shimmering, add the meat without crowding and leave it untouched until a deep brown crust forms "
+        "and it releases easily, about 2-4 minutes per side.",
+    "how to caramelize onions":
+        "Slice onions thinly and cook in butter or oil over medium-low heat with a pinch of salt, stirring "
+        "every few minutes, for 30-45 minutes until deep golden brown. Add a splash of water if they stick.",
+    "how to cook rice":
+        "Rinse 1 cup of white rice until the water runs clear. Combine with 1 1/2 cups water and a pinch of "
+        "salt, bring to a boil, cover and simmer on low for 15 minutes, then rest covered for 10 minutes "
+        "and fluff with a fork. Brown rice needs about 2 1/2 cups water and 40-45 minutes.",
+    "how to cook pasta al dente":
+        "Boil pasta in plenty of well-salted water (about 1 tablespoon salt per 4 quarts) and start tasting "
+        "2 minutes before the package time. It is al dente when tender with a slight bite at the center. "
+        "Save a cup of pasta water to loosen the sauce.",
+    "how to blanch vegetables":
+        "Boil vegetables in salted water briefly (1-3 minutes for green beans or broccoli), then plunge them "
+        "into ice water to stop cooking and keep the color bright. Drain well.",
+    "how to rest meat after cooking":
+        "Rest steaks and chops for 5-10 minutes and large roasts for 15-20 minutes, loosely tented with foil, "
+        "so the juices redistribute. The internal temperature will rise a few degrees while resting.",
+    "how to temper eggs":
+        "Whisk the eggs, then slowly pour in a ladle of the hot liquid while whisking constantly. Repeat once "
+        "or twice, then stir the warmed eggs back into the pot over low heat so they don't scramble.",
+    "how to proof yeast":
+        "Stir the yeast and a pinch of sugar into warm water at 105-110°F (40-43°C). After 5-10 minutes it "
+        "should be foamy; if not, the yeast is inactive and should be replaced.",
+    "how to make a roux":
+        "Melt equal weights of butter and flour over medium heat and whisk constantly: 2-3 minutes for a "
+        "white roux to thicken sauces, longer for blond or brown roux with a nuttier flavor.",
+    "how to poach an egg":
+        "Bring water to a gentle simmer with a splash of vinegar. Crack the egg into a cup, swirl the water "
+        "and slide the egg into the center. Cook 3-4 minutes until the white is set, then lift out with a "
+        "slotted spoon.",
+    "how to boil an egg":
+        "Lower eggs into boiling water and cook 6-7 minutes for jammy yolks or 10-12 minutes for hard-boiled, "
+        "then transfer to ice water before peeling.",
+    "how to toast spices":
+        "Toast whole spices in a dry pan over medium heat, shaking often, for 1-2 minutes until fragrant and "
+        "slightly darker. Cool before grinding.",
+    "how to julienne vegetables":
+        "Cut the vegetable into 2-3 inch lengths, slice lengthwise into 1/8 inch planks, stack them and cut "
+        "into 1/8 inch matchsticks.",
+    "how to brine chicken":
+        "Dissolve about 1/4 cup kosher salt per quart of water, submerge the chicken and refrigerate: 30 "
+        "minutes to 2 hours for pieces, up to 12 hours for a whole bird. Rinse and pat dry before cooking.",
+    "how to stir fry":
+        "Prepare all ingredients first and cut them small and even. Heat the wok or pan until very hot, add "
+        "oil, cook proteins first and set aside, then vegetables, and finish with sauce over high heat, "
+        "tossing constantly.",
+    "substitute for buttermilk":
+        "Stir 1 tablespoon lemon juice or white vinegar into 1 cup of milk and let it stand 5-10 minutes "
+        "until slightly thickened. Plain yogurt thinned with milk also works.",
+    "substitute for eggs in baking":
+        "Replace each egg with 1 tablespoon ground flaxseed mixed with 3 tablespoons water (rested 5 minutes), "
+        "1/4 cup applesauce or mashed banana, or 1/4 cup plain yogurt.",
+    "substitute for heavy cream":
+        "Melt 1/4 cup butter into 3/4 cup whole milk for cooking, or use full-fat coconut milk for a "
+        "dairy-free option. Neither whips like cream.",
+    "how to make a vinaigrette":
+        "Whisk 1 part vinegar or citrus juice with salt, a little mustard and honey, then slowly whisk in 3 "
+        "parts oil until emulsified. Adjust seasoning to taste.",
+    "how to tell when oil is hot enough for frying":
+        "For deep frying, heat oil to 350-375°F (175-190°C). Without a thermometer, a wooden spoon handle "
+        "dipped in should bubble steadily around it.",
+}
+
+Key = FrozenSet[str]
+
+
+def _stem(word: str) -> str:
+    return _SUFFIX_RE.sub("", word) if len(word) > 3 else word
+
+
+@lru_cache(maxsize=4096)
+def normalize_query(query: str) -> Key:
+    """Content terms of a question: filler dropped, synonyms and ingredients unified, suffixes stemmed."""
+    terms: Set[str] = set()
+    for word in tokenize(query):
+        if word in FILLER_WORDS:
+            continue
+        word = SYNONYMS.get(word, word)
+        word = canonicalize_ingredient(word)
+        terms.add(_stem(word))
+    return frozenset(terms)
+
+
+_STRICT_TERMS = frozenset(_stem(word) for word in STRICT_WORDS)
+
+
+class TechniqueKB:
+    """
+    Answers to cooking-technique questions, keyed by their normalized terms. A lookup is
+    an exact dict hit, or the entry with the highest Jaccard similarity among those sharing
+    a term (found through an inverted index), if it reaches the match threshold and
+    agrees on every negation, diet and cuisine term.
+    """
+
+    def __init__(self, seeds: Dict[str, str], path: Optional[str] = None, maxsize: int = TECHNIQUE_KB_SIZE,
+                 threshold: float = TECHNIQUE_MATCH_THRESHOLD):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._answers: Dict[Key, str] = {}
+        self._postings: Dict[str, Set[Key]] = {}
+        self._seeds: Set[Key] = set()
+        # Learned keys, oldest first
+        self._learned: Dict[Key, float] = {}
+        for query, answer in seeds.items():
+            key = normalize_query(query)
+            self._seeds.add(key)
+            self._add(key, answer)
+
+        self._db = None
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS techniques "
+                    "(key TEXT PRIMARY KEY, query TEXT NOT NULL, answer TEXT NOT NULL, added REAL NOT NULL)"
+                )
+                self._db.commit()
+                rows = self._db.execute(
+                    "SELECT query, answer, added FROM techniques ORDER BY added DESC LIMIT ?", (maxsize,)
+                ).fetchall()
+                for query, answer, added in reversed(rows):
+                    self._remember(normalize_query(query), answer, added)
+                logger.info(f"Loaded {len(rows)} learned cooking techniques")
+            except sqlite3.Error:
+                logger.info(f"Could not open technique knowledge base at {path}, using memory only")
+                self._db = None
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    def lookup(self, query: str) -> Optional[str]:
+        key = normalize_query(query)
+        if not key:
+            return None
+        with self._lock:
+            answer, result = self._answers.get(key), "exact"
+            if answer is None:
+                answer, result = self._closest(key), "fuzzy"
+        if answer is None and self._db is not None:
+            # Another worker may have learned it since this one loaded
+            answer, result = self._disk_get(key), "shared"
+        registry.inc("recipe_finder_technique_lookups_total", "Technique questions by how they were answered",
+                     {"result": result if answer is not None else "miss"})
+        return answer
+
+    def learn(self, query: str, answer: str) -> None:
+        """Keep a web answer for the next time anyone asks something close to `query`."""
+        key = normalize_query(query)
+        if not key or not answer:
+            return
+        added = time.time()
+        with self._lock:
+            if key in self._seeds:
+                return
+            self._remember(key, answer, added)
+        if self._db is not None:
+            try:
+                with self._lock:
+                    self._db.execute("INSERT OR REPLACE INTO techniques (key, query, answer, added) VALUES (?, ?, ?, ?)",
+                                     (_key_text(key), query, answer, added))
+                    self._db.execute("DELETE FROM techniques WHERE key IN "
+                                     "(SELECT key FROM techniques ORDER BY added DESC LIMIT -1 OFFSET ?)",
+                                     (self.maxsize,))
+                    self._db.commit()
+            except sqlite3.Error:
+                logger.info("Could not save cooking technique to disk")
+
+    def _closest(self, key: Key) -> Optional[str]:
+        shared: Counter = Counter()
+        for term in key:
+            for other in self._postings.get(term, ()):
+                shared[other] += 1
+        best, best_score = None, self.threshold
+        strict = key & _STRICT_TERMS
+        for other, overlap in shared.items():
+            if other & _STRICT_TERMS != strict:
+                continue
+            score = overlap / (len(key) + len(other) - overlap)
+            if score >= best_score:
+                best, best_score = other, score
+        return self._answers[best] if best is not None else None
+
+    def _disk_get(self, key: Key) -> Optional[str]:
+        try:
+            with self._lock:
+                row = self._db.execute("SELECT answer, added FROM techniques WHERE key = ?", (_key_text(key),)).fetchone()
+                if row is None:
+                    return None
+                self._remember(key, row[0], row[1])
+            return row[0]
+        except sqlite3.Error:
+            return None
+
+    def _remember(self, key: Key, answer: str, added: float) -> None:
+        if key in self._seeds:
+            return
+        self._learned.pop(key, None)
+        self._learned[key] = added
+        self._add(key, answer)
+        while len(self._learned) > self.maxsize:
+            oldest = next(iter(self._learned))
+            del self._learned[oldest]
+            self._remove(oldest)
+
+    def _add(self, key: Key, answer: str) -> None:
+        self._answers[key] = answer
+        for term in key:
+            self._postings.setdefault(term, set()).add(key)
+
+    def _remove(self, key: Key) -> None:
+        self._answers.pop(key, None)
+        for term in key:
+            keys = self._postings.get(term)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[term]
+
+
+def _key_text(key: Key) -> str:
+    return " ".join(sorted(key))
+
+
+def is_technique_query(query: str) -> bool:
+    """
+    Only questions with a technique intent ("how to...", temperatures, substitutes) are
+    answered from or learned into the knowledge base; recipe and meal searches always go
+    to the web.
+    """
+    return bool(_TECHNIQUE_INTENT_RE.search(query)) and not re.search(r"\brecipes?\b", query.lower())
+
+
+_kb: Optional[TechniqueKB] = None
+_kb_lock = threading.Lock()
+
+
+def get_technique_kb() -> TechniqueKB:
+    """The process-wide knowledge base, seeded and (with TECHNIQUE_KB_PATH) loaded on first use."""
+    global _kb
+    with _kb_lock:
+        if _kb is None:
+            _kb = TechniqueKB(SEED_TECHNIQUES, path=TECHNIQUE_KB_PATH)
+        return _kb
@@ -1,17 +1,15 @@
 # app/agent/recipe_agent.py
+import threading
+from typing import TYPE_CHECKING, Optional
 
-from langgraph.prebuilt import create_react_agent
-from langchain_core.tools import tool
-from langchain_core.runnables import Runnable
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
-import os
+from Controller.llm_gateway import STRUCTURED_OUTPUT, get_chat_model, get_structured_agent_model
+from state import RecipeList
 
-from agent.tools.spoonacular_tool import spoonacular_search
-from agent.tools.tavily_tool import tavily_search
-from agent.tools.llm_fallback_tool import llm_fallback_tool
+if TYPE_CHECKING:
+    from langgraph.graph.state import CompiledStateGraph
 
-load_dotenv()
+_lock = threading.Lock()
+_recipe_agent: Optional["CompiledStateGraph"] = None
 
 system_prompt = (
     "You are a professional chef and recipe assistant who provides clear, detailed cooking guidance.\n"
@@ -20,8 +18,8 @@ system_prompt = (
     "- 'image_url': URL for a representative image if available\n"
     "- 'ingredients': List of all ingredients with precise quantities (e.g., '2 tablespoons olive oil' not just 'olive oil')\n"
     "- 'instructions': Detailed step-by-step cooking directions - each instruction should be elaborate enough for a beginner to follow\n"
-    "- 'grocery_list': List of items needed but not in the user's ingredient list\n"
-    "- 'calories': Approximate calorie count if available\n\n"
+    "- 'calories': Approximate calorie count per serving if available\n"
+    "- 'servings': Number of servings the recipe makes\n\n"
     
     "IMPORTANT - USING THE TAVILY SEARCH TOOL:\n"
     "For any cooking technique or details you're unsure about, USE THE TAVILY SEARCH TOOL to look up specific information, such as:\n"
@@ -50,7 +48,7 @@ system_prompt = (
     "8. Avoid trailing commas and other JSON syntax errors\n\n"
     
     "WORKFLOW WITH FALLBACK STRATEGIES:\n"
-    "1. FIRST ATTEMPT: Use spoonacular_search to find recipe ideas based on the user's ingredients and preferences\n"
+    "{search_steps}"
     "2. IF NO RESULTS FROM SPOONACULAR: Use tavily_search with a query like 'recipe using [ingredients] [diet] cuisine' to find recipes online\n"
     "3. IF STILL NO RESULTS: Use the llm_fallback_tool to creatively generate a recipe based on the available ingredients\n"
     "4. For each recipe step that could use more detail, use tavily_search to look up specific cooking techniques\n"
@@ -73,14 +71,38 @@ system_prompt = (
     "]\n\n"
 )
 
-llm = ChatOpenAI(
-    model="mistralai/mistral-7b-instruct:free",
-    openai_api_base="https://openrouter.ai/api/v1",
-    openai_api_key=os.getenv("OPENROUTER_API_KEY"),
-    temperature=0.5
+# Only offered when a local corpus is loaded; otherwise the agent would spend a round trip on an empty search
+LOCAL_SEARCH_STEPS = (
+    "0. ALWAYS START with local_recipe_search - it is instant and needs no internet\n"
+    "1. IF NO LOCAL RESULTS: Use spoonacular_search to find recipe ideas based on the user's ingredients and preferences\n"
 )
+WEB_SEARCH_STEPS = "1. FIRST ATTEMPT: Use spoonacular_search to find recipe ideas based on the user's ingredients and preferences\n"
 
-tools = [spoonacular_search, tavily_search, llm_fallback_tool]
 
-# ReAct agent (no function calling needed)
-recipe_agent = create_react_agent(llm, tools, prompt=system_prompt)
+def get_recipe_agent() -> "CompiledStateGraph":
+    """The recipe agent, built (with its model client and tools) on first use."""
+    global _recipe_agent
+    with _lock:
+        if _recipe_agent is None:
+            from langgraph.prebuilt import create_react_agent
+            from agent.tools.local_recipe_tool import local_recipe_search
+            from agent.tools.spoonacular_tool import spoonacular_search
+            from agent.tools.tavily_tool import tavily_search
+            from agent.tools.llm_fallback_tool import llm_fallback_tool
+            from Controller.recipe_index import get_recipe_index
+
+            tools = [spoonacular_search, tavily_search, llm_fallback_tool]
+            has_corpus = get_recipe_index() is not None
+            if has_corpus:
+                tools.insert(0, local_recipe_search)
+            prompt = system_prompt.format(search_steps=LOCAL_SEARCH_STEPS if has_corpus else WEB_SEARCH_STEPS)
+            # With STRUCTURED_OUTPUT the final answer itself is constrained to the RecipeList schema
+            llm = get_structured_agent_model(0.5, tools, RecipeList) if STRUCTURED_OUTPUT else get_chat_model(0.5)
+
+            # ReAct agent (no function calling needed)
+            _recipe_agent = create_react_agent(
+                llm, tools, prompt=prompt,
+                # Runs inside a graph node; don't inherit the session checkpointer for its scratch steps
+                checkpointer=False
+            )
+        return _recipe_agent
@@ -1,11 +1,19 @@
 # tools.py
 from typing import Dict
-from langchain_core.tools import tool
-from Controller.llm_helper import query_llm_for_preferences
+from langchain_core.tools import StructuredTool
+from Controller.llm_helper import aquery_llm_for_preferences, query_llm_for_preferences
 
-@tool
-def extract_preferences_from_convo(conversation: str) -> Dict:
+def extract_preferences_sync(conversation: str) -> Dict:
     """
     Extract structured user preferences (ingredients, diet, allergies, etc.) from conversation text.
     """
     return query_llm_for_preferences(conversation)
+
+async def extract_preferences_async(conversation: str) -> Dict:
+    return await aquery_llm_for_preferences(conversation)
+
+extract_preferences_from_convo = StructuredTool.from_function(
+    func=extract_preferences_sync,
+    coroutine=extract_preferences_async,
+    name="extract_preferences_from_convo"
+)
@@ -0,0 +1,43 @@
+# app/agent/tools/local_recipe_tool.py
+from langchain_core.tools import tool
+from typing import List, Optional
+
+from Controller.recipe_index import get_recipe_index
+
+@tool
+def local_recipe_search(ingredients: List[str], diet: Optional[str] = None,
+                        allergies: Optional[List[str]] = None,
+                        cuisine: Optional[str] = None,
+                        prep_time: Optional[int] = None) -> str:
+    """
+    Search the local offline recipe collection. This is instant and should be tried first.
+    Inputs:
+        - ingredients: List of ingredients available
+        - diet: Diet preference (e.g., vegetarian, keto)
+        - allergies: List of allergies (e.g., nuts, dairy)
+        - cuisine: Desired cuisine type
+        - prep_time: Maximum preparation time in minutes
+    Returns:
+        - Matching recipes with their ingredients, best ingredient overlap first.
+    """
+    index = get_recipe_index()
+    if index is None:
+        return "Local recipe corpus not configured."
+
+    hits = index.search(
+        ingredients,
+        diet=diet,
+        cuisine=cuisine,
+        prep_time=prep_time,
+        allergies=allergies
+    )
+    if not hits:
+        return "No matching recipes found."
+
+    lines = []
+    for hit in hits:
+        line = f"- {hit['title']} (uses {hit['matched']} of your ingredients, {hit['missing']} more needed)"
+        if hit.get("ingredients"):
+            line += f": {', '.join(hit['ingredients'])}"
+        lines.append(line)
+    return "\n".join(lines)
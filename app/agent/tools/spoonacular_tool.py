@@ -1,14 +1,54 @@
 # app/agent/tools/spoonacular_tool.py
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
 import os
+import httpx
 import requests
 from typing import List, Optional
 
-@tool
-def spoonacular_search(ingredients: List[str], diet: Optional[str] = None,
-                       allergies: Optional[List[str]] = None,
-                       cuisine: Optional[str] = None,
-                       prep_time: Optional[int] = None) -> str:
+from Controller import http_client
+from Controller.cache import cache_from_env, canonical_key
+
+# Shared across tool calls; configured by SPOONACULAR_CACHE_SIZE/_TTL/_PATH
+spoonacular_cache = cache_from_env("spoonacular", "SPOONACULAR", default_size=512, default_ttl=6 * 3600)
+
+# Base URL can point at a local stub for offline runs
+SPOONACULAR_URL = os.getenv("SPOONACULAR_BASE_URL", "https://api.spoonacular.com") + "/recipes/complexSearch"
+
+
+def _cache_key(ingredients, diet, allergies, cuisine, prep_time) -> str:
+    return canonical_key(
+        ingredients=ingredients,
+        diet=diet,
+        allergies=allergies,
+        cuisine=cuisine,
+        prep_time=prep_time
+    )
+
+
+def _search_params(api_key: str, ingredients: List[str], diet: Optional[str],
+                   allergies: Optional[List[str]], cuisine: Optional[str],
+                   prep_time: Optional[int]) -> dict:
+    return {
+        "apiKey": api_key,
+        "includeIngredients": ",".join(ingredients),
+        "diet": diet,
+        "intolerances": ",".join(allergies or []),
+        "cuisine": cuisine,
+        "maxReadyTime": prep_time,
+        "number": 5
+    }
+
+
+def _format_results(data: list) -> str:
+    if not data:
+        return "No matching recipes found."
+    return "\n".join([f"- {r['title']}" for r in data])
+
+
+def spoonacular_search_sync(ingredients: List[str], diet: Optional[str] = None,
+                            allergies: Optional[List[str]] = None,
+                            cuisine: Optional[str] = None,
+                            prep_time: Optional[int] = None) -> str:
     """
     Search for recipes using the Spoonacular API.
     Inputs:
@@ -24,23 +64,60 @@ def spoonacular_search(ingredients: List[str], diet: Optional[str] = None,
     if not api_key:
         return "Missing Spoonacular API key."
 
-    url = "https://api.spoonacular.com/recipes/complexSearch"
-    params = {
-        "apiKey": api_key,
-        "includeIngredients": ",".join(ingredients),
-        "diet": diet,
-        "intolerances": ",".join(allergies or []),
-        "cuisine": cuisine,
-        "maxReadyTime": prep_time,
-        "number": 5
-    }
+    cache_key = _cache_key(ingredients, diet, allergies, cuisine, prep_time)
+    cached = spoonacular_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    params = _search_params(api_key, ingredients, diet, allergies, cuisine, prep_time)
+
+    try:
+        response = http_client.get(SPOONACULAR_URL, params=params)
+    except requests.RequestException as e:
+        return f"Spoonacular API error: {e}"
 
-    response = requests.get(url, params=params)
     if response.status_code != 200:
         return f"Spoonacular API error: {response.status_code} - {response.text}"
     
-    data = response.json().get("results", [])
-    if not data:
-        return "No matching recipes found."
-    
-    return "\n".join([f"- {r['title']}" for r in data])
+    result = _format_results(response.json().get("results", []))
+
+    # Only successful lookups are cached; API errors fall through above
+    spoonacular_cache.set(cache_key, result)
+    return result
+
+
+async def spoonacular_search_async(ingredients: List[str], diet: Optional[str] = None,
+                                   allergies: Optional[List[str]] = None,
+                                   cuisine: Optional[str] = None,
+                                   prep_time: Optional[int] = None) -> str:
+    """Async variant of spoonacular_search sharing its cache and output format."""
+    api_key = os.getenv("SPOONACULAR_API_KEY")
+    if not api_key:
+        return "Missing Spoonacular API key."
+
+    cache_key = _cache_key(ingredients, diet, allergies, cuisine, prep_time)
+    cached = spoonacular_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    params = _search_params(api_key, ingredients, diet, allergies, cuisine, prep_time)
+
+    try:
+        response = await http_client.aget(SPOONACULAR_URL, params=params)
+    except httpx.HTTPError as e:
+        return f"Spoonacular API error: {e}"
+
+    if response.status_code != 200:
+        return f"Spoonacular API error: {response.status_code} - {response.text}"
+
+    result = _format_results(response.json().get("results", []))
+    spoonacular_cache.set(cache_key, result)
+    return result
+
+
+# One tool for both invoke() and ainvoke(); the async path doesn't tie up a worker thread
+spoonacular_search = StructuredTool.from_function(
+    func=spoonacular_search_sync,
+    coroutine=spoonacular_search_async,
+    name="spoonacular_search"
+)
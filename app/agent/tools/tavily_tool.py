@@ -1,11 +1,59 @@
 # app/agent/tools/tavily_tool.py
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
 import os
+import httpx
 import requests
 from typing import Optional
 
-@tool
-def tavily_search(query: str, search_depth: Optional[str] = "basic") -> str:
+from Controller import http_client
+from Controller.technique_kb import get_technique_kb, is_technique_query
+
+# Base URL can point at a local stub for offline runs
+TAVILY_URL = os.getenv("TAVILY_BASE_URL", "https://api.tavily.com") + "/search"
+
+
+def _search_params(query: str, search_depth: Optional[str]) -> dict:
+    # Determine max results based on search type
+    max_results = 5 if search_depth == "deep" else 3
+    
+    return {
+        "query": query, 
+        "max_results": max_results,
+        "search_depth": "advanced" if search_depth == "deep" else "basic"
+    }
+
+
+def _format_results(query: str, results: list) -> str:
+    if not results:
+        return "No relevant information found. Try different search terms."
+        
+    # Format results differently based on search type
+    if "recipe" in query.lower() or "recipes" in query.lower():
+        # Recipe search results - combine content for full recipe details
+        combined_content = "\n\n".join([r.get("content", "") for r in results])
+        return f"Recipe search results:\n{combined_content}"
+    else:
+        # Technique search - present each result separately
+        formatted_results = []
+        for i, result in enumerate(results):
+            formatted_results.append(f"Source {i+1}: {result.get('content', '')}")
+        return "\n\n".join(formatted_results)
+
+
+def _known_technique(query: str) -> Optional[str]:
+    # Technique questions repeat across users; answer them without a web search when we can
+    if not is_technique_query(query):
+        return None
+    return get_technique_kb().lookup(query)
+
+
+def _learn(query: str, results: list, formatted: str) -> str:
+    if results and is_technique_query(query):
+        get_technique_kb().learn(query, formatted)
+    return formatted
+
+
+def tavily_search_sync(query: str, search_depth: Optional[str] = "basic") -> str:
     """
     Search the web for recipe information or cooking techniques using Tavily.
     
@@ -24,40 +72,57 @@ def tavily_search(query: str, search_depth: Optional[str] = "basic") -> str:
         - For recipe searches: complete recipe information with ingredients and steps
         - For technique searches: detailed explanation of the cooking technique
     """
+    known = _known_technique(query)
+    if known is not None:
+        return known
+
     api_key = os.getenv("TAVILY_API_KEY")
     if not api_key:
         return "Missing Tavily API key."
 
     headers = {"Authorization": f"Bearer {api_key}"}
-    
-    # Determine max results based on search type
-    max_results = 5 if search_depth == "deep" else 3
-    
-    params = {
-        "query": query, 
-        "max_results": max_results,
-        "search_depth": "advanced" if search_depth == "deep" else "basic"
-    }
-    
-    url = "https://api.tavily.com/search"
+    params = _search_params(query, search_depth)
+
+    try:
+        response = http_client.get(TAVILY_URL, headers=headers, params=params)
+    except requests.RequestException as e:
+        return f"Tavily API error: {e}"
 
-    response = requests.get(url, headers=headers, params=params)
     if response.status_code != 200:
         return f"Tavily API error: {response.status_code} - {response.text}"
 
     results = response.json().get("results", [])
-    
-    if not results:
-        return "No relevant information found. Try different search terms."
-        
-    # Format results differently based on search type
-    if "recipe" in query.lower() or "recipes" in query.lower():
-        # Recipe search results - combine content for full recipe details
-        combined_content = "\n\n".join([r.get("content", "") for r in results])
-        return f"Recipe search results:\n{combined_content}"
-    else:
-        # Technique search - present each result separately
-        formatted_results = []
-        for i, result in enumerate(results):
-            formatted_results.append(f"Source {i+1}: {result.get('content', '')}")
-        return "\n\n".join(formatted_results)
+    return _learn(query, results, _format_results(query, results))
+
+
+async def tavily_search_async(query: str, search_depth: Optional[str] = "basic") -> str:
+    """Async variant of tavily_search with the same output format."""
+    known = _known_technique(query)
+    if known is not None:
+        return known
+
+    api_key = os.getenv("TAVILY_API_KEY")
+    if not api_key:
+        return "Missing Tavily API key."
+
+    headers = {"Authorization": f"Bearer {api_key}"}
+    params = _search_params(query, search_depth)
+
+    try:
+        response = await http_client.aget(TAVILY_URL, headers=headers, params=params)
+    except httpx.HTTPError as e:
+        return f"Tavily API error: {e}"
+
+    if response.status_code != 200:
+        return f"Tavily API error: {response.status_code} - {response.text}"
+
+    results = response.json().get("results", [])
+    return _learn(query, results, _format_results(query, results))
+
+
+# One tool for both invoke() and ainvoke(); the async path doesn't tie up a worker thread
+tavily_search = StructuredTool.from_function(
+    func=tavily_search_sync,
+    coroutine=tavily_search_async,
+    name="tavily_search"
+)
@@ -1,16 +1,18 @@
 # app/agent/user_info_agent.py
+import threading
+from typing import TYPE_CHECKING, Optional
 
-from langgraph.prebuilt import create_react_agent
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
-import os
-import json
+from Controller.llm_gateway import DEFAULT_MODEL, STRUCTURED_OUTPUT, get_chat_model, get_structured_agent_model
+from state import ExtractionResult
+from Controller.json_extract import TAGGED, extract_json, response_text, strip_tagged
 
-from agent.tools.extract_preferences import extract_preferences_from_convo
+if TYPE_CHECKING:
+    from langgraph.graph.state import CompiledStateGraph
 
-load_dotenv()
+_lock = threading.Lock()
+_user_info_agent: Optional["CompiledStateGraph"] = None
 
-system_prompt = (
+_assistant_prompt = (
     "You are a friendly and helpful chef's assistant named Sous-Chef who engages in natural conversation with users to discover their cooking preferences and available ingredients.\n\n"
     
     "CONVERSATIONAL GUIDELINES:\n"
@@ -35,13 +37,9 @@ system_prompt = (
     "3. If the user mentions preferences (like 'high protein' or 'low carb') without listing specific ingredients, you MUST ask them what ingredients they have available\n"
     "4. The ingredients list should ONLY contain items explicitly mentioned by the user\n"
     "5. Leave the ingredients list EMPTY if the user hasn't explicitly mentioned any ingredients\n\n"
-    
-    "IMPORTANT: You MUST use the extract_preferences_from_convo tool to extract structured data before providing a response to the user. This lets you respond naturally while ensuring structured data is captured. Every response must include both:\n"
-    "1. A natural conversational reply to the user that feels like a real dialogue\n"
-    "2. Hidden structured data that follows the required format\n\n"
-    
-    "STRUCTURED DATA FORMAT RULES:\n"
-    "You must append this JSON at the very end of your response, prefixed with <structured_data> and followed by </structured_data>. This section will be removed before showing to the user:\n"
+)
+
+_data_format = (
     "{\n"
     "  \"ingredients\": [list of ingredients mentioned by user],\n"
     "  \"preferences\": {\n"
@@ -52,50 +50,66 @@ system_prompt = (
     "    \"craving\": \"specific craving mentioned or null\"\n"
     "  }\n"
     "}\n\n"
+)
+
+system_prompt = _assistant_prompt + (
+    "IMPORTANT: You MUST use the extract_preferences_from_convo tool to extract structured data before providing a response to the user. This lets you respond naturally while ensuring structured data is captured. Every response must include both:\n"
+    "1. A natural conversational reply to the user that feels like a real dialogue\n"
+    "2. Hidden structured data that follows the required format\n\n"
     
+    "STRUCTURED DATA FORMAT RULES:\n"
+    "You must append this JSON at the very end of your response, prefixed with <structured_data> and followed by </structured_data>. This section will be removed before showing to the user:\n"
+) + _data_format + (
     "Example response format (when user only mentions preferences but no ingredients):\n"
     "'I understand you're looking for a high protein, low carb meal. That's a great choice! To help you find the perfect recipe, could you tell me what ingredients you have available to work with?'\n"
     "<structured_data>{\"ingredients\": [], \"preferences\": {\"diet\": \"low carb, high protein\", \"allergies\": [], \"cuisine\": null, \"prep_time\": null, \"craving\": null}}</structured_data>"
 )
 
-# Create the model with appropriate settings for conversation
-llm = ChatOpenAI(
-    model="mistralai/mistral-7b-instruct:free",
-    openai_api_base="https://openrouter.ai/api/v1",
-    openai_api_key=os.getenv("OPENROUTER_API_KEY"),
-    temperature=0.7  # Slightly higher temperature for more conversational responses
+# With STRUCTURED_OUTPUT the final answer is schema-constrained, so there is no reply to tag data onto
+structured_system_prompt = _assistant_prompt + (
+    "IMPORTANT: You MUST use the extract_preferences_from_convo tool to extract structured data before giving your final answer.\n\n"
+    
+    "OUTPUT FORMAT RULES:\n"
+    "Your final answer must be ONLY a JSON object in this format, with no conversational text, no <structured_data> tags and no code blocks:\n"
+) + _data_format + (
+    "Example final answer (when user only mentions preferences but no ingredients):\n"
+    "{\"ingredients\": [], \"preferences\": {\"diet\": \"low carb, high protein\", \"allergies\": [], \"cuisine\": null, \"prep_time\": null, \"craving\": null}}"
 )
 
-tools = [extract_preferences_from_convo]
+MODEL_NAME = DEFAULT_MODEL
+TEMPERATURE = 0.7  # Slightly higher temperature for more conversational responses
+
 
-user_info_agent = create_react_agent(llm, tools, prompt=system_prompt)
+def get_user_info_agent() -> "CompiledStateGraph":
+    """The user info agent, built (with its model client and tool) on first use."""
+    global _user_info_agent
+    with _lock:
+        if _user_info_agent is None:
+            from langgraph.prebuilt import create_react_agent
+            from agent.tools.extract_preferences import extract_preferences_from_convo
+
+            # Create the model with appropriate settings for conversation; pooling and limits live in the gateway
+            tools = [extract_preferences_from_convo]
+            # With STRUCTURED_OUTPUT the final answer itself is constrained to the ExtractionResult schema
+            if STRUCTURED_OUTPUT:
+                llm = get_structured_agent_model(TEMPERATURE, tools, ExtractionResult, model=MODEL_NAME)
+                prompt = structured_system_prompt
+            else:
+                llm = get_chat_model(TEMPERATURE, model=MODEL_NAME)
+                prompt = system_prompt
+
+            _user_info_agent = create_react_agent(
+                llm, tools, prompt=prompt,
+                # Runs inside a graph node; don't inherit the session checkpointer for its scratch steps
+                checkpointer=False
+            )
+        return _user_info_agent
 
 # Function to extract structured data from response
 def extract_structured_data(response):
     """Extract structured data from between the <structured_data> tags"""
     try:
-        if isinstance(response, dict) and "messages" in response:
-            # Extract from LangChain message format
-            messages = response.get("messages", [])
-            content = ""
-            for msg in reversed(messages):
-                if hasattr(msg, 'content') and msg.content:
-                    content = msg.content.strip()
-                    break
-        elif isinstance(response, str):
-            content = response.strip()
-        else:
-            # Get content from other formats
-            content = getattr(response, "content", str(response)).strip()
-        
-        # Extract the structured data
-        import re
-        match = re.search(r'<structured_data>(.*?)</structured_data>', content, re.DOTALL)
-        if match:
-            data_str = match.group(1).strip()
-            return json.loads(data_str)
-        
-        return {}
+        return extract_json(response_text(response), kinds=(TAGGED,)) or {}
     except Exception:
         return {}
         
@@ -103,26 +117,6 @@ def extract_structured_data(response):
 def get_conversation_response(response):
     """Get only the conversational part of a response, removing the structured data"""
     try:
-        if isinstance(response, dict) and "messages" in response:
-            # Extract from LangChain message format
-            messages = response.get("messages", [])
-            content = ""
-            for msg in reversed(messages):
-                if hasattr(msg, 'content') and msg.content:
-                    content = msg.content.strip()
-                    break
-        elif isinstance(response, str):
-            content = response.strip()
-        else:
-            # Get content from other formats
-            content = getattr(response, "content", str(response)).strip()
-        
-        # Remove the structured data
-        import re
-        result = re.sub(r'<structured_data>.*?</structured_data>', '', content, flags=re.DOTALL).strip()
-        return result
+        return strip_tagged(response_text(response))
     except Exception:
-        if 'content' in locals():
-            return content  # Return the original content if there's an error
-        else:
-            return str(response)
+        return str(response)
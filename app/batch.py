@@ -0,0 +1,203 @@
+"""
+Batch mode: run a JSONL file of saved queries through the recipe graph.
+
+Each input line is an object with "messages" (chat messages) or "message" (a single user
+message), plus optional "id", "ingredients" and "preferences". Each result line carries the
+input's line number and id, "status" ("ok" or "error"), the extracted ingredients and
+preferences, the recipes and merged shopping list, and the turn's latency.
+
+Results are appended as they complete, so an interrupted run picks up where it stopped:
+lines already answered ("ok") in the output file are skipped on the next run, and lines
+that failed are retried, appending a new result (the last one for a line is current).
+
+Usage:
+    python app/batch.py queries.jsonl --output results.jsonl [--concurrency 8]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+# Allow running as a script
+if __name__ == "__main__":
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from graph import build_recipe_graph
+from state import RecipeState
+
+# Get logger
+logger = logging.getLogger("recipe_finder")
+
+PROGRESS_INTERVAL = 10.0  # seconds between progress lines
+
+
+def read_requests(path: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """Yield (line number, request, parse error) for each non-blank line, reading lazily."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, None, f"invalid JSON: {e}"
+                continue
+            if not isinstance(request, dict):
+                yield line_no, None, "expected a JSON object"
+                continue
+            yield line_no, request, None
+
+
+def completed_lines(path: str) -> Set[int]:
+    """Line numbers an earlier run answered ("ok"); errors are retried and a torn last line is ignored."""
+    done: Set[int] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                if record.get("status") == "ok":
+                    done.add(int(record["line"]))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                continue
+    return done
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def to_state(request: Dict[str, Any]) -> RecipeState:
+    messages = request.get("messages")
+    if messages is None and request.get("message"):
+        messages = [{"role": "user", "content": str(request["message"])}]
+    if not messages:
+        raise ValueError("request has no messages")
+    fields = {"messages": messages}
+    for key in ("ingredients", "preferences"):
+        if request.get(key):
+            fields[key] = request[key]
+    return RecipeState.model_validate(fields)
+
+
+class Stats:
+    def __init__(self, skipped: int):
+        self.started = time.perf_counter()
+        self.skipped = skipped
+        self.ok = 0
+        self.errors = 0
+        self.latencies: List[float] = []
+
+    def record(self, status: str, elapsed_ms: float) -> None:
+        if status == "ok":
+            self.ok += 1
+        else:
+            self.errors += 1
+        self.latencies.append(elapsed_ms)
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        done = self.ok + self.errors
+        latencies = sorted(self.latencies)
+        return {
+            "processed": done,
+            "ok": self.ok,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "elapsed_s": round(elapsed, 2),
+            "requests_per_s": round(done / elapsed, 2) if elapsed > 0 else 0.0,
+            "p50_ms": round(statistics.median(latencies), 1) if latencies else None,
+            "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1) if latencies else None,
+        }
+
+
+async def run_one(graph: Any, line_no: int, request: Optional[Dict[str, Any]], error: Optional[str],
+                  recursion_limit: int) -> Dict[str, Any]:
+    record: Dict[str, Any] = {"line": line_no, "id": (request or {}).get("id")}
+    start = time.perf_counter()
+    try:
+        if error:
+            raise ValueError(error)
+        result = await graph.ainvoke(to_state(request), config={"recursion_limit": recursion_limit})
+        final = RecipeState.model_validate(result)
+        record.update({
+            "status": "ok",
+            "ingredients": final.ingredients,
+            "preferences": final.preferences.model_dump(),
+            "recipes": final.recipes,
+            "grocery_list": final.grocery_list,
+            "agent_budget": final.agent_budget,
+            # No recipes because the graph asked a follow-up question; "reply" is that question
+            "needs_input": final.force_pause,
+            "reply": next((m.get("content") for m in reversed(final.messages) if m.get("role") == "assistant"), None),
+        })
+    except Exception as e:
+        record.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    record["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return record
+
+
+async def run_batch(input_path: str, output_path: str, concurrency: int, recursion_limit: int) -> Dict[str, Any]:
+    done = completed_lines(output_path)
+    if done:
+        logger.info(f"Resuming: {len(done)} lines already answered in {output_path}")
+    stats = Stats(skipped=len(done))
+    graph = build_recipe_graph()
+    # Bounds both the graph runs in flight and how far ahead of them the input is read
+    slots = asyncio.Semaphore(concurrency)
+    last_progress = time.perf_counter()
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        # Start on a fresh line if the previous run died mid-write
+        if out.tell() > 0 and not _ends_with_newline(output_path):
+            out.write("\n")
+
+        async def worker(line_no, request, error):
+            nonlocal last_progress
+            try:
+                record = await run_one(graph, line_no, request, error, recursion_limit)
+                out.write(json.dumps(record, default=str) + "\n")
+                # Flushed per line so a crash loses at most the turns still in flight
+                out.flush()
+                stats.record(record["status"], record["elapsed_ms"])
+                if time.perf_counter() - last_progress >= PROGRESS_INTERVAL:
+                    last_progress = time.perf_counter()
+                    print(json.dumps({"progress": stats.summary()}), file=sys.stderr, flush=True)
+            finally:
+                slots.release()
+
+        tasks = set()
+        for line_no, request, error in read_requests(input_path):
+            if line_no in done:
+                continue
+            await slots.acquire()
+            task = asyncio.create_task(worker(line_no, request, error))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+
+    return stats.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file of requests")
+    parser.add_argument("--output", required=True, help="JSONL file results are appended to")
+    parser.add_argument("--concurrency", type=int, default=8, help="Graph runs in flight (default 8)")
+    parser.add_argument("--recursion-limit", type=int, default=5, help="Graph recursion limit per request (default 5)")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run_batch(args.input, args.output, max(args.concurrency, 1), args.recursion_limit))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
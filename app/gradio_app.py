@@ -1,126 +1,46 @@
-import gradio as gr
+import argparse
+import inspect
 import json
 import sys
 import os
+import threading
 import traceback
+import uuid
 import logging
-from pydantic import ValidationError
+from typing import Any, Dict, Optional
 
 # Allow running as a script
 if __name__ == "__main__":
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from graph import build_recipe_graph
-from state import RecipeState
+from Controller.metrics import start_metrics_server
+from worker_pool import WorkerPoolBusy, get_worker_pool, start_worker_pool
 
 # Set up minimal logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s', datefmt='%H:%M:%S')
 logger = logging.getLogger("gradio_app")
 
-graph = build_recipe_graph()
+_graph = None
+_graph_lock = threading.Lock()
 
-# Initialize the state with defaults
-def get_initial_state():
-    return RecipeState().model_dump()
 
-# Session state for chat
-def chat_interface(user_message, history, state):
-    logger.info("Processing user message")
-    
-    # Initialize state if empty
-    if not state:
-        state = get_initial_state()
-        logger.info("Initialized new state")
-    
-    # Update state with new user message
-    if "messages" not in state:
-        state["messages"] = []
-    
-    # Add the user message to the state
-    state["messages"].append({"role": "user", "content": user_message})
-    
-    # Check if the previous state had force_pause set
-    was_waiting_for_input = state.get("force_pause", False)
-    if was_waiting_for_input:
-        logger.info("Continuing after pause for user input")
-    
-    # Run the graph with increased recursion limit and proper error handling
-    try:
-        # First, validate the state to ensure it's compatible with our model
-        valid_state = RecipeState.model_validate(state)
-        
-        # Run the graph with the validated state
-        logger.info("Invoking graph")
-        result = graph.invoke(
-            valid_state.model_dump(),
-            config={"recursion_limit": 5}
-        )
-        logger.info("Graph execution completed")
-    except ValidationError as ve:
-        # Try to fix common validation issues
-        try:
-            logger.info("Validation error, attempting to fix")
-            # If we have recipe objects but they're not in the right format
-            if "recipes" in state and state["recipes"] and isinstance(state["recipes"], list):
-                # Make sure recipes are dictionaries
-                fixed_recipes = []
-                for recipe in state["recipes"]:
-                    if isinstance(recipe, dict):
-                        fixed_recipes.append(recipe)
-                state["recipes"] = fixed_recipes
-                
-            # Try again with the fixed state
-            valid_state = RecipeState.model_validate(state)
-            result = graph.invoke(
-                valid_state.model_dump(),
-                config={"recursion_limit": 5}
-            )
-            logger.info("Successfully fixed validation error")
-        except Exception:
-            logger.info("Failed to fix validation error")
-            history.append({"role": "user", "content": user_message})
-            history.append({"role": "assistant", "content": "I encountered an issue processing your information. Please try again with specific ingredients you'd like to use."})
-            # Reset the state to avoid continuing problems
-            state = get_initial_state()
-            state["messages"] = [{"role": "user", "content": user_message}]
-            return "", history, state
-    except Exception:
-        logger.info("Graph execution error")
-        # Return a reasonable fallback response
-        history.append({"role": "user", "content": user_message})
-        history.append({"role": "assistant", "content": "Sorry, I encountered an error processing your request. Please try again with specific ingredients you have available."})
-        # Don't lose the message history
-        if "messages" in state:
-            messages = state["messages"]
-            state = get_initial_state()
-            state["messages"] = messages
-        return "", history, state
+def get_graph():
+    """The session-checkpointed recipe graph, compiled on first use."""
+    global _graph
+    with _graph_lock:
+        if _graph is None:
+            from Controller.checkpointing import get_checkpointer
+            _graph = build_recipe_graph(checkpointer=get_checkpointer())
+        return _graph
 
-    # Check if the graph is waiting for user input (force_pause flag is set)
-    is_waiting_for_input = result.get("force_pause", False)
-    
-    # If the system is waiting for user input, display the last assistant message
-    if is_waiting_for_input:
-        logger.info("Paused for user input")
-        assistant_messages = [msg for msg in result.get("messages", []) if msg.get("role") == "assistant"]
-        
-        if assistant_messages:
-            latest_message = assistant_messages[-1]
-            prompt_message = latest_message.get("content", "")
-            
-            # Add this message to the UI history
-            history.append({"role": "user", "content": user_message})
-            history.append({"role": "assistant", "content": prompt_message})
-            
-            # Update the state 
-            state = result
-            
-            return "", history, state
 
-    # Extract the recipes from the state
-    recipes = result.get("recipes", [])
-    logger.info(f"Found {len(recipes)} recipes")
+def new_session():
+    """A fresh conversation; its state is created in the checkpointer on the first message."""
+    return {"thread_id": uuid.uuid4().hex}
 
+def format_extracted_info(result: Dict[str, Any]) -> str:
+    """Summary of what the graph understood, shown above the recipes."""
     # Add extracted information to the response
     extracted_info = f"I extracted the following information from our conversation:\n"
     extracted_info += f"- Ingredients: {', '.join(result.get('ingredients', []) or ['None detected'])}\n"
@@ -148,118 +68,274 @@ def chat_interface(user_message, history, state):
     extracted_info += f"- Cuisine: {cuisine}\n"
     extracted_info += f"- Prep Time: {prep_time}\n"
     extracted_info += f"- Craving: {craving}\n\n"
+    return extracted_info
+
+
+def format_recipe(i: int, recipe: Dict[str, Any]) -> str:
+    """Markdown for a single recipe card."""
+    # Recipe title
+    title = recipe.get('title', f'Recipe {i+1}')
+    response_message = f"## {title}\n\n"
+    
+    # Recipe image
+    if recipe.get('image_url'):
+        response_message += f"![{title}]({recipe.get('image_url')})\n\n"
+    
+    # Ingredients
+    if recipe.get('ingredients'):
+        response_message += "### Ingredients\n"
+        for ingredient in recipe.get('ingredients', []):
+            response_message += f"- {ingredient}\n"
+        response_message += "\n"
+    
+    # Instructions
+    if recipe.get('instructions'):
+        response_message += "### Instructions\n"
+        for j, step in enumerate(recipe.get('instructions', [])):
+            response_message += f"{j+1}. {step}\n"
+        response_message += "\n"
+    
+    # Grocery list (items you need to buy)
+    if recipe.get('grocery_list') and len(recipe.get('grocery_list')) > 0:
+        response_message += "### Shopping List\n"
+        response_message += "These items aren't in your ingredients list and may need to be purchased:\n"
+        for item in recipe.get('grocery_list', []):
+            response_message += f"- {item}\n"
+        response_message += "\n"
+    
+    # Calories, with macros when they were estimated from the ingredients
+    if recipe.get('calories'):
+        nutrition = recipe.get('nutrition') or {}
+        response_message += f"**Calories:** {recipe.get('calories')} kcal"
+        if nutrition and recipe.get('calories') == nutrition.get('calories'):
+            portion = f"per serving, {nutrition['servings']} servings" if nutrition.get('servings') else "whole recipe"
+            response_message += (f" ({portion}, estimated) · Protein {nutrition['protein_g']:g} g"
+                                 f" · Fat {nutrition['fat_g']:g} g · Carbs {nutrition['carbs_g']:g} g")
+        response_message += "\n\n"
+    
+    response_message += "---\n\n"
+    return response_message
+
+
+def format_no_recipes(result: Dict[str, Any], extracted_info: str) -> str:
+    """Message shown when the graph produced no recipes."""
+    # Check if we have a prompt message in the state results
+    if "messages" in result:
+        assistant_messages = [msg for msg in result.get("messages", []) if msg.get("role") == "assistant"]
+        if assistant_messages:
+            latest_message = assistant_messages[-1]
+            prompt_message = latest_message.get("content", "")
+            if "ingredients" in prompt_message.lower():
+                return prompt_message
+        return "I need specific ingredients to suggest recipes. Please tell me what ingredients you have available in your kitchen."
+    return extracted_info + "I couldn't find any recipes matching your criteria. Please try providing specific ingredients you'd like to use."
+
+
+async def stream_graph(graph_input: Dict[str, Any], config: Dict[str, Any]):
+    """
+    Run the graph, yielding ("status", message) for progress updates as nodes and tools start,
+    then ("result", final_state) once the run completes.
+    """
+    result = None
+    async for mode, chunk in get_graph().astream(
+        graph_input,
+        config=config,
+        stream_mode=["custom", "values"]
+    ):
+        if mode == "custom" and isinstance(chunk, dict) and chunk.get("status"):
+            yield "status", chunk["status"]
+        elif mode == "values":
+            result = chunk
+    yield "result", result
+
+
+async def finish_turn(config: Dict[str, Any], reply: Optional[str] = None) -> None:
+    """Append the rendered reply (if any) to the session's history and bound its stored checkpoints."""
+    from Controller.checkpointing import prune_session
+    # The user message is already in the checkpointed history; only the reply is new
+    if reply is not None:
+        try:
+            await get_graph().aupdate_state(config, {"messages": [{"role": "assistant", "content": reply}]})
+        except Exception:
+            logger.info("Failed to save the reply to the session")
+    prune_session(config["configurable"]["thread_id"])
+
+
+def run_on_session_worker(op: str, config: Dict[str, Any], *args: Any):
+    """Run stream_graph/finish_turn here, or on the session's worker process when serving with --workers."""
+    pool = get_worker_pool()
+    if pool is None:
+        return globals()[op](*args)
+    return pool.stream(config["configurable"]["thread_id"], op, *args)
+
 
-    # Format recipes for display
+async def _finish(config: Dict[str, Any], reply: Optional[str] = None) -> None:
+    # The reply is already on screen; failing to save it must not turn the turn into an error
+    try:
+        finished = run_on_session_worker("finish_turn", config, config, reply)
+        if inspect.isasyncgen(finished):
+            async for _ in finished:
+                pass
+        else:
+            await finished
+    except Exception:
+        logger.info("Could not save the reply to the session")
+
+
+# Session state for chat
+async def chat_interface(user_message, history, session):
+    """
+    Streaming chat handler: shows progress while the graph runs, then
+    renders the extracted preferences and each recipe as soon as it's formatted.
+    The conversation state lives in the checkpointer; the browser only holds the thread id.
+    """
+    logger.info("Processing user message")
+    
+    # Start a new session if needed
+    if not session or "thread_id" not in session:
+        session = new_session()
+        logger.info("Started new session")
+    config = {"configurable": {"thread_id": session["thread_id"]}, "recursion_limit": 5}
+
+    # Show the message right away with a placeholder reply that progress updates overwrite
+    history.append({"role": "user", "content": user_message})
+    history.append({"role": "assistant", "content": "_Reading your message…_"})
+    yield "", history, session
+    
+    # Only the new message is sent; the reducer appends it to the checkpointed history
+    result = None
+    try:
+        logger.info("Streaming graph")
+        graph_input = {"messages": [{"role": "user", "content": user_message}]}
+        async for kind, value in run_on_session_worker("stream_graph", config, graph_input, config):
+            if kind == "status":
+                history[-1] = {"role": "assistant", "content": f"_{value}_"}
+                yield "", history, session
+            else:
+                result = value
+        logger.info("Graph execution completed")
+    except WorkerPoolBusy:
+        logger.info("Session worker is busy")
+        history[-1] = {"role": "assistant", "content": "I'm helping a lot of people right now. Please send your message again in a moment."}
+        yield "", history, session
+        return
+    except Exception:
+        logger.info("Graph execution error")
+        # The checkpoint keeps the message history, so the next message carries on from here
+        history[-1] = {"role": "assistant", "content": "Sorry, I encountered an error processing your request. Please try again with specific ingredients you have available."}
+        yield "", history, session
+        return
+
+    # Check if the graph is waiting for user input (force_pause flag is set)
+    is_waiting_for_input = result.get("force_pause", False)
+    
+    # If the system is waiting for user input, display the last assistant message
+    if is_waiting_for_input:
+        logger.info("Paused for user input")
+        assistant_messages = [msg for msg in result.get("messages", []) if msg.get("role") == "assistant"]
+        
+        if assistant_messages:
+            latest_message = assistant_messages[-1]
+            prompt_message = latest_message.get("content", "")
+            
+            # Add this message to the UI history
+            history[-1] = {"role": "assistant", "content": prompt_message}
+            await _finish(config)
+            yield "", history, session
+            return
+
+    # Extract the recipes from the state
+    recipes = result.get("recipes", [])
+    logger.info(f"Found {len(recipes)} recipes")
+
+    extracted_info = format_extracted_info(result)
+
+    # Format recipes for display, pushing each one to the chat as it's rendered
     if recipes:
         logger.info("Formatting recipes for display")
         response_message = extracted_info + f"Here are some recipes for you:\n\n"
+        history[-1] = {"role": "assistant", "content": response_message}
+        yield "", history, session
         
         for i, recipe in enumerate(recipes):
-            # Recipe title
-            title = recipe.get('title', f'Recipe {i+1}')
-            response_message += f"## {title}\n\n"
-            
-            # Recipe image
-            if recipe.get('image_url'):
-                response_message += f"![{title}]({recipe.get('image_url')})\n\n"
-            
-            # Ingredients
-            if recipe.get('ingredients'):
-                response_message += "### Ingredients\n"
-                for ingredient in recipe.get('ingredients', []):
-                    response_message += f"- {ingredient}\n"
-                response_message += "\n"
-            
-            # Instructions
-            if recipe.get('instructions'):
-                response_message += "### Instructions\n"
-                for j, step in enumerate(recipe.get('instructions', [])):
-                    response_message += f"{j+1}. {step}\n"
-                response_message += "\n"
-            
-            # Grocery list (items you need to buy)
-            if recipe.get('grocery_list') and len(recipe.get('grocery_list')) > 0:
-                response_message += "### Shopping List\n"
-                response_message += "These items aren't in your ingredients list and may need to be purchased:\n"
-                for item in recipe.get('grocery_list', []):
-                    response_message += f"- {item}\n"
-                response_message += "\n"
-            
-            # Calories
-            if recipe.get('calories'):
-                response_message += f"**Calories:** {recipe.get('calories')} kcal\n\n"
-            
-            response_message += "---\n\n"
+            response_message += format_recipe(i, recipe)
+            history[-1] = {"role": "assistant", "content": response_message}
+            yield "", history, session
     else:
         logger.info("No recipes found or waiting for more information")
-        # Check if we have a prompt message in the state results
-        if "messages" in result:
-            assistant_messages = [msg for msg in result.get("messages", []) if msg.get("role") == "assistant"]
-            if assistant_messages:
-                latest_message = assistant_messages[-1]
-                prompt_message = latest_message.get("content", "")
-                if "ingredients" in prompt_message.lower():
-                    response_message = prompt_message
-                else:
-                    response_message = "I need specific ingredients to suggest recipes. Please tell me what ingredients you have available in your kitchen."
-            else:
-                response_message = "I need specific ingredients to suggest recipes. Please tell me what ingredients you have available in your kitchen."
-        else:
-            response_message = extracted_info + "I couldn't find any recipes matching your criteria. Please try providing specific ingredients you'd like to use."
+        response_message = format_no_recipes(result, extracted_info)
+        history[-1] = {"role": "assistant", "content": response_message}
 
-    # Add messages to the history in the correct format for type="messages"
-    history.append({"role": "user", "content": user_message})
-    history.append({"role": "assistant", "content": response_message})
-    
-    # Update the state with the most recent result
-    state = result
-    
-    # Ensure we have the messages array and add the latest exchange
-    if "messages" not in state:
-        state["messages"] = []
-    
-    # Add this conversation to the state
-    state["messages"].append({"role": "user", "content": user_message})
-    state["messages"].append({"role": "assistant", "content": response_message})
+    await _finish(config, response_message)
     
     logger.info("Response complete, returning to user")
-    return "", history, state
+    yield "", history, session
+
+def build_demo():
+    """Build the chat UI; gradio is only imported here."""
+    import gradio as gr
 
-# Launch the gradio app
-with gr.Blocks() as demo:
-    gr.Markdown("# 🥗 Recipe Finder Chatbot")
-    gr.Markdown("Tell me what **specific ingredients** you have available and I'll suggest recipes. For example: 'I have chicken, pasta, and tomatoes. Can you suggest an Italian dish?'")
+    with gr.Blocks() as demo:
+        gr.Markdown("# 🥗 Recipe Finder Chatbot")
+        gr.Markdown("Tell me what **specific ingredients** you have available and I'll suggest recipes. For example: 'I have chicken, pasta, and tomatoes. Can you suggest an Italian dish?'")
     
-    # Use a simpler Chatbot configuration compatible with older Gradio versions
-    chatbot = gr.Chatbot(
-        type="messages",
-        height=600,
-        show_label=False
-    )
+        # Use a simpler Chatbot configuration compatible with older Gradio versions
+        chatbot = gr.Chatbot(
+            type="messages",
+            height=600,
+            show_label=False
+        )
     
-    state = gr.State(get_initial_state())  # Initialize state properly
+        state = gr.State(None)  # Session (thread id) created on the first message
     
-    with gr.Row():
-        user_input = gr.Textbox(
-            placeholder="List your ingredients here (e.g., 'I have eggs, cheese, spinach and want something quick')",
-            show_label=False,
-            scale=9
+        with gr.Row():
+            user_input = gr.Textbox(
+                placeholder="List your ingredients here (e.g., 'I have eggs, cheese, spinach and want something quick')",
+                show_label=False,
+                scale=9
+            )
+            send_btn = gr.Button("Send", scale=1)
+
+        gr.Examples(
+            [
+                "I have chicken, rice, and bell peppers. Looking for something spicy.",
+                "I need a vegetarian pasta dish with mushrooms and spinach.",
+                "I have eggs, cheese, and potatoes. Something quick for breakfast."
+            ],
+            user_input
         )
-        send_btn = gr.Button("Send", scale=1)
-
-    gr.Examples(
-        [
-            "I have chicken, rice, and bell peppers. Looking for something spicy.",
-            "I need a vegetarian pasta dish with mushrooms and spinach.",
-            "I have eggs, cheese, and potatoes. Something quick for breakfast."
-        ],
-        user_input
-    )
     
-    send_btn.click(chat_interface, [user_input, chatbot, state], [user_input, chatbot, state])
-    user_input.submit(chat_interface, [user_input, chatbot, state], [user_input, chatbot, state])
+        # The handler is async, so chats share the event loop instead of queueing for one worker
+        send_btn.click(chat_interface, [user_input, chatbot, state], [user_input, chatbot, state], concurrency_limit=None)
+        user_input.submit(chat_interface, [user_input, chatbot, state], [user_input, chatbot, state], concurrency_limit=None)
+
+        logger.info("Gradio app initialized")
+    return demo
+
 
-    logger.info("Gradio app initialized")
+def __getattr__(name: str):
+    # `gradio app/gradio_app.py` reload mode looks up `demo`; build it on that first access
+    if name == "demo":
+        demo = globals()["demo"] = build_demo()
+        return demo
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Importing the module (benchmarks, `gradio app/gradio_app.py` reload mode) must not start a server
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recipe Finder chat server")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", "1")),
+                        help="Processes running graph turns; 1 runs them in the server process (default: WORKERS or 1)")
+    parser.add_argument("--queue-depth", type=int, default=int(os.getenv("QUEUE_DEPTH", "8")),
+                        help="Turns in flight per worker before new ones are turned away (default: QUEUE_DEPTH or 8)")
+    args = parser.parse_args()
 
-logger.info("Starting Gradio server")
-demo.launch() 
\ No newline at end of file
+    logger.info("Starting Gradio server")
+    # Prometheus metrics on METRICS_PORT, if set; workers serve theirs on the following ports
+    start_metrics_server()
+    start_worker_pool(args.workers, args.queue_depth)
+    demo = build_demo()
+    # Chats run with concurrency_limit=None, so nothing waits in Gradio's queue;
+    # turns past --queue-depth are turned away by the worker pool instead
+    demo.queue()
+    demo.launch() 
\ No newline at end of file
@@ -1,16 +1,31 @@
-from typing import Dict, Any, List
-from langgraph.graph import StateGraph, END
-from state import RecipeState, initial_state
+from Controller.settings import load_env
+
+# Before anything below reads its configuration
+load_env()
+
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Awaitable, Callable, Generator, Tuple, Type
+from pydantic import BaseModel, ValidationError
+from state import ExtractionResult, RecipeList, RecipeState, as_recipe_state, initial_state
 from Controller.llm_helper import query_llm_for_preferences
-from agent.recipe_agent import recipe_agent
-from agent.user_info_agent import user_info_agent
+from Controller.llm_gateway import STRUCTURED_OUTPUT
+from Controller.preference_rules import extract_complete
+from Controller.context_window import build_context
+from Controller.json_extract import extract_json, response_text
+from Controller.ranking import rank_recipes
+from Controller.grocery import pantry_set, recipe_grocery_list, shopping_list
+from Controller.nutrition import MIN_COVERAGE, estimate_nutrition
+from Controller.agent_budget import AgentBudget, BudgetTracker, partial_recipes
+from agent.recipe_agent import get_recipe_agent
+from agent.user_info_agent import get_user_info_agent, MODEL_NAME as USER_INFO_MODEL, TEMPERATURE as USER_INFO_TEMPERATURE
+from Controller.llm_cache import llm_cache, llm_cache_key
 from router import is_user_info_complete
-import json
-from json_repair import repair_json
-from dotenv import load_dotenv
+import asyncio
+import copy
 import logging
 
-load_dotenv()
+# langgraph/langchain load when the graph is built, not when this module is imported
+if TYPE_CHECKING:
+    from langgraph.checkpoint.base import BaseCheckpointSaver
 
 # Set up minimal logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s', datefmt='%H:%M:%S')
@@ -21,18 +36,224 @@ logger = logging.getLogger("recipe_finder")
 
 conversation_history = ""
 
+# Minimum lexicon confidence to accept ingredients without asking the agent
+FAST_PATH_CONFIDENCE = 0.8
+
+
+def fast_extract(message: str) -> Optional[Dict[str, Any]]:
+    """
+    Ingredients and preferences ({"ingredients", "preferences"}) of a message the local
+    rules fully explain, or None when it needs the agent.
+    """
+    result = extract_complete(message, FAST_PATH_CONFIDENCE)
+    if result is not None:
+        logger.info(f"Fast path extracted ingredients: {result['ingredients']}")
+    return result
+
+
+def merge_extracted_preferences(current: Any, prefs: Dict[str, Any]) -> Any:
+    """Copy of the state's preferences with the extracted fields set; allergies are added to."""
+    preferences = current.model_copy()
+    if prefs.get("diet") not in (None, "null", ""):
+        preferences.diet = prefs["diet"]
+
+    if prefs.get("allergies") and isinstance(prefs["allergies"], list):
+        new_allergies = [a for a in prefs["allergies"] if a not in (None, "null", "") and a not in preferences.allergies]
+        preferences.allergies = preferences.allergies + new_allergies
+
+    if prefs.get("cuisine") not in (None, "null", ""):
+        preferences.cuisine = prefs["cuisine"]
+
+    if prefs.get("prep_time") not in (None, "null", ""):
+        preferences.prep_time = prefs["prep_time"]
+
+    if prefs.get("craving") not in (None, "null", ""):
+        preferences.craving = prefs["craving"]
+    return preferences
+
+
+# Progress messages shown while the recipe agent works, by tool name
+TOOL_STATUS = {
+    "local_recipe_search": "Checking the local recipe collection…",
+    "spoonacular_search": "Searching Spoonacular…",
+    "tavily_search": "Searching the web for recipes and techniques…",
+    "llm_fallback_tool": "Creating a recipe from your ingredients…",
+}
+
+
+def emit_status(message: str) -> None:
+    """Push a progress message to graph.stream(stream_mode="custom") consumers; a no-op otherwise."""
+    from langgraph.config import get_stream_writer
+    try:
+        writer = get_stream_writer()
+    except Exception:
+        return
+    writer({"status": message})
+
+
+def run_recipe_agent(prompt: str, budget: Optional[AgentBudget] = None) -> Dict[str, Any]:
+    """
+    Run the recipe agent step by step, reporting each tool call as it starts, until it
+    answers or its budget runs out. The response carries the budget outcome under "budget".
+    The deadline is checked between steps; a step in progress is bounded by the HTTP timeouts.
+    """
+    tracker = BudgetTracker(budget or AgentBudget())
+    response: Dict[str, Any] = {}
+    steps = get_recipe_agent().stream(
+        {"messages": [{"role": "user", "content": prompt}]},
+        config={"recursion_limit": tracker.budget.recursion_limit},
+        stream_mode="values"
+    )
+    try:
+        for response in steps:
+            if _observe_step(tracker, response):
+                break
+    finally:
+        steps.close()
+    return {**response, "budget": tracker.outcome()}
+
+
+async def arun_recipe_agent(prompt: str, budget: Optional[AgentBudget] = None) -> Dict[str, Any]:
+    """Async run_recipe_agent; tool calls go through the tools' async paths, and the deadline also cuts a step short."""
+    tracker = BudgetTracker(budget or AgentBudget())
+    response: Dict[str, Any] = {}
+    steps = get_recipe_agent().astream(
+        {"messages": [{"role": "user", "content": prompt}]},
+        config={"recursion_limit": tracker.budget.recursion_limit},
+        stream_mode="values"
+    )
+    try:
+        while True:
+            try:
+                response = await asyncio.wait_for(steps.__anext__(), timeout=max(tracker.remaining_s(), 0))
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                tracker.timed_out()
+                break
+            if _observe_step(tracker, response):
+                break
+    finally:
+        await steps.aclose()
+    return {**response, "budget": tracker.outcome()}
+
+
+def _observe_step(tracker: BudgetTracker, response: Dict[str, Any]) -> bool:
+    """Account for one agent step; True when the budget says to stop before the next."""
+    messages = response.get("messages", [])
+    if tracker.observe(messages):
+        logger.info(f"Recipe agent stopped early: {tracker.stopped} budget used up")
+        return True
+    last_message = messages[-1] if messages else None
+    for tool_call in getattr(last_message, "tool_calls", None) or []:
+        emit_status(TOOL_STATUS.get(tool_call.get("name"), "Looking up cooking details…"))
+    return False
+
+
+# Bump whenever the extraction prompts in collect_user_info change
+EXTRACTION_PROMPT_VERSION = "1"
+
+
+def _cached_extraction(prompt: str) -> Tuple[str, Any]:
+    # Shared by the sync and async paths so their cache keys and hits can't drift apart
+    cache_key = llm_cache_key(USER_INFO_MODEL, USER_INFO_TEMPERATURE, EXTRACTION_PROMPT_VERSION, prompt)
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        logger.info("Using cached agent extraction")
+        cached = copy.deepcopy(cached)
+    return cache_key, cached
+
+
+def _store_extraction(cache_key: str, response: Any) -> Any:
+    result = structured_result(response, ExtractionResult)
+    if result is None:
+        result = parse_agent_json(response)
+    # Parse failures come back as the empty default; don't pin those in the cache
+    if result and result != {"ingredients": [], "preferences": {}}:
+        llm_cache.set(cache_key, copy.deepcopy(result))
+    return result
+
+
+def extract_with_agent(prompt: str) -> Any:
+    """
+    Run the user info agent on an extraction prompt and parse its JSON.
+    Results are memoized by prompt, so repeated iterations, retries and identical
+    example messages don't call the LLM again.
+    """
+    cache_key, cached = _cached_extraction(prompt)
+    if cached is not None:
+        return cached
+
+    response = get_user_info_agent().invoke({
+        "messages": [{"role": "user", "content": prompt}]
+    })
+    return _store_extraction(cache_key, response)
+
+
+async def aextract_with_agent(prompt: str) -> Any:
+    """Async extract_with_agent, sharing the same cache."""
+    cache_key, cached = _cached_extraction(prompt)
+    if cached is not None:
+        return cached
 
+    response = await get_user_info_agent().ainvoke({
+        "messages": [{"role": "user", "content": prompt}]
+    })
+    return _store_extraction(cache_key, response)
 
-#     return recipe_state.model_dump()
-def collect_user_info(state: Dict[str, Any]) -> Dict[str, Any]:
-    # Validate and hydrate state
-    recipe_state = RecipeState.model_validate(state)
+
+# The node logic is written once as a generator that yields each agent prompt and is sent
+# the agent's result (or has its exception thrown in); the sync and async nodes only differ
+# in how they run the agent.
+def _run_flow(flow: Generator[str, Any, Dict[str, Any]], call_agent: Callable[[str], Any]) -> Dict[str, Any]:
+    try:
+        prompt = next(flow)
+        while True:
+            try:
+                result = call_agent(prompt)
+            except Exception as e:
+                prompt = flow.throw(e)
+            else:
+                prompt = flow.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def _arun_flow(flow: Generator[str, Any, Dict[str, Any]],
+                     call_agent: Callable[[str], Awaitable[Any]]) -> Dict[str, Any]:
+    try:
+        prompt = next(flow)
+        while True:
+            try:
+                result = await call_agent(prompt)
+            except Exception as e:
+                prompt = flow.throw(e)
+            else:
+                prompt = flow.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+
+def collect_user_info(state: Any) -> Dict[str, Any]:
+    return _run_flow(_collect_user_info_flow(state), extract_with_agent)
+
+
+async def acollect_user_info(state: Any) -> Dict[str, Any]:
+    return await _arun_flow(_collect_user_info_flow(state), aextract_with_agent)
+
+
+def _collect_user_info_flow(state: Any) -> Generator[str, Any, Dict[str, Any]]:
+    # Nodes read the state as given and return only the fields they change;
+    # new messages are appended by the messages reducer
+    recipe_state = as_recipe_state(state)
+    updates: Dict[str, Any] = {}
+    emit_status("Extracting ingredients and preferences…")
     
     # If we previously paused for user input, process the new message
     if recipe_state.force_pause:
         logger.info("Processing user input after pause")
         # Reset the flag now that we've received a new message
-        recipe_state.force_pause = False
+        updates["force_pause"] = False
         
         # Get the latest user message to extract ingredients
         messages = getattr(recipe_state, "messages", []) or []
@@ -42,6 +263,13 @@ def collect_user_info(state: Dict[str, Any]) -> Dict[str, Any]:
                 latest_user_message = msg.get("content", "")
                 break
         
+        # A plain ingredient list can be read locally without an agent round-trip
+        fast = fast_extract(latest_user_message) if latest_user_message else None
+        if fast:
+            updates["ingredients"] = fast["ingredients"]
+            updates["preferences"] = merge_extracted_preferences(recipe_state.preferences, fast["preferences"])
+            return updates
+
         # Extract ingredients from the user message by calling the agent directly
         if latest_user_message:
             try:
@@ -52,12 +280,8 @@ def collect_user_info(state: Dict[str, Any]) -> Dict[str, Any]:
                     f"If no ingredients are found, return an empty array []"
                 )
                 
-                response = user_info_agent.invoke({
-                    "messages": [{"role": "user", "content": prompt}]
-                })
-                
                 # Try to parse ingredients directly
-                ingredients_result = parse_agent_json(response)
+                ingredients_result = yield prompt
                 
                 # Handle different response formats
                 if isinstance(ingredients_result, list):
@@ -80,33 +304,34 @@ def collect_user_info(state: Dict[str, Any]) -> Dict[str, Any]:
                 
                 if new_ingredients:
                     logger.info(f"Extracted ingredients: {new_ingredients}")
-                    recipe_state.ingredients = new_ingredients
+                    updates["ingredients"] = new_ingredients
                 else:
                     logger.info("No ingredients found in user message, asking again")
                     # Add a message asking for ingredients again, more explicitly
-                    messages.append({
+                    updates["messages"] = [{
                         "role": "assistant", 
                         "content": "I still need to know what specific ingredients you have. Please list them clearly, for example: 'I have chicken, rice, and carrots.'"
-                    })
-                    recipe_state.messages = messages
-                    recipe_state.force_pause = True
-                    return recipe_state.model_dump()
+                    }]
+                    updates["force_pause"] = True
+                    return updates
             except Exception:
                 pass
         
         # If we successfully got ingredients, proceed with the flow
-        if recipe_state.ingredients:
-            return recipe_state.model_dump()
+        if updates.get("ingredients") or recipe_state.ingredients:
+            return updates
     
     # Regular flow for initial message or if we already have ingredients
     
     # Stop if enough attempts already
     if recipe_state.iterations >= 3:
-        return recipe_state.model_dump()
+        return updates
 
-    # Construct conversation history
+    # Construct conversation history: a rolling summary of older messages plus the latest ones
     messages = getattr(recipe_state, "messages", []) or []
-    conversation_history = "\n".join([msg["content"] for msg in messages])
+    conversation_history, context_summary = build_context(messages, recipe_state.context_summary)
+    if context_summary.folded != recipe_state.context_summary.folded:
+        updates["context_summary"] = context_summary
 
     # Get the last message from user to check context
     last_user_message = ""
@@ -120,15 +345,24 @@ def collect_user_info(state: Dict[str, Any]) -> Dict[str, Any]:
     if not recipe_state.ingredients and recipe_state.iterations >= 1:
         logger.info("No ingredients found, pausing for user input")
         # Add a message prompting the user to provide ingredients
-        messages.append({
+        updates["messages"] = [{
             "role": "assistant", 
             "content": "I need specific ingredients to suggest recipes. Please tell me what ingredients you have available in your kitchen, and I'll find perfect recipes for you. For example: 'I have chicken, potatoes, and carrots.'"
-        })
-        recipe_state.messages = messages
-        recipe_state.iterations += 1
+        }]
+        updates["iterations"] = recipe_state.iterations + 1
         # Set force_pause flag to true to prevent further processing until user responds
-        recipe_state.force_pause = True
-        return recipe_state.model_dump()
+        updates["force_pause"] = True
+        return updates
+
+    # Fast path for the first ingredient list; merging with earlier ingredients
+    # (replace vs. combine) is left to the agent
+    if not recipe_state.ingredients and last_user_message:
+        fast = fast_extract(last_user_message)
+        if fast:
+            updates["ingredients"] = fast["ingredients"]
+            updates["preferences"] = merge_extracted_preferences(recipe_state.preferences, fast["preferences"])
+            updates["iterations"] = recipe_state.iterations + 1
+            return updates
 
     # Build prompt
     prompt = (
@@ -145,15 +379,10 @@ def collect_user_info(state: Dict[str, Any]) -> Dict[str, Any]:
     )
 
     try:
-        # Call the agent
-        response = user_info_agent.invoke({
-            "messages": [{"role": "user", "content": prompt}]
-        })
+        # Call the agent, then parse and extract JSON using json-repair
+        result = yield prompt
     except Exception:
-        return recipe_state.model_dump()
-
-    # Parse and extract JSON using json-repair
-    result = parse_agent_json(response)
+        return updates
     
     # Set default empty structure if parsing failed
     if not result or not isinstance(result, dict):
@@ -164,62 +393,55 @@ def collect_user_info(state: Dict[str, Any]) -> Dict[str, Any]:
         new_ingredients = [ing for ing in result["ingredients"] if ing]
         if new_ingredients:
             logger.info(f"First pass extracted ingredients: {new_ingredients}")
-            recipe_state.ingredients = new_ingredients
+            updates["ingredients"] = new_ingredients
 
     # Process preferences - handle carefully with null checking
     prefs = result.get("preferences", {}) or {}
     if prefs and isinstance(prefs, dict):
-        if prefs.get("diet") not in (None, "null", ""):
-            recipe_state.preferences.diet = prefs["diet"]
-            
-        if prefs.get("allergies") and isinstance(prefs["allergies"], list):
-            new_allergies = [a for a in prefs["allergies"] if a not in (None, "null", "")]
-            recipe_state.preferences.allergies += new_allergies
-            
-        if prefs.get("cuisine") not in (None, "null", ""):
-            recipe_state.preferences.cuisine = prefs["cuisine"]
-            
-        if prefs.get("prep_time") not in (None, "null", ""):
-            recipe_state.preferences.prep_time = prefs["prep_time"]
-            
-        if prefs.get("craving") not in (None, "null", ""):
-            recipe_state.preferences.craving = prefs["craving"]
+        updates["preferences"] = merge_extracted_preferences(recipe_state.preferences, prefs)
 
     # Increment loop counter
-    recipe_state.iterations += 1
+    updates["iterations"] = recipe_state.iterations + 1
     
-    return recipe_state.model_dump()
+    return updates
+
 
+def find_recipes(state: Any) -> Dict[str, Any]:
+    return _run_flow(_find_recipes_flow(state), run_recipe_agent)
 
-def find_recipes(state: Dict[str, Any]) -> Dict[str, Any]:
-    recipe_state = RecipeState.model_validate(state)
+
+async def afind_recipes(state: Any) -> Dict[str, Any]:
+    return await _arun_flow(_find_recipes_flow(state), arun_recipe_agent)
+
+
+def _find_recipes_flow(state: Any) -> Generator[str, Any, Dict[str, Any]]:
+    recipe_state = as_recipe_state(state)
+    updates: Dict[str, Any] = {}
     logger.info(f"Finding recipes with: {recipe_state.ingredients}")
 
     # If we previously paused but now have ingredients, we can clear the flag
     if recipe_state.force_pause and recipe_state.ingredients:
         logger.info("Clearing pause flag - ingredients available")
-        recipe_state.force_pause = False
+        updates["force_pause"] = False
 
     # If we're waiting for user input and don't have ingredients, don't process yet
     if recipe_state.force_pause and not recipe_state.ingredients:
         logger.info("Paused - waiting for user ingredients")
-        return recipe_state.model_dump()
+        return updates
 
     # Safety check - ensure we have ingredients
     if not recipe_state.ingredients:
         logger.info("No ingredients available, requesting user input")
-        recipe_state.recipes = []
+        updates["recipes"] = []
         
         # Add a message to the state asking for specific ingredients
-        messages = getattr(recipe_state, "messages", []) or []
-        messages.append({
+        updates["messages"] = [{
             "role": "assistant", 
             "content": "I need specific ingredients to suggest recipes. Please tell me what ingredients you have available in your kitchen, and I'll find perfect recipes for you. For example: 'I have chicken, potatoes, and carrots.'"
-        })
-        recipe_state.messages = messages
-        recipe_state.force_pause = True
+        }]
+        updates["force_pause"] = True
         
-        return recipe_state.model_dump()
+        return updates
 
     # Construct a natural language prompt using the state
     prompt = (
@@ -233,14 +455,21 @@ def find_recipes(state: Dict[str, Any]) -> Dict[str, Any]:
 
     try:
         # Use proper chat-style input for create_react_agent
-        response = recipe_agent.invoke({
-            "messages": [
-                {"role": "user", "content": prompt}
-            ]
-        })
+        emit_status(f"Finding recipes with {', '.join(recipe_state.ingredients)}…")
+        response = yield prompt
         
-        # Parse and extract recipes using json-repair
-        recipes_data = parse_agent_json(response)
+        budget = response.get("budget") if isinstance(response, dict) else None
+        if budget is not None:
+            updates["agent_budget"] = budget
+
+        if budget and budget["stopped"]:
+            # Out of budget before a final answer: go with what the run found so far
+            recipes_data = partial_recipes(response.get("messages", []))
+            logger.info(f"Using {len(recipes_data)} partial recipes")
+        else:
+            # Structured output is already validated; otherwise parse (and repair) the agent's text
+            structured = structured_result(response, RecipeList)
+            recipes_data = structured["recipes"] if structured is not None else parse_recipes(response)
         
         # Ensure the recipes are a list
         if not isinstance(recipes_data, list):
@@ -263,7 +492,6 @@ def find_recipes(state: Dict[str, Any]) -> Dict[str, Any]:
                 "image_url": recipe.get("image_url", ""),
                 "ingredients": recipe.get("ingredients", []),
                 "instructions": recipe.get("instructions", []),
-                "grocery_list": recipe.get("grocery_list", []),
                 "calories": recipe.get("calories", None)
             }
             
@@ -273,9 +501,6 @@ def find_recipes(state: Dict[str, Any]) -> Dict[str, Any]:
                 
             if not isinstance(formatted_recipe["instructions"], list):
                 formatted_recipe["instructions"] = [str(formatted_recipe["instructions"])]
-                
-            if not isinstance(formatted_recipe["grocery_list"], list):
-                formatted_recipe["grocery_list"] = [str(formatted_recipe["grocery_list"])]
             
             # Add any additional fields from the original recipe
             for key, value in recipe.items():
@@ -284,20 +509,38 @@ def find_recipes(state: Dict[str, Any]) -> Dict[str, Any]:
                     
             formatted_recipes.append(formatted_recipe)
             
+        # Several sources can return the same dish; keep the best distinct matches
+        formatted_recipes = rank_recipes(formatted_recipes, recipe_state.ingredients,
+                                         recipe_state.preferences.prep_time)
+
+        # What to buy is worked out here rather than by the model: whatever isn't in the pantry
+        pantry = pantry_set(recipe_state.ingredients)
+        for formatted_recipe in formatted_recipes:
+            formatted_recipe["grocery_list"] = recipe_grocery_list(formatted_recipe["ingredients"], pantry)
+        updates["grocery_list"] = shopping_list(formatted_recipes, pantry)
+
+        # Calories from the bundled nutrient table; the model's guess stays only when too few ingredients are known
+        nutrition = estimate_nutrition(formatted_recipes)
+        for formatted_recipe, estimate in zip(formatted_recipes, nutrition):
+            formatted_recipe["nutrition"] = estimate
+            if estimate["coverage"] >= MIN_COVERAGE:
+                formatted_recipe["calories"] = estimate["calories"]
+        updates["calories"] = {r["title"]: r["nutrition"] for r in formatted_recipes}
+
         # Update the state with the formatted recipes
-        recipe_state.recipes = formatted_recipes
+        updates["recipes"] = formatted_recipes
         logger.info(f"Found {len(formatted_recipes)} recipes")
         
     except Exception:
         # Set empty recipes list if parsing failed
-        recipe_state.recipes = []
+        updates["recipes"] = []
         logger.info("Error finding recipes")
     
-    return recipe_state.model_dump()
+    return updates
 
 
-def should_continue_collecting(state: Dict[str, Any]) -> str:
-    recipe_state = RecipeState.model_validate(state)
+def should_continue_collecting(state: Any) -> str:
+    recipe_state = as_recipe_state(state)
     iterations = recipe_state.iterations
     ingredients = recipe_state.ingredients
     force_pause = recipe_state.force_pause
@@ -324,13 +567,21 @@ def should_continue_collecting(state: Dict[str, Any]) -> str:
     return "incomplete"
    
 
-def build_recipe_graph():
-    """Builds the recipe graph using a custom router node."""
+def build_recipe_graph(checkpointer: Optional["BaseCheckpointSaver"] = None):
+    """
+    Builds the recipe graph using a custom router node.
+    With a checkpointer, state is stored per configurable thread_id and each run only
+    needs the new input (e.g. {"messages": [new user message]}).
+    """
+    from langchain_core.runnables import RunnableLambda
+    from langgraph.graph import StateGraph, END
+    from Controller.metrics_callback import metrics_callback
+
     workflow = StateGraph(RecipeState)
 
-    # Add main function nodes
-    workflow.add_node("collect_user_info", collect_user_info)
-    workflow.add_node("find_recipes", find_recipes)
+    # Add main function nodes; graph.invoke runs the sync versions, graph.ainvoke/astream the async ones
+    workflow.add_node("collect_user_info", RunnableLambda(collect_user_info, afunc=acollect_user_info))
+    workflow.add_node("find_recipes", RunnableLambda(find_recipes, afunc=afind_recipes))
 
     # Add the routing logic
     workflow.add_conditional_edges(
@@ -346,47 +597,46 @@ def build_recipe_graph():
     workflow.set_entry_point("collect_user_info")
     
     logger.info("Recipe graph built and compiled")
-    return workflow.compile()
+    # Spans for every node, agent step, tool and LLM call made during a run
+    return workflow.compile(checkpointer=checkpointer).with_config(run_name="recipe_graph", callbacks=[metrics_callback])
+
+def structured_result(response: Any, schema: Type[BaseModel]) -> Optional[Dict[str, Any]]:
+    """
+    The agent's final answer validated against `schema` as plain data, in STRUCTURED_OUTPUT
+    mode (where that answer is schema-constrained); None otherwise or if it doesn't validate.
+    """
+    if not STRUCTURED_OUTPUT:
+        return None
+    try:
+        return schema.model_validate_json(response_text(response)).model_dump()
+    except ValidationError:
+        logger.info("Structured agent answer did not validate, parsing leniently")
+        return None
+
+def parse_recipes(response: Any) -> List[Dict]:
+    """
+    Every recipe in the recipe agent's answer: a list of recipes, {"recipes": [...]} or a
+    single recipe. All of them are returned, so ranking sees each source's candidates.
+    """
+    result = extract_json(response_text(response))
+    if isinstance(result, dict):
+        result = result.get("recipes") if isinstance(result.get("recipes"), list) else [result]
+    if not isinstance(result, list):
+        logger.info("No recipe JSON found in agent response")
+        return []
+    return [recipe for recipe in result if isinstance(recipe, dict)]
+
 
 def parse_agent_json(response: Any) -> Dict:
     """
-    Extract and repair JSON from an agent response using json-repair.
+    Extract JSON from an agent response, repairing it with json-repair only when needed.
     Handles various agent response formats and returns a parsed dictionary.
     """
     try:
-        # First, extract the text content from different response formats
-        if isinstance(response, dict) and "messages" in response:
-            # Extract from LangChain message format
-            messages = response.get("messages", [])
-            content = ""
-            for msg in reversed(messages):
-                if hasattr(msg, 'content') and msg.content:
-                    content = msg.content.strip()
-                    break
-        elif isinstance(response, str):
-            content = response.strip()
-        else:
-            # Get content from other formats
-            content = getattr(response, "content", str(response)).strip()
-            
-        # Clean up markdown code blocks
-        if "```" in content:
-            parts = content.split("```")
-            # Look for code block content
-            for part in parts:
-                if part.strip() and not part.strip().startswith("json"):
-                    content = part.strip()
-                    break
-        
-        # Extract only the JSON part if there's explanatory text
-        import re
-        json_match = re.search(r'(\[.*\]|\{.*\})', content, re.DOTALL)
-        if json_match:
-            content = json_match.group(1)
-                    
-        # Try to repair and parse the JSON
-        repaired_json = repair_json(content)
-        result = json.loads(repaired_json)
+        # One pass over the text finds tagged, fenced or bare JSON; repair only runs if none parses
+        result = extract_json(response_text(response))
+        if result is None:
+            raise ValueError("No JSON found in agent response")
         
         # If result is a list (like in the error case we saw or direct ingredients array), handle it
         if isinstance(result, list):
@@ -399,8 +649,9 @@ def parse_agent_json(response: Any) -> Dict:
                 result = result[0]
             
         # Ensure we're not including ingredients that haven't been explicitly mentioned
-        # by checking if the result has an unreasonably large number of ingredients
-        if isinstance(result, dict) and "ingredients" in result:
+        # by checking if the result has an unreasonably large number of ingredients.
+        # Only for extracted user ingredients: a recipe's own list is often longer.
+        if isinstance(result, dict) and "ingredients" in result and "title" not in result:
             ingredients = result.get("ingredients", [])
             if (isinstance(ingredients, list) and len(ingredients) > 10) or not isinstance(ingredients, list):
                 # Too many ingredients - likely includes suggestions rather than explicit mentions
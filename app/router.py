@@ -1,13 +1,13 @@
 # router.py
-from typing import Dict, Any
-from state import RecipeState
+from typing import Any
+from state import as_recipe_state
 import logging
 
 # Get logger
 logger = logging.getLogger("recipe_finder")
 
-def is_user_info_complete(state: Dict[str, Any]) -> str:
-    recipe_state = RecipeState.model_validate(state)
+def is_user_info_complete(state: Any) -> str:
+    recipe_state = as_recipe_state(state)
     
     # Safely check if we have valid ingredients
     has_ingredients = bool(
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, validator
-from typing import List, Dict, Optional, Any
+from typing import Annotated, List, Dict, Optional, Any
+import operator
 from datetime import datetime
 
 class Preferences(BaseModel):
@@ -39,22 +40,53 @@ class Recipe(BaseModel):
     image_url: Optional[str] = Field(default=None, description="URL to recipe image")
     ingredients: List[str] = Field(default_factory=list, description="List of ingredients with quantities")
     instructions: List[str] = Field(default_factory=list, description="Step-by-step cooking instructions")
-    grocery_list: List[str] = Field(default_factory=list, description="Additional items needed")
     calories: Optional[int] = Field(default=None, description="Calorie count")
+    servings: Optional[int] = Field(default=None, description="Number of servings the recipe makes")
     
     class Config:
         """Allow extra fields for flexibility."""
         extra = "allow"
 
+class RecipeList(BaseModel):
+    """Recipe agent output in structured output mode."""
+    recipes: List[Recipe] = Field(default_factory=list, description="Recipes matching the user's request")
+
+class ExtractionResult(BaseModel):
+    """Ingredient and preference extraction output in structured output mode."""
+    ingredients: List[str] = Field(
+        default_factory=list,
+        description="Ingredients the user explicitly mentioned"
+    )
+    preferences: Preferences = Field(
+        default_factory=Preferences,
+        description="User preferences mentioned in the conversation"
+    )
+
+class ConversationSummary(BaseModel):
+    """Rolling summary of the messages that have left the verbatim context window."""
+    folded: int = Field(default=0, description="Number of leading messages already folded in")
+    ingredients: List[str] = Field(default_factory=list, description="Most recent ingredients mentioned")
+    diet: Optional[str] = Field(default=None, description="Latest diet mentioned")
+    allergies: List[str] = Field(default_factory=list, description="Every allergy mentioned")
+    cuisine: Optional[str] = Field(default=None, description="Latest cuisine mentioned")
+    prep_time: Optional[str] = Field(default=None, description="Latest time limit in minutes")
+    craving: Optional[str] = Field(default=None, description="Latest craving mentioned")
+    notes: List[str] = Field(default_factory=list, description="Shortened user messages, oldest first")
+
 class RecipeState(BaseModel):
     """Main state for the recipe finding workflow."""
     iterations: int = Field(default=0, description="Number of user info collection attempts")
     force_pause: bool = Field(default=False, description="Flag to force waiting for user input")
 
-    messages: List[Dict[str, str]] = Field(
+    # Nodes return only the new messages; the reducer appends them
+    messages: Annotated[List[Dict[str, str]], operator.add] = Field(
         default_factory=list,
         description="Conversation history as list of {'role': ..., 'content': ...}"
     )
+    context_summary: ConversationSummary = Field(
+        default_factory=ConversationSummary,
+        description="Summary of older messages used in place of the full history in prompts"
+    )
     ingredients: List[str] = Field(
         default_factory=list,
         description="Available ingredients"
@@ -73,7 +105,11 @@ class RecipeState(BaseModel):
     )
     calories: Dict = Field(
         default_factory=dict,
-        description="Calorie information for recipes"
+        description="Estimated calories and macros per recipe title"
+    )
+    agent_budget: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Recipe agent budget use in the last search, and which limit stopped it (None if it finished)"
     )
     steps: List[str] = Field(
         default_factory=list,
@@ -101,5 +137,11 @@ class RecipeState(BaseModel):
             }
         }
 
+def as_recipe_state(state: Any) -> RecipeState:
+    """Graph nodes already receive a RecipeState; only plain dicts need validating."""
+    if isinstance(state, RecipeState):
+        return state
+    return RecipeState.model_validate(state)
+
 # Create initial state
 initial_state = RecipeState(messages=[])
\ No newline at end of file
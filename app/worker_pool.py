@@ -0,0 +1,176 @@
+# app/worker_pool.py
+import asyncio
+import inspect
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+# Get logger
+logger = logging.getLogger("recipe_finder")
+
+# Handlers a worker will run, all defined in gradio_app
+WORKER_OPS = ("stream_graph", "finish_turn")
+# Bookkeeping for a turn that was already let in; never turned away at queue depth
+ADMITTED_OPS = ("finish_turn",)
+# How often a waiting turn checks that its worker is still alive
+LIVENESS_POLL_SECONDS = 1.0
+
+
+class WorkerPoolBusy(Exception):
+    """The session's worker already has queue_depth turns in flight."""
+
+
+class WorkerPool:
+    """
+    Runs graph turns in worker processes, each with its own warmed graph and agents.
+    A session always goes to the same worker (crc32 of its thread id), so in-process
+    state such as the memory checkpointer or warmed caches stays consistent.
+
+    Events come back as (kind, value) pairs from an async iterator, like stream_graph.
+    """
+
+    def __init__(self, workers: int, queue_depth: int):
+        self._ctx = multiprocessing.get_context("spawn")
+        self.queue_depth = queue_depth
+        self._responses = self._ctx.Queue()
+        self._requests: List["multiprocessing.Queue"] = [None] * workers
+        self._processes: List[multiprocessing.Process] = [None] * workers
+        self._inflight = [0] * workers
+        self._jobs: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = {}
+        self._lock = threading.Lock()
+        for i in range(workers):
+            self._start_worker(i)
+        threading.Thread(target=self._dispatch, name="recipe-worker-results", daemon=True).start()
+        logger.info(f"Started {workers} graph workers (queue depth {queue_depth})")
+
+    def _start_worker(self, index: int) -> None:
+        # A fresh request queue, since a worker that died mid-read can leave the old one locked
+        self._requests[index] = self._ctx.Queue()
+        self._processes[index] = self._ctx.Process(
+            target=_worker_main, args=(index, self._requests[index], self._responses),
+            name=f"recipe-worker-{index}", daemon=True)
+        self._processes[index].start()
+
+    def _restart_if_dead(self, index: int, process: multiprocessing.Process) -> None:
+        with self._lock:
+            # Only the first turn to notice replaces the worker
+            if self._processes[index] is process:
+                logger.info(f"Worker {index} died (exit code {process.exitcode}); restarting it")
+                self._start_worker(index)
+
+    def worker_for(self, session_id: str) -> int:
+        return zlib.crc32(session_id.encode("utf-8")) % len(self._processes)
+
+    def _dispatch(self) -> None:
+        # Route every worker event to the event loop of the call waiting for it
+        while True:
+            job_id, kind, value = self._responses.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+            if job is not None:
+                loop, events = job
+                loop.call_soon_threadsafe(events.put_nowait, (kind, value))
+
+    async def stream(self, session_id: str, op: str, *args: Any) -> AsyncIterator[Tuple[str, Any]]:
+        """Run gradio_app.<op>(*args) on the session's worker, yielding its events as they arrive."""
+        index = self.worker_for(session_id)
+        job_id = uuid.uuid4().hex
+        events: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            if op not in ADMITTED_OPS and self._inflight[index] >= self.queue_depth:
+                raise WorkerPoolBusy(f"worker {index} has {self.queue_depth} turns in flight")
+            self._inflight[index] += 1
+            self._jobs[job_id] = (asyncio.get_running_loop(), events)
+            process, requests = self._processes[index], self._requests[index]
+        try:
+            requests.put((job_id, op, args))
+            while True:
+                try:
+                    kind, value = await asyncio.wait_for(events.get(), LIVENESS_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    if process.is_alive():
+                        continue
+                    # The turn died with its worker; fail it and give the session a new worker
+                    self._restart_if_dead(index, process)
+                    raise RuntimeError(f"worker {index} exited while running {op}")
+                if kind == "done":
+                    return
+                if kind == "error":
+                    raise RuntimeError(f"{op} failed in worker {index}: {value}")
+                yield kind, value
+        finally:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+                self._inflight[index] -= 1
+
+    def close(self) -> None:
+        for requests in self._requests:
+            requests.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+
+
+def _worker_main(index: int, requests: "multiprocessing.Queue", responses: "multiprocessing.Queue") -> None:
+    logging.basicConfig(level=logging.INFO, format=f'%(asctime)s - [worker {index}] %(message)s', datefmt='%H:%M:%S',
+                        force=True)
+    import gradio_app
+    from agent.recipe_agent import get_recipe_agent
+    from agent.user_info_agent import get_user_info_agent
+    from Controller.metrics import METRICS_PORT, start_metrics_server
+
+    # Warm everything a first turn would otherwise pay for
+    gradio_app.get_graph()
+    get_recipe_agent()
+    get_user_info_agent()
+    # Spans are recorded where the graph runs, so each worker serves its own metrics
+    if METRICS_PORT:
+        start_metrics_server(int(METRICS_PORT) + 1 + index)
+    logger.info(f"Worker {index} ready (pid {os.getpid()})")
+    asyncio.run(_serve(gradio_app, requests, responses))
+
+
+async def _serve(handlers: Any, requests: "multiprocessing.Queue", responses: "multiprocessing.Queue") -> None:
+    tasks: List[asyncio.Task] = []
+    while True:
+        job = await asyncio.to_thread(requests.get)
+        if job is None:
+            break
+        # Turns on one worker share its event loop, like they would in a single-process server
+        tasks.append(asyncio.create_task(_run_job(handlers, responses, *job)))
+        tasks = [t for t in tasks if not t.done()]
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _run_job(handlers: Any, responses: "multiprocessing.Queue", job_id: str, op: str, args: tuple) -> None:
+    try:
+        if op not in WORKER_OPS:
+            raise ValueError(f"unknown op {op!r}")
+        handler = getattr(handlers, op)
+        if inspect.isasyncgenfunction(handler):
+            async for kind, value in handler(*args):
+                responses.put((job_id, kind, value))
+        else:
+            responses.put((job_id, "result", await handler(*args)))
+    except Exception as e:
+        responses.put((job_id, "error", f"{type(e).__name__}: {e}"))
+    finally:
+        responses.put((job_id, "done", None))
+
+
+_pool: Optional[WorkerPool] = None
+
+
+def start_worker_pool(workers: int, queue_depth: int) -> Optional[WorkerPool]:
+    """Start the process-wide pool; one worker means running turns in this process instead."""
+    global _pool
+    if workers > 1 and _pool is None:
+        _pool = WorkerPool(workers, queue_depth)
+    return _pool
+
+
+def get_worker_pool() -> Optional[WorkerPool]:
+    return _pool
@@ -0,0 +1,10 @@
+"""
+Offline benchmarks. Standalone scripts run as `python benchmarks/bench_<name>.py`;
+the component suite runs as `python -m benchmarks.bench_components`.
+"""
+import os
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+if APP_DIR not in sys.path:
+    sys.path.append(APP_DIR)
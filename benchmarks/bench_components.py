@@ -0,0 +1,189 @@
+"""
+Per-component timings of the chat hot path, fully offline.
+
+Agents run on a fake chat model replaying canned ReAct traces; Spoonacular, Tavily and
+OpenRouter are served by a local stub (see benchmarks/stubs.py). Tool and LLM caches are
+cleared before every run so each one does the same work.
+
+Components: parsing, state validation, node execution, direct recipe lookup, candidate ranking,
+nutrition estimates, rendering and the full graph.invoke.
+Results are JSON; pass --compare with an earlier --output file to get per-component ratios.
+
+Usage:
+    python -m benchmarks.bench_components [--runs 50] [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import time
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.stubs import CANNED_RECIPES, configure_offline, recipe_trace, user_info_trace
+
+configure_offline()
+
+# App imports must come after configure_offline() so the agents pick up the fake model
+from Controller.json_extract import extract_json  # noqa: E402
+from Controller.llm_cache import llm_cache  # noqa: E402
+from Controller.nutrition import estimate_nutrition  # noqa: E402
+from Controller.ranking import rank_recipes  # noqa: E402
+from Controller.recipe_controller import get_recipe, get_recipe_async  # noqa: E402
+from agent.tools.spoonacular_tool import spoonacular_cache  # noqa: E402
+import graph as recipe_graph  # noqa: E402
+import gradio_app  # noqa: E402
+from state import RecipeState  # noqa: E402
+
+FAST_PATH_MESSAGE = "I have chicken, rice and garlic"
+AGENT_MESSAGE = "Hmm, what could I make tonight with the chicken and rice from yesterday? Something spicy."
+
+
+def conversation(length: int, last_message: str) -> List[Dict[str, str]]:
+    messages = []
+    for i in range(length - 1):
+        role = "user" if i % 2 == 0 else "assistant"
+        messages.append({"role": role, "content": f"Message {i} about what to cook for dinner this week."})
+    messages.append({"role": "user", "content": last_message})
+    return messages
+
+
+def candidates(count: int) -> List[Dict[str, object]]:
+    """Distinct dishes as several sources would return them, every other one a reworded copy of the last."""
+    pantry = ["chicken", "rice", "garlic", "onion", "carrot", "peas", "spinach", "mushroom", "ginger", "chili",
+              "tofu", "noodles", "basil", "tomato", "potato", "beef", "egg", "cheese", "lemon", "broccoli"]
+    styles = ["Stir Fry", "Curry", "Soup", "Bake", "Salad", "Skillet", "Bowl", "Stew"]
+    recipes: List[Dict[str, object]] = []
+    for i in range(count):
+        if i % 2:
+            copy = dict(recipes[-1])
+            copy["title"] = f"Easy {copy['title']}"
+            copy["ingredients"] = [line.split(" ", 1)[-1] for line in copy["ingredients"]]
+            recipes.append(copy)
+            continue
+        dish = i // 2
+        picked = random.Random(dish).sample(pantry, 5)
+        recipes.append({
+            "title": f"{picked[0].title()} and {picked[1].title()} {styles[dish % len(styles)]}",
+            "ingredients": [f"{k + 1} cups {name}" for k, name in enumerate(picked)],
+            "ready_in_minutes": 15 + dish % 40,
+        })
+    return recipes
+
+
+def clear_caches() -> None:
+    llm_cache.clear()
+    spoonacular_cache.clear()
+
+
+def time_component(name: str, fn: Callable[[], object], runs: int,
+                   setup: Optional[Callable[[], None]] = None) -> Dict[str, object]:
+    samples = []
+    for _ in range(runs):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "name": name,
+        "runs": runs,
+        "mean_ms": round(statistics.mean(samples), 4),
+        "p50_ms": round(samples[len(samples) // 2], 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+    }
+
+
+def run_suite(runs: int) -> List[Dict[str, object]]:
+    recipe_text = recipe_trace()[-1].content
+    tagged_text = user_info_trace()[-1].content
+    recipe_response = {"messages": recipe_trace()}
+
+    short_state = RecipeState(messages=conversation(4, FAST_PATH_MESSAGE))
+    long_state = RecipeState(messages=conversation(200, FAST_PATH_MESSAGE))
+    agent_state = RecipeState(messages=conversation(4, AGENT_MESSAGE))
+    ready_state = RecipeState(messages=conversation(4, FAST_PATH_MESSAGE), ingredients=["chicken", "rice", "garlic"])
+    long_state_dict = long_state.model_dump()
+    final_state = ready_state.model_dump()
+    final_state["recipes"] = CANNED_RECIPES
+    ranking_candidates = candidates(300)
+    lookup_prefs = {"ingredients": ["chicken", "rice", "garlic"], "prep_time": "30"}
+    # One loop for every run, as in the server, so its connection pool is reused
+    lookup_loop = asyncio.new_event_loop()
+
+    graph = recipe_graph.build_recipe_graph()
+    config = {"recursion_limit": 5}
+
+    def render():
+        text = gradio_app.format_extracted_info(final_state)
+        for i, recipe in enumerate(final_state["recipes"]):
+            text += gradio_app.format_recipe(i, recipe)
+        return text
+
+    return [
+        time_component("parse.extract_json.fenced", lambda: extract_json(recipe_text), runs),
+        time_component("parse.extract_json.tagged", lambda: extract_json(tagged_text), runs),
+        time_component("parse.parse_recipes", lambda: recipe_graph.parse_recipes(recipe_response), runs),
+        time_component("state.validate_200_messages", lambda: RecipeState.model_validate(long_state_dict), runs),
+        time_component("state.dump_200_messages", lambda: long_state.model_dump(), runs),
+        time_component("node.collect_user_info.fast_path", lambda: recipe_graph.collect_user_info(short_state), runs,
+                       setup=clear_caches),
+        time_component("node.collect_user_info.agent", lambda: recipe_graph.collect_user_info(agent_state), runs,
+                       setup=clear_caches),
+        time_component("node.find_recipes", lambda: recipe_graph.find_recipes(ready_state), runs, setup=clear_caches),
+        time_component("lookup.get_recipe", lambda: get_recipe(lookup_prefs), runs, setup=clear_caches),
+        time_component("lookup.get_recipe_async",
+                       lambda: lookup_loop.run_until_complete(get_recipe_async(lookup_prefs)), runs,
+                       setup=clear_caches),
+        time_component("rank.dedup_300_candidates",
+                       lambda: rank_recipes(ranking_candidates, ["chicken", "rice", "garlic"], "30"), runs),
+        time_component("nutrition.estimate_20_recipes", lambda: estimate_nutrition(ranking_candidates[:20]), runs),
+        time_component("render.recipes", render, runs),
+        time_component("graph.invoke.short", lambda: graph.invoke(short_state, config=config), runs,
+                       setup=clear_caches),
+        time_component("graph.invoke.200_messages", lambda: graph.invoke(long_state, config=config), runs,
+                       setup=clear_caches),
+    ]
+
+
+def compare(results: List[Dict[str, object]], baseline_path: str) -> None:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    for result in results:
+        before = baseline.get(result["name"])
+        if before and before["mean_ms"]:
+            result["baseline_mean_ms"] = before["mean_ms"]
+            result["ratio"] = round(result["mean_ms"] / before["mean_ms"], 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--output", help="Also write the results to this file")
+    parser.add_argument("--compare", help="Earlier --output file to compare against")
+    args = parser.parse_args()
+
+    results = run_suite(args.runs)
+    if args.compare:
+        compare(results, args.compare)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Cold vs warm HTTP call latency against a local stub server.
+
+"cold" opens a fresh connection per call (module-level requests.get, as the tools did before);
+"warm" reuses the keep-alive pool from Controller.http_client.
+
+Usage:
+    python benchmarks/bench_http_client.py [--calls 200] [--delay-ms 0]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+import requests  # noqa: E402
+from Controller import http_client  # noqa: E402
+
+PAYLOAD = json.dumps({"results": [{"title": "Stub Chicken Rice Bowl"}]}).encode("utf-8")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    delay = 0.0
+
+    def do_GET(self):
+        if self.delay:
+            time.sleep(self.delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(delay: float = 0.0):
+    StubHandler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/recipes/complexSearch"
+
+
+def time_calls(fn, url: str, calls: int):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        response = fn(url, params={"includeIngredients": "chicken,rice"})
+        _ = response.content
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(name: str, samples):
+    samples = sorted(samples)
+    return {
+        "name": name,
+        "calls": len(samples),
+        "mean_ms": round(statistics.mean(samples), 3),
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="Server-side delay per request")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.delay_ms / 1000)
+    try:
+        cold = time_calls(lambda u, params: requests.get(u, params=params, timeout=5), url, args.calls)
+        warm = time_calls(http_client.get, url, args.calls)
+    finally:
+        http_client.close_sessions()
+        server.shutdown()
+
+    results = [summarize("cold", cold), summarize("warm", warm)]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+JSON extraction from large agent outputs: the old ad-hoc extractors vs Controller.json_extract.
+
+"legacy" is what graph.parse_agent_json did before (greedy regex, then repair_json on every
+response); "scanner" is extract_json. Each case is an ~100 KB response with the JSON bare,
+fenced, tagged or truncated, surrounded by prose.
+
+Usage:
+    python benchmarks/bench_json_extract.py [--size-kb 100] [--runs 20]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from json_repair import repair_json  # noqa: E402
+from Controller.json_extract import extract_json  # noqa: E402
+
+PROSE = "Here are a few ideas based on what you told me [see notes below]. Enjoy cooking! "
+
+
+def recipes_json(size: int) -> str:
+    recipes = []
+    while len(json.dumps(recipes, indent=2)) < size:
+        i = len(recipes)
+        recipes.append({
+            "title": f"Recipe {i} with {{braces}} and \"quotes\"",
+            "ingredients": ["chicken", "rice", "garlic", "onion"],
+            "instructions": [f"Step {n}: stir [gently] for {n} minutes." for n in range(6)],
+            "calories": 400 + i,
+        })
+    return json.dumps(recipes, indent=2)
+
+
+def cases(size: int):
+    prose = PROSE * 10
+    body = recipes_json(size - 2 * len(prose))
+    return body, {
+        "bare": prose + body + prose,
+        "fenced": prose + "```json\n" + body + "\n```\n" + prose,
+        "tagged": prose + "<structured_data>" + body + "</structured_data>",
+        "truncated": prose + body[: len(body) * 9 // 10],
+    }
+
+
+def legacy_extract(content: str):
+    if "```" in content:
+        for part in content.split("```"):
+            if part.strip() and not part.strip().startswith("json"):
+                content = part.strip()
+                break
+    match = re.search(r'(\[.*\]|\{.*\})', content, re.DOTALL)
+    if match:
+        content = match.group(1)
+    try:
+        return json.loads(repair_json(content))
+    except Exception:
+        return None
+
+
+def _recovered(result, expected, case: str) -> bool:
+    if case == "truncated":
+        return isinstance(result, list) and bool(result) and result[0] == expected[0]
+    return result == expected
+
+
+def time_fn(fn, text: str, runs: int):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(text)
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.mean(samples), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-kb", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    body, texts = cases(args.size_kb * 1024)
+    expected = json.loads(body)
+    results = []
+    for name, text in texts.items():
+        results.append({
+            "case": name,
+            "bytes": len(text),
+            "legacy_ms": time_fn(legacy_extract, text, args.runs),
+            "scanner_ms": time_fn(extract_json, text, args.runs),
+            # Truncated output can only be recovered partially; count any non-empty list
+            "legacy_ok": _recovered(legacy_extract(text), expected, name),
+            "scanner_ok": _recovered(extract_json(text), expected, name),
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Query latency of the local recipe index on a synthetic corpus.
+
+Usage:
+    python benchmarks/bench_recipe_index.py [--recipes 100000] [--queries 2000]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from Controller.recipe_index import RecipeIndex  # noqa: E402
+
+PANTRY = [
+    "chicken", "rice", "eggs", "cheese", "potato", "onion", "garlic", "tomato", "pasta", "beef",
+    "pork", "shrimp", "salmon", "tofu", "spinach", "mushroom", "bell pepper", "carrot", "broccoli",
+    "butter", "milk", "flour", "sugar", "lemon", "lime", "cilantro", "basil", "ginger", "soy sauce",
+    "olive oil", "bacon", "beans", "corn", "cucumber", "zucchini", "chickpeas", "yogurt", "bread",
+]
+DIETS = ["vegetarian", "vegan", "gluten free", "ketogenic", "paleo"]
+CUISINES = ["italian", "mexican", "chinese", "indian", "thai", "american", "french"]
+
+
+def synthetic_corpus(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    for i in range(n):
+        yield {
+            "title": f"Recipe {i}",
+            "ingredients": rng.sample(PANTRY, rng.randint(3, 12)),
+            "diets": rng.sample(DIETS, rng.randint(0, 2)),
+            "cuisine": rng.choice(CUISINES),
+            "prep_time": rng.choice([10, 15, 20, 25, 30, 45, 60, 90]),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = RecipeIndex(synthetic_corpus(args.recipes))
+    build_s = time.perf_counter() - start
+
+    rng = random.Random(11)
+    samples = []
+    for _ in range(args.queries):
+        query = rng.sample(PANTRY, rng.randint(1, 5))
+        cuisine = rng.choice([None, *CUISINES])
+        prep_time = rng.choice([None, "20", "30", "60"])
+        start = time.perf_counter()
+        index.search(query, cuisine=cuisine, prep_time=prep_time, limit=5)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    print(json.dumps({
+        "recipes": len(index),
+        "build_s": round(build_s, 3),
+        "queries": len(samples),
+        "mean_ms": round(statistics.mean(samples), 4),
+        "p50_ms": round(samples[len(samples) // 2], 4),
+        "p99_ms": round(samples[int(len(samples) * 0.99)], 4),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
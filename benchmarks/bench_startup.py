@@ -0,0 +1,105 @@
+"""
+Cold-start cost of the app's entry modules, each measured in a fresh interpreter.
+
+For every module: wall time of `python -c "import <module>"`, the module's cumulative time
+from `python -X importtime`, and the heaviest top-level imports it pulled in. The last rows
+time what is now deferred to first use: compiling the graph and building both agents.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--top 8]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+MODULES = ["state", "graph", "gradio_app"]
+
+FIRST_USE = """
+import time
+start = time.perf_counter()
+import graph
+imported = time.perf_counter()
+graph.build_recipe_graph()
+built = time.perf_counter()
+graph.get_recipe_agent()
+graph.get_user_info_agent()
+agents = time.perf_counter()
+print((imported - start) * 1000, (built - imported) * 1000, (agents - built) * 1000)
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    # Building the chat models needs a key; nothing is sent
+    env.setdefault("OPENROUTER_API_KEY", "benchmark")
+    return env
+
+
+def _python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=APP_DIR, env=_env(), capture_output=True, text=True, check=True)
+
+
+def import_wall_ms(module: str) -> float:
+    start = time.perf_counter()
+    _python("-c", f"import {module}")
+    return (time.perf_counter() - start) * 1000
+
+
+def import_profile(module: str, top: int):
+    """(cumulative ms of `module`, heaviest direct imports) from -X importtime."""
+    lines = _python("-X", "importtime", "-c", f"import {module}").stderr.splitlines()
+    rows = []
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        # importtime indents nested imports by two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(cumulative) / 1000, depth))
+    # Children are printed before their parent, so collect depth-1 rows until the module's own row
+    total, children, heaviest = None, [], []
+    for name, ms, depth in rows:
+        if depth == 1:
+            children.append((name, ms))
+        elif depth == 0:
+            if name == module:
+                total, heaviest = ms, sorted(children, key=lambda r: r[1], reverse=True)
+            children = []
+    return total, [{"module": name, "ms": round(ms, 1)} for name, ms in heaviest[:top]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    # One throwaway run so every row sees warm bytecode and OS file caches
+    _python("-c", "import gradio_app")
+
+    results = []
+    for module in MODULES:
+        samples = [import_wall_ms(module) for _ in range(args.runs)]
+        cumulative, heaviest = import_profile(module, args.top)
+        results.append({
+            "module": module,
+            "wall_ms": round(statistics.median(samples), 1),
+            "importtime_ms": round(cumulative, 1) if cumulative is not None else None,
+            "heaviest_imports": heaviest,
+        })
+
+    timings = [list(map(float, _python("-c", FIRST_USE).stdout.split())) for _ in range(args.runs)]
+    for i, name in enumerate(["import graph", "build_recipe_graph()", "build agents"]):
+        results.append({"first_use": name, "ms": round(statistics.median(t[i] for t in timings), 1)})
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Per-turn state overhead of the recipe graph as the conversation grows.
+
+The agents are replaced with canned responses so only graph bookkeeping is timed:
+"graph_ms" is one graph.invoke turn (fast-path ingredients, then find_recipes), and
+"roundtrip_ms" is what a single RecipeState.model_validate(...).model_dump() of the same
+state costs. The nodes used to do that round-trip at every node, router and in the chat
+handler (five times per turn); "legacy_extra_ms" is that total.
+
+Usage:
+    python benchmarks/bench_state_overhead.py [--turns 50] [--lengths 10,50,100,200,400,800]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+# The agents are never called, but building the chat models needs a key to be set
+os.environ.setdefault("OPENROUTER_API_KEY", "benchmark")
+
+import graph as recipe_graph  # noqa: E402
+from state import RecipeState  # noqa: E402
+
+LEGACY_ROUNDTRIPS_PER_TURN = 5
+
+CANNED_RECIPES = json.dumps([
+    {
+        "title": f"Garlic Chicken Rice {i}",
+        "ingredients": ["chicken", "rice", "garlic"],
+        "instructions": ["Cook the rice.", "Fry the chicken with garlic.", "Combine."],
+        "grocery_list": [],
+        "calories": 550,
+    }
+    for i in range(3)
+])
+
+
+class CannedMessage:
+    content = CANNED_RECIPES
+
+
+def canned_recipe_agent(prompt: str):
+    return {"messages": [CannedMessage()]}
+
+
+def conversation(length: int):
+    messages = []
+    for i in range(length - 1):
+        role = "user" if i % 2 == 0 else "assistant"
+        messages.append({"role": role, "content": f"Message {i}: something about dinner plans and what is in the fridge."})
+    messages.append({"role": "user", "content": "I have chicken, rice and garlic"})
+    return messages
+
+
+def timed(fn, turns: int):
+    samples = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.mean(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--lengths", default="10,50,100,200,400,800")
+    args = parser.parse_args()
+
+    recipe_graph.run_recipe_agent = canned_recipe_agent
+    graph = recipe_graph.build_recipe_graph()
+
+    results = []
+    for length in [int(n) for n in args.lengths.split(",")]:
+        state = RecipeState(messages=conversation(length))
+        state.recipes = [{"title": f"Old recipe {i}", "ingredients": ["x"] * 10} for i in range(5)]
+        state_dict = state.model_dump()
+
+        graph_ms = timed(lambda: graph.invoke(state, config={"recursion_limit": 5}), args.turns)
+        roundtrip_ms = timed(lambda: RecipeState.model_validate(state_dict).model_dump(), args.turns)
+        results.append({
+            "messages": length,
+            "graph_ms": round(graph_ms, 3),
+            "roundtrip_ms": round(roundtrip_ms, 3),
+            "legacy_extra_ms": round(roundtrip_ms * LEGACY_ROUNDTRIPS_PER_TURN, 3),
+        })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Offline stand-ins for everything the app talks to: a fake chat model that replays canned
+ReAct traces, and one local HTTP server answering as Spoonacular, Tavily and OpenRouter.
+
+configure_offline() must run before any app module that builds an agent is imported.
+"""
+import json
+import os
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Optional, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+CANNED_RECIPES = [
+    {
+        "title": "Garlic Chicken Fried Rice",
+        "image_url": "https://example.com/fried-rice.jpg",
+        "ingredients": ["2 chicken breasts", "2 cups cooked rice", "3 cloves garlic", "2 eggs", "2 tbsp soy sauce"],
+        "instructions": [
+            "Dice the chicken and mince the garlic.",
+            "Fry the chicken until golden, then add the garlic.",
+            "Push aside, scramble the eggs, then add the rice and soy sauce.",
+            "Toss everything together over high heat for 3 minutes.",
+        ],
+        "calories": 540,
+    },
+    {
+        "title": "Lemon Garlic Chicken with Rice",
+        "image_url": "",
+        "ingredients": ["2 chicken thighs", "1 cup rice", "1 lemon", "2 cloves garlic"],
+        "instructions": ["Cook the rice.", "Roast the chicken with lemon and garlic.", "Serve together."],
+        "calories": 610,
+    },
+]
+
+CANNED_PREFERENCES = {
+    "ingredients": ["chicken", "rice", "garlic"],
+    "preferences": {"diet": None, "allergies": [], "cuisine": None, "prep_time": "30", "craving": "spicy"},
+}
+
+SPOONACULAR_PAYLOAD = {"results": [{"id": i, "title": r["title"]} for i, r in enumerate(CANNED_RECIPES)]}
+TAVILY_PAYLOAD = {"results": [{"content": "Stir-fry over high heat so the rice crisps instead of steaming."}]}
+
+
+def _tool_call(name: str, args: dict) -> AIMessage:
+    return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": f"call_{uuid.uuid4().hex[:8]}"}])
+
+
+def recipe_trace(local_corpus: bool = False) -> List[AIMessage]:
+    """Local corpus (when the agent has it), then Spoonacular, then the final recipes as JSON."""
+    trace = [
+        _tool_call("spoonacular_search", {"ingredients": ["chicken", "rice", "garlic"], "prep_time": 30}),
+        AIMessage(content="Here are your recipes:\n```json\n" + json.dumps(CANNED_RECIPES, indent=2) + "\n```"),
+    ]
+    if local_corpus:
+        trace.insert(0, _tool_call("local_recipe_search", {"ingredients": ["chicken", "rice", "garlic"]}))
+    return trace
+
+
+def user_info_trace() -> List[AIMessage]:
+    """Preference extraction tool call, then a reply with tagged structured data."""
+    return [
+        _tool_call("extract_preferences_from_convo", {"conversation": "I have chicken, rice and garlic, something spicy"}),
+        AIMessage(content=(
+            "Chicken, rice and garlic make a great base for something spicy!\n"
+            f"<structured_data>{json.dumps(CANNED_PREFERENCES)}</structured_data>"
+        )),
+    ]
+
+
+class FakeReActChatModel(BaseChatModel):
+    """
+    Replays a canned ReAct trace. The step is the number of AI messages already in the
+    input, so concurrent runs don't interfere. bind_tools picks the trace for the agent.
+    """
+    tool_names: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-react"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "FakeReActChatModel":
+        names = [getattr(t, "name", None) or getattr(t, "__name__", "") for t in tools]
+        return self.model_copy(update={"tool_names": names})
+
+    def _trace(self) -> List[AIMessage]:
+        if "spoonacular_search" in self.tool_names:
+            return recipe_trace(local_corpus="local_recipe_search" in self.tool_names)
+        return user_info_trace()
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        trace = self._trace()
+        step = sum(isinstance(m, AIMessage) for m in messages)
+        message = trace[min(step, len(trace) - 1)]
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class StubAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    # Send headers and body in one segment; otherwise delayed ACKs add ~40 ms per call
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def _send_json(self, payload: Any) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/spoonacular/"):
+            self._send_json(SPOONACULAR_PAYLOAD)
+        elif self.path.startswith("/tavily/"):
+            self._send_json(TAVILY_PAYLOAD)
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        self._send_json({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "stub",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(CANNED_PREFERENCES)},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_apis() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAPIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def configure_offline() -> ThreadingHTTPServer:
+    """Point every external dependency at local stubs; returns the running stub server."""
+    server = start_stub_apis()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ.update({
+        "OPENROUTER_API_KEY": "offline",
+        "OPENROUTER_BASE_URL": f"{base}/openrouter",
+        "SPOONACULAR_API_KEY": "offline",
+        "SPOONACULAR_BASE_URL": f"{base}/spoonacular",
+        "TAVILY_API_KEY": "offline",
+        "TAVILY_BASE_URL": f"{base}/tavily",
+    })
+    # Keep the canned runs independent of whatever the developer has configured
+    for name in ("RECIPE_CORPUS_PATH", "SPOONACULAR_CACHE_PATH", "LLM_CACHE_PATH"):
+        os.environ.pop(name, None)
+    os.environ["CHECKPOINTER"] = "memory"
+
+    from Controller.llm_gateway import set_chat_model_factory
+    set_chat_model_factory(lambda model, temperature: FakeReActChatModel())
+    return server